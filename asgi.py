@@ -0,0 +1,9 @@
+"""ASGI entry point: long-poll / SSE clients wait on the event loop instead of holding a thread.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+    python serve.py --asgi --workers 4      (gunicorn + uvicorn worker, state bersama)
+"""
+from website import create_app
+from website.async_api import AsgiApp
+
+app = AsgiApp(create_app())
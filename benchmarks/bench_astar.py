@@ -0,0 +1,101 @@
+"""Benchmark A* lama vs baru (dict dan CompactGraph) pada graph grid sintetis.
+
+Jalankan dari root repo:
+    python -m benchmarks.bench_astar --sizes 10000 50000 100000
+"""
+import argparse
+import heapq
+import math
+import random
+import time
+
+from website.map_loader import CompactGraph
+from website.route_calculation import a_star, a_star_compact, compact_heuristic_scale, heuristic_scale
+
+
+def make_grid_graph(n_nodes, seed=13):
+    """Square grid graph with random edge weights >= grid distance."""
+    side = int(math.isqrt(n_nodes))
+    rng = random.Random(seed)
+    graph, coords = {}, {}
+    for x in range(side):
+        for y in range(side):
+            node = f"N{x}_{y}"
+            coords[node] = (x, y)
+            graph.setdefault(node, {})
+    for x in range(side):
+        for y in range(side):
+            node = f"N{x}_{y}"
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx < side and ny < side:
+                    other = f"N{nx}_{ny}"
+                    weight = rng.choice((1, 1, 2, 3))
+                    graph[node][other] = weight
+                    graph[other][node] = weight
+    return graph, coords, side
+
+
+def legacy_a_star(graph, coords, start, goal):
+    """Salinan algoritma lama (sebelum perbaikan) sebagai pembanding."""
+    def heuristic(node):
+        x1, y1 = coords[node]
+        x2, y2 = coords[goal]
+        return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
+
+    queue = [(0, start, [])]
+    visited = set()
+    while queue:
+        cost, current, path = heapq.heappop(queue)
+        path = path + [current]
+        if current == goal: return path
+        if current in visited: continue
+        visited.add(current)
+        for neighbor, weight in graph[current].items():
+            if neighbor not in visited:
+                heapq.heappush(queue, (cost + weight + heuristic(neighbor), neighbor, path))
+    return None
+
+
+def path_cost(graph, path):
+    return sum(graph[a][b] for a, b in zip(path, path[1:]))
+
+
+def run(sizes, queries, seed=13):
+    results = []
+    for size in sizes:
+        graph, coords, side = make_grid_graph(size, seed)
+        scale = heuristic_scale(graph, coords)
+        cg = CompactGraph.from_dicts(graph, coords)
+        cg_scale = compact_heuristic_scale(cg)
+        rng = random.Random(seed)
+        nodes = list(graph)
+        pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(queries)]
+
+        row = {"nodes": len(graph), "queries": queries}
+        for name, func in (("legacy", lambda s, g: legacy_a_star(graph, coords, s, g)),
+                           ("a_star", lambda s, g: a_star(graph, coords, s, g, scale=scale)),
+                           ("compact", lambda s, g: cg.path_names(
+                               a_star_compact(cg, cg.index[s], cg.index[g], scale=cg_scale)))):
+            started = time.perf_counter()
+            costs = [path_cost(graph, func(s, g)) for s, g in pairs]
+            elapsed = time.perf_counter() - started
+            row[name] = {"seconds": round(elapsed, 4), "total_cost": sum(costs)}
+        row["speedup"] = round(row["legacy"]["seconds"] / max(row["a_star"]["seconds"], 1e-9), 2)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--queries", type=int, default=5)
+    args = parser.parse_args()
+    for row in run(args.sizes, args.queries):
+        print(f"{row['nodes']:>7} nodes | legacy {row['legacy']['seconds']:>8}s cost {row['legacy']['total_cost']:>6}"
+              f" | a_star {row['a_star']['seconds']:>8}s cost {row['a_star']['total_cost']:>6}"
+              f" | compact {row['compact']['seconds']:>8}s"
+              f" | speedup x{row['speedup']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""HTTP polling benchmark: /api/robot-data requests per second with concurrent pollers (Flask test client).
+
+    python -m benchmarks.bench_http --pollers 1 4 16 --duration 3
+"""
+import argparse
+import json
+import tempfile
+import threading
+import time
+
+from .common import isolate_state
+
+VARIANTS = {
+    # nama -> (url, kirim If-None-Match dari jawaban sebelumnya)
+    "full": ("/api/robot-data", False),
+    "conditional": ("/api/robot-data", True),
+    "compact": ("/api/robot-data/compact", True),
+}
+
+
+def poll(app, url, conditional, duration, counts, index, errors):
+    client = app.test_client()
+    etag = None
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        headers = {'If-None-Match': etag} if conditional and etag else {}
+        response = client.get(url, headers=headers)
+        if response.status_code not in (200, 304):
+            errors.append(response.status_code)
+        etag = response.headers.get('ETag', etag)
+        done += 1
+    counts[index] = done
+
+
+def bench_variant(app, url, conditional, pollers, duration):
+    counts = [0] * pollers
+    errors = []
+    threads = [threading.Thread(target=poll, args=(app, url, conditional, duration, counts, i, errors))
+               for i in range(pollers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {"pollers": pollers, "requests": sum(counts), "per_second": round(sum(counts) / elapsed),
+            "errors": len(errors)}
+
+
+def run(pollers=(1, 4, 16), duration=3.0):
+    with tempfile.TemporaryDirectory(prefix='bench-http-') as tmp:
+        isolate_state(tmp)
+        from website import create_app
+
+        app = create_app()
+        results = {}
+        for name, (url, conditional) in VARIANTS.items():
+            results[name] = [bench_variant(app, url, conditional, n, duration) for n in pollers]
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pollers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=3.0, help="detik per varian per jumlah poller")
+    args = parser.parse_args()
+    print(json.dumps(run(args.pollers, args.duration), indent=4))
+
+
+if __name__ == "__main__":
+    main()
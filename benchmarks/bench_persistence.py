@@ -0,0 +1,98 @@
+"""State persistence benchmark: update_tujuan_db and add_to_delivery_history as history grows.
+
+Everything is written to a temporary directory, never to the repo's JSON files.
+
+    python -m benchmarks.bench_persistence --records 100000
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from website import database_management
+from website.database_management import add_to_delivery_history, read_delivery_history, update_tujuan_db
+from website.route_index import find_route, route_instructions
+from website.state_store import store
+
+from .common import isolate_state, round_seconds, timeit
+
+CHECKPOINTS = (1000, 10000, 100000)
+BATCH = 1000  # record yang diukur di tiap checkpoint
+
+
+def bench_update_tujuan_db(updates=5000):
+    """Status updates per second, and the cost of flushing the coalesced writes."""
+    path = find_route('START', '10A')[0]
+    rute = " -> ".join(path)
+    instruksi = route_instructions('START', '10A')
+    started = time.perf_counter()
+    for i in range(updates):
+        update_tujuan_db('10A', f"BENCH{i}", rute, instruksi, 104 + i % 3)
+    elapsed = time.perf_counter() - started
+    flush = timeit(store.flush, repeat=1)
+    return {
+        "updates": updates,
+        "per_second": round(updates / elapsed),
+        "flush_seconds": flush["min"],
+    }
+
+
+def bench_history(records=100000, checkpoints=CHECKPOINTS):
+    """Append throughput measured over a batch at each history size, plus page reads at the end."""
+    path = find_route('START', '10A')[0]
+    rute = " -> ".join(path)
+    instruksi = route_instructions('START', '10A')
+    pulang = " -> ".join(reversed(path))
+    history = database_management.history_store
+
+    def append(n):
+        for i in range(n):
+            add_to_delivery_history('10A', f"BENCH{i}", rute, instruksi, pulang, instruksi[0], "Paket tiba di Tujuan")
+
+    rows = []
+    for checkpoint in sorted(c for c in checkpoints if c <= records):
+        # Isi sampai tepat sebelum checkpoint, lalu ukur satu batch
+        append(max(checkpoint - BATCH - history.count(), 0))
+        started = time.perf_counter()
+        append(BATCH)
+        elapsed = time.perf_counter() - started
+        rows.append({"history_size": history.count(), "appends_per_second": round(BATCH / elapsed)})
+
+    total = history.count()
+    return {
+        "appends": rows,
+        "page_first": timeit(lambda: read_delivery_history(0, 50))["median"],
+        "page_last": timeit(lambda: read_delivery_history(total - 50, 50))["median"],
+        "cold_index_build": round_seconds(_cold_index(history.path)),
+    }
+
+
+def _cold_index(path):
+    from website.history_store import HistoryStore
+
+    started = time.perf_counter()
+    HistoryStore(path).count()
+    return time.perf_counter() - started
+
+
+def run(records=100000, updates=5000, fsync=True, directory=None):
+    with tempfile.TemporaryDirectory(prefix='bench-state-') as tmp:
+        isolate_state(directory or tmp, fsync=fsync)
+        return {
+            "fsync": fsync,
+            "update_tujuan_db": bench_update_tujuan_db(updates),
+            "history": bench_history(records),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--no-fsync", action="store_true", help="history append tanpa fsync per record")
+    args = parser.parse_args()
+    print(json.dumps(run(args.records, args.updates, fsync=not args.no_fsync), indent=4))
+
+
+if __name__ == "__main__":
+    main()
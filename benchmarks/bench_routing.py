@@ -0,0 +1,96 @@
+"""Routing benchmark: a_star_search, route index and generate_instructions.
+
+Runs on the shipped map (all pairs) and on synthetic grid maps.
+
+    python -m benchmarks.bench_routing --sizes 10000 100000
+"""
+import argparse
+import json
+import random
+
+from website import route_calculation
+from website.map_loader import CompactGraph
+from website.route_calculation import a_star_compact, a_star_search, compact_heuristic_scale, coords
+from website.route_index import RouteIndex, find_route
+from website.route_instructions import generate_instructions, generate_instructions_ids
+
+from .bench_astar import make_grid_graph
+from .common import timeit
+
+
+def bench_shipped_map(repeat=5):
+    """All node pairs of the active map."""
+    nodes = list(route_calculation.compact_graph.names)
+    pairs = [(a, b) for a in nodes for b in nodes if a != b]
+    paths = [a_star_search(a, b)[0] for a, b in pairs]
+
+    def run_a_star():
+        for a, b in pairs:
+            a_star_search(a, b)
+
+    def run_index():
+        for a, b in pairs:
+            find_route(a, b)
+
+    def run_instructions():
+        for path in paths:
+            generate_instructions(path, coords)
+
+    count = len(pairs)
+    return {
+        "nodes": len(nodes),
+        "pairs": count,
+        "a_star_search_per_query": _per(timeit(run_a_star, repeat), count),
+        "find_route_per_query": _per(timeit(run_index, repeat), count),
+        "generate_instructions_per_path": _per(timeit(run_instructions, repeat), count),
+        "route_index_build": timeit(lambda: RouteIndex(route_calculation.compact_graph), repeat),
+    }
+
+
+def bench_synthetic(size, queries=20, repeat=3, seed=13):
+    """A* and instruction generation on a random-weight grid of about `size` nodes."""
+    graph, grid_coords, _ = make_grid_graph(size, seed)
+    cg = CompactGraph.from_dicts(graph, grid_coords)
+    scale = compact_heuristic_scale(cg)
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(len(cg)), rng.randrange(len(cg))) for _ in range(queries)]
+    paths = [a_star_compact(cg, a, b, scale=scale) for a, b in pairs]
+
+    def run_a_star():
+        for a, b in pairs:
+            a_star_compact(cg, a, b, scale=scale)
+
+    def run_instructions():
+        for path in paths:
+            generate_instructions_ids(path, cg)
+
+    return {
+        "nodes": len(cg),
+        "queries": queries,
+        "mean_path_nodes": round(sum(len(path) for path in paths) / len(paths), 1),
+        "a_star_per_query": _per(timeit(run_a_star, repeat), queries),
+        "generate_instructions_per_path": _per(timeit(run_instructions, repeat), queries),
+    }
+
+
+def run(sizes=(10000, 100000), queries=20, repeat=3):
+    return {
+        "shipped_map": bench_shipped_map(),
+        "synthetic": [bench_synthetic(size, queries, repeat) for size in sizes],
+    }
+
+
+def _per(timing, count):
+    return {key: float(f"{value / count:.6g}") for key, value in timing.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.queries), indent=4))
+
+
+if __name__ == "__main__":
+    main()
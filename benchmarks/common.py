@@ -0,0 +1,53 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+from website import database_management, stats
+from website.database_management import DEFAULT_ELECTRONICS, DEFAULT_ROBOT_STATUS, ELECTRONICS_KEY, ROBOT_KEY
+from website.history_store import HistoryStore
+from website.state_store import store
+
+
+def isolate_state(directory, fsync=True):
+    """Point the state store and delivery history at `directory` so benchmarks never touch the repo's JSON files."""
+    os.makedirs(directory, exist_ok=True)
+    store.register(ELECTRONICS_KEY, os.path.join(directory, 'electronicsystem_database.json'), DEFAULT_ELECTRONICS)
+    store.register(ROBOT_KEY, os.path.join(directory, 'robot_status.json'), DEFAULT_ROBOT_STATUS)
+    store.register(stats.STATS_KEY, os.path.join(directory, 'delivery_stats.json'), stats.DEFAULT_STATS)
+    database_management.history_store = HistoryStore(os.path.join(directory, 'trekkinghistory_database.jsonl'),
+                                                     fsync=fsync)
+    return database_management.history_store
+
+
+def timeit(func, repeat=5, number=1):
+    """Run `func` `number` times per round; returns min/median seconds per call over `repeat` rounds."""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - started) / number)
+    return {"min": round_seconds(min(rounds)), "median": round_seconds(statistics.median(rounds))}
+
+
+def round_seconds(seconds):
+    return float(f"{seconds:.6g}")
+
+
+def environment():
+    """Machine/commit info stored with every result file."""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
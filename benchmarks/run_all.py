@@ -0,0 +1,82 @@
+"""Run every benchmark and write one JSON result file; optionally compare with an earlier file.
+
+Jalankan dari root repo:
+    python -m benchmarks.run_all --output benchmarks/results/baru.json
+    python -m benchmarks.run_all --quick --compare benchmarks/results/lama.json
+"""
+import argparse
+import json
+import os
+
+from . import bench_http, bench_persistence, bench_routing
+from .common import environment
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# Ukuran untuk --quick (cek cepat sebelum commit)
+QUICK = {"sizes": [10000], "records": 10000, "updates": 1000, "pollers": [1, 4], "duration": 1.0}
+FULL = {"sizes": [10000, 100000], "records": 100000, "updates": 5000, "pollers": [1, 4, 16], "duration": 3.0}
+
+
+def run(config, fsync=True):
+    return {
+        "environment": environment(),
+        "config": dict(config, fsync=fsync),
+        "routing": bench_routing.run(config["sizes"]),
+        "persistence": bench_persistence.run(config["records"], config["updates"], fsync=fsync),
+        "http": bench_http.run(config["pollers"], config["duration"]),
+    }
+
+
+def flatten(data, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}; list items are keyed by their size field when they have one."""
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            label = i
+            if isinstance(value, dict):
+                label = value.get("nodes", value.get("history_size", value.get("pollers", i)))
+            flat.update(flatten(value, f"{prefix}{label}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix.rstrip('.')] = data
+    return flat
+
+
+def compare(old, new):
+    """Lines 'metric: old -> new (ratio)' for every numeric metric present in both results."""
+    old_flat, new_flat = flatten({k: old.get(k) for k in ("routing", "persistence", "http")}), \
+        flatten({k: new.get(k) for k in ("routing", "persistence", "http")})
+    lines = []
+    for key in sorted(set(old_flat) & set(new_flat)):
+        before, after = old_flat[key], new_flat[key]
+        ratio = f"x{after / before:.2f}" if before else "-"
+        lines.append(f"{key}: {before} -> {after} ({ratio})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="file JSON hasil (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="file JSON hasil sebelumnya untuk dibandingkan")
+    parser.add_argument("--quick", action="store_true", help="ukuran kecil, untuk cek cepat")
+    parser.add_argument("--no-fsync", action="store_true")
+    args = parser.parse_args()
+
+    results = run(QUICK if args.quick else FULL, fsync=not args.no_fsync)
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"{results['environment']['commit'] or 'hasil'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=4)
+    print(f"Hasil disimpan di {output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)
+        print("\n".join(compare(previous, results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,6 @@ from website import create_app
 
 app = create_app()
 
+# Development saja; untuk produksi (beberapa worker) pakai serve.py
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
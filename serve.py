@@ -0,0 +1,66 @@
+"""Production server: several gunicorn worker processes sharing state through SQLite.
+
+    pip install gunicorn
+    python serve.py --workers 4 --bind 0.0.0.0:5000
+    python serve.py --asgi --workers 4     (butuh juga uvicorn; lihat website/async_api.py)
+
+Dengan robot asli (tanpa simulator): SIMULATOR=0 python serve.py. Setiap worker
+mencetak laporan waktu start ([startup] ...); lihat website/startup.py.
+
+main.py tetap untuk development (server Flask + reloader).
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATE_DB = os.path.join(BASE_DIR, 'shared_state.db')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count())),
+                        help="jumlah proses worker (default: WEB_CONCURRENCY atau jumlah core)")
+    parser.add_argument("--threads", type=int, default=int(os.environ.get('WEB_THREADS', 16)),
+                        help="thread per worker; long-poll/SSE memakai satu thread per klien")
+    parser.add_argument("--bind", default=os.environ.get('BIND', '0.0.0.0:5000'))
+    parser.add_argument("--state-db", default=os.environ.get('SHARED_STATE_DB', DEFAULT_STATE_DB),
+                        help="database SQLite untuk state bersama")
+    parser.add_argument("--asgi", action="store_true",
+                        help="worker uvicorn: long-poll/SSE menunggu di event loop, bukan satu thread per klien")
+    args = parser.parse_args()
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("gunicorn belum terpasang: pip install gunicorn (atau pakai main.py untuk development)")
+
+    # Dibaca create_app() di tiap worker
+    os.environ['SHARED_STATE_DB'] = args.state_db
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', args.bind)
+            self.cfg.set('workers', args.workers)
+            if args.asgi:
+                self.cfg.set('worker_class', 'uvicorn.workers.UvicornWorker')
+            else:
+                self.cfg.set('worker_class', 'gthread')
+                self.cfg.set('threads', args.threads)
+            # Long-poll /api/robot-data?since= bisa menahan request sampai 60 detik
+            self.cfg.set('timeout', 90)
+
+        def load(self):
+            # Tanpa preload: setiap worker membuat app (dan thread-nya) sendiri setelah fork
+            from website import create_app
+            if args.asgi:
+                from website.async_api import AsgiApp
+                return AsgiApp(create_app(), threads=args.threads)
+            return create_app()
+
+    Server().run()
+
+
+if __name__ == "__main__":
+    main()
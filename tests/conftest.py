@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Tanpa warm-up thread dan probe Wi-Fi supaya test tidak menjalankan subprocess di background
+os.environ.setdefault('WARMUP', 'off')
+os.environ.setdefault('WIFI_PROBE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from website import create_app  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,56 @@
+import pytest
+
+from website.telemetry import TelemetrySample
+
+
+@pytest.mark.parametrize('body, error', [
+    ({'from': 'START', 'to': 'SIMPANG_UTAMA', 'ttl': 'abc'}, 'ttl harus angka'),
+    ({'from': 'START', 'to': 'SIMPANG_UTAMA', 'ttl': [5]}, 'ttl harus angka'),
+    ({'from': 'START', 'to': 'SIMPANG_UTAMA', 'ttl': 0}, 'ttl harus angka > 0'),
+    ({'from': 'START', 'to': 'SIMPANG_UTAMA', 'ttl': -5}, 'ttl harus angka > 0'),
+    ({'from': 'START', 'to': 'SIMPANG_UTAMA', 'ttl': 'nan'}, 'ttl harus angka > 0'),
+    ({'from': 'START', 'to': 'SIMPANG_UTAMA', 'factor': 'banyak'}, 'factor harus angka'),
+    ({'from': 5, 'to': 'SIMPANG_UTAMA'}, 'from/to harus nama node'),
+    ({'from': 'START', 'to': ['SIMPANG_UTAMA']}, 'from/to harus nama node'),
+    (['START', 'SIMPANG_UTAMA'], 'Body harus JSON object'),
+])
+def test_edges_rejects_bad_input_with_400(client, body, error):
+    response = client.post('/api/edges/congest', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == error
+
+
+def test_edges_unknown_corridor_is_404(client):
+    response = client.post('/api/edges/block', json={'from': 'START', 'to': '10B'})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('code', [[201], {'kode': 201}, 999, '201', True])
+def test_telemetry_sample_rejects_bad_hardware_codes(code):
+    with pytest.raises(ValueError):
+        TelemetrySample.parse({'raspberry': code}, now=0)
+
+
+def test_telemetry_sample_accepts_known_codes():
+    sample = TelemetrySample.parse({'t': 5, 'esp32': 203, 'wifi': 253}, now=0)
+    assert sample.codes == {'esp32': 203, 'wifi': 253}
+
+
+def test_telemetry_endpoint_reports_bad_codes_as_rejected(client):
+    response = client.post('/api/telemetry', json={'robot_id': 'ROBOT_1', 'samples': [{'camera': {'x': 1}}, {'wifi': [251]}]})
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['rejected']] == [0, 1]
+
+
+@pytest.mark.parametrize('sample', [{'t': float('nan'), 'battery': 50}, {'t': float('inf'), 'battery': 50},
+                                    {'battery': float('nan')}, {'battery': float('inf')}])
+def test_telemetry_sample_rejects_non_finite_numbers(sample):
+    with pytest.raises(ValueError):
+        TelemetrySample.parse(sample, now=0)
+
+
+def test_telemetry_endpoint_reports_nan_timestamp_as_rejected(client):
+    body = '{"robot_id": "ROBOT_1", "samples": [{"t": NaN, "battery": 50}, {"t": Infinity, "battery": 50}]}'
+    response = client.post('/api/telemetry', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['rejected']] == [0, 1]
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+import time
+
+from website.async_api import StateChanges
+from website.state_store import store
+
+KEY = 'test:async'
+store.register(KEY, None, {})
+
+
+def test_waiter_wakes_up_on_change_from_another_thread(app):
+    async def scenario():
+        changes = StateChanges(asyncio.get_running_loop())
+        try:
+            since = store.version(KEY)
+            started = time.monotonic()
+            waiters = [asyncio.ensure_future(changes.wait(KEY, since, 5)) for _ in range(50)]
+            await asyncio.sleep(0.05)
+            threading.Thread(target=store.put, args=(KEY, {'n': since + 1})).start()
+            versions = await asyncio.gather(*waiters)
+            return since, versions, time.monotonic() - started
+        finally:
+            changes.close()
+
+    since, versions, elapsed = asyncio.run(scenario())
+    assert len(set(versions)) == 1 and versions[0] != since
+    assert versions[0] == store.version(KEY)
+    assert elapsed < 2
+
+
+def test_waiter_times_out_without_change(app):
+    async def scenario():
+        changes = StateChanges(asyncio.get_running_loop())
+        try:
+            since = store.version(KEY)
+            started = time.monotonic()
+            return since, await changes.wait(KEY, since, 0.1), time.monotonic() - started
+        finally:
+            changes.close()
+
+    since, version, elapsed = asyncio.run(scenario())
+    assert version == since
+    assert 0.05 < elapsed < 2
+
+
+def test_stale_since_returns_at_once(app):
+    async def scenario():
+        changes = StateChanges(asyncio.get_running_loop())
+        try:
+            return await changes.wait(KEY, store.version(KEY) + 100, 5)
+        finally:
+            changes.close()
+
+    started = time.monotonic()
+    assert asyncio.run(scenario()) == store.version(KEY)
+    assert time.monotonic() - started < 1
@@ -0,0 +1,34 @@
+import pytest
+
+from website import compact_payload
+from website.compact_payload import HEADER, MAX_ITEMS, PayloadTooLarge, pack_status
+
+
+def robot_data(codes):
+    return {"status_robot": 1, "status_paket": 2, "instruksi_navigasi": [["-"] * len(codes), codes],
+            "rute_terakhir": '-'}
+
+
+def test_pack_status_layout():
+    payload = pack_status(7, robot_data([0, -1, 1, 4]))
+    assert HEADER.unpack_from(payload) == (7, 1, 2, 4, 0)
+    assert payload[HEADER.size:] == bytes([0, 0xFF, 1, 4])
+
+
+def test_pack_status_refuses_to_truncate_long_routes():
+    with pytest.raises(PayloadTooLarge):
+        pack_status(1, robot_data([0] * (MAX_ITEMS + 1)))
+
+
+def test_pack_status_refuses_node_ids_above_uint16(monkeypatch):
+    monkeypatch.setattr(compact_payload, 'route_node_ids', lambda rute: [1, 70000])
+    with pytest.raises(PayloadTooLarge):
+        pack_status(1, robot_data([]))
+
+
+def test_binary_endpoint_answers_406_when_route_does_not_fit(client, monkeypatch):
+    monkeypatch.setattr(compact_payload, 'route_node_ids', lambda rute: [70000])
+    response = client.get('/api/robot-data/compact?format=bin')
+    assert response.status_code == 406
+    assert 'JSON' in response.get_json()['error']
+    assert client.get('/api/robot-data/compact').status_code == 200
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from website.database_management import robot_key
+from website.fleet import FleetScheduler
+from website.mission_executor import MISSION_CANCELLED, MISSION_DONE, MissionExecutor
+from website.state_store import store
+
+
+@pytest.fixture
+def fleet(app):
+    started = []
+    scheduler = FleetScheduler(robot_ids=(), runner=lambda job, robot_id, rute, instruksi: started.append((job, robot_id)))
+    scheduler.set_robots(['TEST_A', 'TEST_B'], persist=False)
+    scheduler.started = started
+    return scheduler
+
+
+def place(robot_id, posisi):
+    store.update(robot_key(robot_id), lambda doc: doc.update(posisi=posisi))
+
+
+def test_job_goes_to_nearest_idle_robot(fleet):
+    place('TEST_A', 'START')
+    place('TEST_B', '10A')
+    job, message = fleet.submit('10a', 'Budi')
+    assert message == "OK"
+    assert fleet.started == [(job, 'TEST_B')]
+
+
+def test_jobs_wait_for_a_free_robot(fleet):
+    place('TEST_A', 'START')
+    place('TEST_B', 'START')
+    jobs = [fleet.submit(tujuan, 'Budi')[0] for tujuan in ('10A', '10B', '11A')]
+    assert [job for job, _ in fleet.started] == jobs[:2]
+    assert [job['id'] for job in fleet.queued_jobs()] == [jobs[2].id]
+    fleet.mission_finished(fleet.started[0][1])
+    assert [job for job, _ in fleet.started] == jobs
+
+
+def test_duplicate_order_returns_existing_job(fleet):
+    first, _ = fleet.submit('10A', 'Budi')
+    again, message = fleet.submit('10A', 'Budi')
+    assert (again, message) == (first, "DUPLIKAT")
+
+
+def test_executor_dedupes_active_missions_by_key():
+    executor = MissionExecutor(max_workers=2)
+    release = threading.Event()
+    first, created = executor.submit(1, 'robot:10A', lambda cancel_event: release.wait(5))
+    again, created_again = executor.submit(2, 'robot:10A', lambda cancel_event: None)
+    assert created and not created_again and again is first
+    release.set()
+    first.future.result(5)
+    assert first.state == MISSION_DONE
+    # Setelah selesai key yang sama boleh dijalankan lagi
+    assert executor.submit(3, 'robot:10A', lambda cancel_event: None)[1]
+
+
+def test_executor_cancel_sets_event_and_state():
+    executor = MissionExecutor(max_workers=1)
+    running = threading.Event()
+
+    def mission(cancel_event):
+        running.set()
+        cancel_event.wait(5)
+
+    submitted, _ = executor.submit(1, 'robot:10B', mission)
+    running.wait(5)
+    assert executor.cancel(1)
+    submitted.future.result(5)
+    assert submitted.state == MISSION_CANCELLED
+    assert not executor.cancel(1)
+    assert not executor.cancel(99)
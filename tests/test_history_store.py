@@ -0,0 +1,41 @@
+import json
+
+from website.history_store import HistoryStore
+
+
+def records(n, start=0):
+    return [{"tujuan_sekarang": f"R{i}", "pengirim_terakhir": "Budi"} for i in range(start, start + n)]
+
+
+def test_legacy_json_array_is_migrated_once(tmp_path):
+    legacy = tmp_path / 'history.json'
+    legacy.write_text(json.dumps(records(3)))
+    log = tmp_path / 'history.jsonl'
+    history = HistoryStore(str(log), legacy_path=str(legacy), fsync=False)
+    assert history.count() == 3
+    assert history.append(records(1, 3)[0]) == 3
+    # File lama dibiarkan; migrasi tidak diulang walaupun file lama berubah
+    assert json.loads(legacy.read_text()) == records(3)
+    legacy.write_text(json.dumps(records(10)))
+    assert HistoryStore(str(log), legacy_path=str(legacy), fsync=False).page(0, 100) == records(4)
+
+
+def test_page_seeks_through_the_index(tmp_path):
+    history = HistoryStore(str(tmp_path / 'history.jsonl'), fsync=False)
+    for record in records(20):
+        history.append(record)
+    assert history.page(15, 3) == records(3, 15)
+    assert history.page(19, 10) == records(1, 19)
+    assert history.page(25, 10) == []
+    assert history.page(-5, 2) == records(2)
+
+
+def test_index_skips_broken_lines_and_closes_truncated_tail(tmp_path):
+    log = tmp_path / 'history.jsonl'
+    lines = [json.dumps(record) for record in records(2)]
+    log.write_text(lines[0] + '\nbukan json\n' + lines[1] + '\n{"tujuan_seka')
+    history = HistoryStore(str(log), fsync=False)
+    assert history.count() == 2
+    history.append(records(1, 2)[0])
+    assert history.page(0, 10) == records(3)
+    assert HistoryStore(str(log), fsync=False).count() == 3
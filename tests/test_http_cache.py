@@ -0,0 +1,48 @@
+import time
+
+from website.state_store import store
+
+
+def test_unchanged_robot_data_answers_304(client):
+    first = client.get('/api/robot-data')
+    etag = first.headers['ETag']
+    again = client.get('/api/robot-data', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == etag
+    assert again.data == b''
+
+
+def test_etag_carries_state_epoch(client):
+    response = client.get('/api/robot-data')
+    assert response.headers['ETag'].startswith(f'"{store.epoch}-')
+    assert response.headers['X-State-Epoch'] == store.epoch
+
+
+def test_etag_from_before_restart_does_not_match(client, monkeypatch):
+    etag = client.get('/api/robot-data').headers['ETag']
+    # Restart = epoch baru, versi mulai lagi dari angka yang sama
+    monkeypatch.setattr(store, 'epoch', 'restarted')
+    response = client.get('/api/robot-data', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_compact_payload_304(client):
+    etag = client.get('/api/robot-data/compact').headers['ETag']
+    assert client.get('/api/robot-data/compact', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_long_poll_with_stale_since_answers_at_once(client):
+    version = int(client.get('/api/robot-data').headers['X-State-Version'])
+    started = time.monotonic()
+    response = client.get(f'/api/robot-data?since={version + 100}&timeout=5')
+    assert response.status_code == 200
+    assert time.monotonic() - started < 1
+    assert response.get_json()['version'] == version
+
+
+def test_long_poll_without_change_waits_for_timeout(client):
+    version = int(client.get('/api/robot-data').headers['X-State-Version'])
+    started = time.monotonic()
+    client.get(f'/api/robot-data?since={version}&timeout=0.3')
+    assert time.monotonic() - started >= 0.3
@@ -0,0 +1,35 @@
+import pytest
+
+from website import multi_stop
+from website.multi_stop import plan_tour, tour_plan
+
+
+def test_stop_at_start_is_kept_as_first_visit():
+    order, cost = plan_tour(['10A', '10B'], start='10A')
+    assert order == ['10A', '10B']
+    assert cost == plan_tour(['10B'], start='10A')[1]
+
+
+def test_only_stop_at_start():
+    order, cost = plan_tour(['10A'], start='10A', end=None)
+    assert (order, cost) == (['10A'], 0.0)
+
+
+def test_repeated_stops_are_visited_once():
+    order, _ = plan_tour(['10B', '10a', '10A', '10B'])
+    assert sorted(order) == ['10A', '10B']
+
+
+def test_tour_plan_stops_in_place_for_stop_at_start():
+    path, (texts, codes) = tour_plan('10A', ['10A', '10B'])
+    assert path[0] == '10A' and path[-1] == '10B'
+    assert codes[0] == 4  # berhenti di 10A dulu
+
+
+@pytest.mark.parametrize('limit', [10, 0])  # Held-Karp dan nearest neighbour + 2-opt
+def test_unreachable_stop_gives_no_route(monkeypatch, limit):
+    real_cost = multi_stop.route_cost
+    monkeypatch.setattr(multi_stop, 'HELD_KARP_LIMIT', limit)
+    monkeypatch.setattr(multi_stop, 'route_cost', lambda a, b: None if '10B' in (a, b) else real_cost(a, b))
+    assert plan_tour(['10A', '10B']) == (None, 'Jalur Tidak Ditemukan')
+    assert plan_tour(['10A', '10B'], start='10A') == (None, 'Jalur Tidak Ditemukan')
@@ -0,0 +1,13 @@
+from website import route_calculation, route_index
+from website.route_instructions import generate_return_instructions
+
+
+def test_return_instructions_follow_the_found_path(monkeypatch):
+    route_calculation.ensure_map()
+    # Koridor ditutup di antara find_route dan lookup instruksi: tidak boleh dipakai lagi
+    monkeypatch.setattr(route_index, 'route_instructions', lambda start, goal: None)
+    texts, codes, rute = generate_return_instructions('10A', route_calculation.coords)
+    assert texts[0] == "--- MODE PULANG ---"
+    assert rute.startswith('10A') and rute.endswith('START')
+    assert codes[-1] == 4 and len(codes) > 1
+
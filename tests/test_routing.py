@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from website.map_loader import CompactGraph
+from website.replanner import DStarLite
+from website.route_calculation import a_star_compact
+from website.route_index import RouteIndex
+
+_INF = float('inf')
+
+
+def random_grid(size, seed, drop=0.15):
+    """size x size grid, two-way corridors with random detours; some corridors are missing."""
+    rng = random.Random(seed)
+    names = [f"N{i}" for i in range(size * size)]
+    xs = [i % size for i in range(size * size)]
+    ys = [i // size for i in range(size * size)]
+    edges = []
+    for i in range(size * size):
+        for j in (i + 1 if xs[i] + 1 < size else None, i + size if ys[i] + 1 < size else None):
+            if j is not None and rng.random() > drop:
+                weight = round(1.0 + rng.random() * 2, 3)  # >= jarak lurus, heuristik tetap admissible
+                edges += [(i, j, weight), (j, i, weight)]
+    return CompactGraph(names, xs, ys, edges)
+
+
+def path_cost(cg, path, weights=None):
+    weights = weights if weights is not None else cg.weights
+    total = 0.0
+    for u, v in zip(path, path[1:]):
+        total += min(weights[pos] for pos in range(cg.offsets[u], cg.offsets[u + 1]) if cg.targets[pos] == v)
+    return total
+
+
+@pytest.mark.parametrize('all_pairs', [True, False])
+def test_route_index_matches_a_star(all_pairs):
+    cg = random_grid(9, seed=13)
+    index = RouteIndex(cg, all_pairs=all_pairs)
+    rng = random.Random(7)
+    for _ in range(200):
+        start, goal = rng.randrange(len(cg)), rng.randrange(len(cg))
+        expected = a_star_compact(cg, start, goal)
+        path = index.path(cg.names[start], cg.names[goal])
+        if expected is None:
+            assert path is None and index.cost(cg.names[start], cg.names[goal]) is None
+            continue
+        cost = index.cost(cg.names[start], cg.names[goal])
+        assert cost == pytest.approx(path_cost(cg, expected))
+        assert path[0] == cg.names[start] and path[-1] == cg.names[goal]
+        assert path_cost(cg, cg.ids(path)) == pytest.approx(cost)
+
+
+def test_dstar_repair_matches_fresh_a_star_after_blocks():
+    cg = random_grid(10, seed=3, drop=0.05)
+    start, goal = 0, len(cg) - 1
+    planner = DStarLite(cg, start, goal)
+    assert planner.compute() == pytest.approx(path_cost(cg, a_star_compact(cg, start, goal)))
+
+    weights = cg.weights
+    rng = random.Random(5)
+    for _ in range(6):
+        # Tutup satu koridor di jalur sekarang (dua arah), robot maju satu langkah
+        path = planner.path()
+        if path is None:
+            break
+        u, v = path[len(path) // 2 - 1], path[len(path) // 2]
+        weights = weights[:]
+        changed = []
+        for a, b in ((u, v), (v, u)):
+            for pos in range(cg.offsets[a], cg.offsets[a + 1]):
+                if cg.targets[pos] == b:
+                    weights[pos] = _INF
+            changed.append((a, b))
+        planner.update_edges(weights, changed)
+        if len(path) > 2 and rng.random() < 0.5:
+            planner.move_to(path[1])
+        cost = planner.compute()
+
+        fresh = a_star_compact(cg, planner.start, goal, weights=weights)
+        if fresh is None:
+            assert cost == _INF and planner.path() is None
+            break
+        assert cost == pytest.approx(path_cost(cg, fresh, weights))
+        repaired = planner.path()
+        assert repaired[0] == planner.start and repaired[-1] == goal
+        assert path_cost(cg, repaired, weights) == pytest.approx(cost)
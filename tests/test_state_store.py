@@ -0,0 +1,71 @@
+import json
+import os
+import time
+
+from website.state_store import SqliteBackend, StateStore
+
+
+def test_writes_are_served_from_memory_and_flushed_behind(tmp_path):
+    path = tmp_path / 'doc.json'
+    store = StateStore(flush_delay=0.5)
+    store.register('doc', str(path), {})
+    for i in range(5):
+        store.put('doc', {'i': i})
+    assert store.get('doc') == {'i': 4}
+    # Writer masih menunggu flush_delay: belum ada yang ditulis
+    assert not path.exists()
+    store.flush()
+    assert json.loads(path.read_text()) == {'i': 4}
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.tmp-')]
+
+
+def test_versions_per_key_and_global():
+    store = StateStore()
+    store.register('a', None, {})
+    store.register('b', None, {})
+    store.put('a', {'x': 1})
+    store.update('b', lambda doc: doc.update(y=2))
+    assert store.version() == 2
+    assert (store.version('a'), store.version('b')) == (1, 2)
+    assert store.snapshot('b') == (2, {'y': 2})
+
+
+def test_update_returns_copy():
+    store = StateStore()
+    store.register('doc', None, {'items': []})
+    result = store.update('doc', lambda doc: doc['items'].append(1))
+    result['items'].append(2)
+    assert store.get('doc') == {'items': [1]}
+
+
+def test_wait_for_change_returns_at_once_for_stale_or_changed_version():
+    store = StateStore()
+    store.register('doc', None, {})
+    store.put('doc', {'x': 1})
+    started = time.monotonic()
+    assert store.wait_for_change(100, timeout=5, key='doc') == 1  # since dari sebelum restart
+    assert store.wait_for_change(1, timeout=0.05, key='doc') == 1  # timeout
+    assert time.monotonic() - started < 1
+
+
+def test_sqlite_epoch_and_versions_survive_restart(tmp_path):
+    db = str(tmp_path / 'state.db')
+    first = StateStore()
+    first.register('doc', None, {})
+    first.use_backend(SqliteBackend(db))
+    first.put('doc', {'x': 1})
+    first.put('doc', {'x': 2})
+
+    # "Restart": store dan koneksi baru ke database yang sama
+    second = StateStore()
+    second.register('doc', None, {})
+    second.use_backend(SqliteBackend(db))
+    assert second.epoch == first.epoch
+    assert second.snapshot('doc') == (2, {'x': 2})
+
+
+def test_memory_store_epoch_changes_with_backend(tmp_path):
+    store = StateStore()
+    memory_epoch = store.epoch
+    store.use_backend(SqliteBackend(str(tmp_path / 'state.db')))
+    assert store.epoch != memory_epoch
@@ -0,0 +1,50 @@
+import pytest
+
+from website import database_management, stats
+from website.history_store import HistoryStore
+from website.state_store import StateStore
+
+
+@pytest.fixture
+def fresh_stats(tmp_path, monkeypatch):
+    """stats module on a memory-only store and a temporary history."""
+    store = StateStore()
+    store.register(stats.STATS_KEY, None, stats.DEFAULT_STATS)
+    history = HistoryStore(str(tmp_path / 'history.jsonl'), fsync=False)
+    monkeypatch.setattr(stats, 'store', store)
+    monkeypatch.setattr(stats, '_initialized', False)
+    monkeypatch.setattr(database_management, 'history_store', history)
+    return history
+
+
+def test_seeded_from_history_once(fresh_stats):
+    fresh_stats.append({"tujuan_sekarang": "10A", "pengirim_terakhir": "Budi", "rute_pulang": "10A -> X -> START"})
+    fresh_stats.append({"tujuan_sekarang": "10B", "pengirim_terakhir": "Budi"})
+    result = stats.read_stats()
+    assert result["total"] == 2
+    assert result["per_tujuan"] == {"10A": 1, "10B": 1}
+    assert result["panjang_pulang"]["count"] == 1
+    # Record baru setelah seed tidak men-scan history lagi
+    fresh_stats.append({"tujuan_sekarang": "10C", "pengirim_terakhir": "Ani"})
+    assert stats.read_stats()["total"] == 2
+
+
+def test_record_mission_before_history_append_counts_once(fresh_stats):
+    fresh_stats.append({"tujuan_sekarang": "10A", "pengirim_terakhir": "Budi"})
+    # Urutan di mockup_robot: record_mission dulu, baru history
+    stats.record_mission("10B", "Ani", 95.5, "10B -> X -> START")
+    fresh_stats.append({"tujuan_sekarang": "10B", "pengirim_terakhir": "Ani"})
+    result = stats.read_stats()
+    assert result["total"] == 2
+    assert result["per_pengirim"] == {"Budi": 1, "Ani": 1}
+    assert result["durasi"]["count"] == 1 and result["durasi"]["histogram"] == {"<=120": 1}
+    assert result["panjang_pulang"]["mean"] == 2
+
+
+def test_multi_drop_legs_without_duration_are_only_counted(fresh_stats):
+    stats.record_mission("10A", "Budi", None, None)
+    stats.record_mission("10B", "Budi", 40, "10B -> START")
+    result = stats.read_stats()
+    assert result["total"] == 2
+    assert result["durasi"]["count"] == 1
+    assert result["panjang_pulang"]["count"] == 1
@@ -1,9 +1,68 @@
+import os
+import time
+
+_import_started = time.perf_counter()  # lama import paket (flask paling lama) masuk laporan startup
+
 from flask import Flask
 
+def _env_flag(name, default='1'):
+    return os.environ.get(name, default).lower() not in ('0', 'false', 'no')
+
 def create_app():
+    global _import_seconds
+    from .startup import DEFAULT_TARGET_SECONDS, StartupReport
+    # create_app() berikutnya di proses yang sama (test, benchmark) hanya menghitung dirinya sendiri
+    report = StartupReport(_import_seconds)
+    _import_seconds = 0.0
+
     app = Flask(__name__)
     app.config['SECRET_KEY'] = 'kelompok13'
+    app.config['MISSION_WORKERS'] = int(os.environ.get('MISSION_WORKERS', 4))  # batas misi berjalan bersamaan
+    # Daftar robot di armada, mis. ROBOT_IDS="ROBOT_1,ROBOT_2"
+    app.config['ROBOT_IDS'] = [robot_id.strip().upper() for robot_id in os.environ.get('ROBOT_IDS', 'ROBOT_1').split(',') if robot_id.strip()]
+    # Timer/histogram /metrics; METRICS_ENABLED=0 mematikan pencatatan (hampir tanpa overhead)
+    app.config['METRICS_ENABLED'] = _env_flag('METRICS_ENABLED')
+
+    # Mode multi-worker (serve.py): state dibagi lewat SQLite, satu worker (leader) menjalankan misi
+    app.config['SHARED_STATE_DB'] = os.environ.get('SHARED_STATE_DB', '')
+
+    # Subsystem yang bisa dimatikan untuk start cepat di Raspberry Pi:
+    # SIMULATOR=0 -> misi diserahkan ke robot asli, mockup_robot tidak pernah diimpor
+    # WIFI_PROBE=0 -> tidak ada probe SSID (iwgetid/nmcli) di background
+    # WARMUP=background|sync|off -> map, route index, state & history dibangun setelah start / saat dipakai
+    app.config['SIMULATOR'] = _env_flag('SIMULATOR')
+    app.config['WIFI_PROBE'] = _env_flag('WIFI_PROBE')
+    app.config['WARMUP'] = os.environ.get('WARMUP', 'background').lower()
+    app.config['STARTUP_TARGET_SECONDS'] = float(os.environ.get('STARTUP_TARGET_SECONDS', DEFAULT_TARGET_SECONDS))
+
+    with report.phase('metrics'):
+        from . import metrics
+        metrics.init_app(app)
+
+    if app.config['SHARED_STATE_DB']:
+        with report.phase('cluster'):
+            from . import cluster
+            cluster.enable(app.config['SHARED_STATE_DB'])
+
+    with report.phase('views'):
+        from .views import views
+        app.register_blueprint(views, url_prefix='/')
+
+    with report.phase('fleet'):
+        from .fleet import configure_fleet
+        configure_fleet(app.config['ROBOT_IDS'], app.config['MISSION_WORKERS'], simulator=app.config['SIMULATOR'])
+
+    # Probe Wi-Fi di background sejak awal supaya render pertama sudah punya SSID
+    from .dashboard_home import wifi_provider
+    wifi_provider.enabled = app.config['WIFI_PROBE']
+    wifi_provider.start()
+
+    # Statistik di-seed dari history saat pertama dibaca (stats.ensure_initialized) atau saat warm-up
+    with report.phase('warmup'):
+        from .startup import start_warm_up
+        start_warm_up(app, report, app.config['WARMUP'])
+    app.extensions['startup'] = report
+    report.finish(app.config['STARTUP_TARGET_SECONDS'])
+    return app
 
-    from .views import views
-    app.register_blueprint(views, url_prefix='/')
-    return app
\ No newline at end of file
+_import_seconds = time.perf_counter() - _import_started
@@ -0,0 +1,291 @@
+"""ASGI front for the Flask app: waiting for state changes without holding a thread.
+
+Long-poll requests to /api/robot-data (and /compact) with `?since=` and the
+SSE stream wait on the event loop until the state store reports a change,
+so thousands of idle ESP32 / dashboard connections cost no threads. Every
+request is finally answered by the normal Flask views, run in a small
+thread pool through a WSGI bridge (the long-poll is forwarded with
+`timeout=0`, so the view no longer waits).
+
+    uvicorn asgi:app          (lihat asgi.py / serve.py --asgi)
+"""
+import asyncio
+import io
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode
+
+from .database_management import DEFAULT_ROBOT_ID, read_robot_snapshot, robot_key
+from .fleet import scheduler
+from .state_store import SHARED_POLL_INTERVAL, store
+from .views import LONG_POLL_TIMEOUT, long_poll_timeout
+
+SSE_HEARTBEAT = 15
+WSGI_THREADS = 16           # thread untuk menjalankan view Flask
+
+ROBOT_DATA_PATH = re.compile(r'^/api/robot-data(?:/(?P<robot_id>[^/]+))?(?P<compact>/compact)?$')
+
+
+class StateChanges:
+    """Lets coroutines wait for a state store version without blocking the event loop.
+
+    The versions of the keys being waited on are kept in a dict on the loop;
+    waiters only read that dict. The store calls `_from_thread` on every
+    change (from whichever thread made it); the loop then re-reads the
+    versions once, in a worker thread (store.version() can wait for the store
+    lock or SQLite), updates the dict and resolves one shared future so every
+    waiter re-checks. In shared (multi-process) mode a poll task picks up
+    commits from other workers.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._future = loop.create_future()
+        self._versions = {}      # key -> versi terakhir yang dibaca
+        self._dirty = False      # ada perubahan yang belum dibaca _refresh
+        self._generation = 0     # naik setiap ada perubahan, untuk key yang baru mulai ditunggu
+        self._refresher = None
+        self._poller = None
+        store.add_listener(self._from_thread)
+        if store.shared:
+            self._poller = loop.create_task(self._poll_shared())
+
+    def close(self):
+        store.remove_listener(self._from_thread)
+        for task in (self._poller, self._refresher):
+            if task is not None:
+                task.cancel()
+
+    def _from_thread(self):
+        try:
+            self._loop.call_soon_threadsafe(self._changed)
+        except RuntimeError:
+            pass  # loop sudah ditutup
+
+    def _changed(self):
+        self._dirty = True
+        self._generation += 1
+        if self._refresher is None or self._refresher.done():
+            self._refresher = self._loop.create_task(self._refresh())
+
+    async def _refresh(self):
+        # Perubahan beruntun digabung: satu pembacaan per putaran, bukan per waiter
+        while self._dirty:
+            self._dirty = False
+            self._versions.update(await asyncio.to_thread(_read_versions, list(self._versions)))
+            self._wake()
+
+    def _wake(self):
+        if not self._future.done():
+            self._future.set_result(None)
+        self._future = self._loop.create_future()
+
+    async def _poll_shared(self):
+        while True:
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+            await asyncio.to_thread(store.poll)
+
+    async def _track(self, key):
+        generation = self._generation
+        version = (await asyncio.to_thread(_read_versions, [key]))[key]
+        self._versions.setdefault(key, version)
+        if self._generation != generation:
+            self._changed()  # ada perubahan selama membaca: baca ulang bersama key lain
+
+    async def wait(self, key, since, timeout):
+        """Wait until the version of `key` differs from `since` (or timeout). Returns the version."""
+        if key not in self._versions:
+            await self._track(key)
+        deadline = self._loop.time() + timeout
+        while True:
+            version = self._versions[key]
+            remaining = deadline - self._loop.time()
+            if version != since or remaining <= 0:
+                return version
+            try:
+                await asyncio.wait_for(asyncio.shield(self._future), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+
+def _read_versions(keys):
+    return {key: store.version(key) for key in keys}
+
+
+class AsgiApp:
+    """ASGI application wrapping `wsgi_app` (the Flask app)."""
+
+    def __init__(self, wsgi_app, threads=WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self._changes = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        if self._changes is None:
+            # Server tanpa lifespan: buat saat request pertama
+            self._changes = StateChanges(asyncio.get_running_loop())
+
+        if scope['method'] == 'GET' and scope['path'] == '/api/robot-data/stream':
+            await self._stream(scope, receive, send)
+            return
+        body = await _read_body(receive)
+        query = dict(parse_qsl(scope['query_string'].decode('latin1')))
+        match = ROBOT_DATA_PATH.match(scope['path'])
+        if scope['method'] == 'GET' and match and 'since' in query:
+            scope = await self._long_poll(scope, receive, query, match)
+            if scope is None:
+                return  # klien sudah putus
+        await self._forward(scope, body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self._changes = StateChanges(asyncio.get_running_loop())
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._changes is not None:
+                    self._changes.close()
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _long_poll(self, scope, receive, query, match):
+        # Tunggu di event loop, lalu teruskan ke view dengan timeout=0 supaya view tidak menunggu lagi
+        robot_id = (match.group('robot_id') or DEFAULT_ROBOT_ID).upper()
+        if robot_id in scheduler.robot_ids:
+            try:
+                since = int(query['since'])
+                timeout = long_poll_timeout(float(query.get('timeout', LONG_POLL_TIMEOUT)))
+            except ValueError:
+                since, timeout = None, 0
+            if since is not None and not await _until_disconnect(
+                    receive, self._changes.wait(robot_key(robot_id), since, timeout)):
+                return None
+        query['timeout'] = '0'
+        return dict(scope, query_string=urlencode(query).encode('latin1'))
+
+    async def _stream(self, scope, receive, send):
+        """Server-Sent Events for the default robot, same format as the Flask view."""
+        query = dict(parse_qsl(scope['query_string'].decode('latin1')))
+        headers = dict(scope['headers'])
+        try:
+            since = int(query.get('since', headers.get(b'last-event-id', b'-1').decode('latin1')))
+        except ValueError:
+            since = -1
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        key = robot_key(DEFAULT_ROBOT_ID)
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            while not disconnected.done():
+                waiting = asyncio.ensure_future(self._changes.wait(key, since, SSE_HEARTBEAT))
+                await asyncio.wait({waiting, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    waiting.cancel()
+                    break
+                if waiting.result() == since:
+                    chunk = ": keep-alive\n\n"
+                else:
+                    since, data = await asyncio.to_thread(read_robot_snapshot)
+                    chunk = f"id: {since}\nevent: status\ndata: {json.dumps(data)}\n\n"
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        finally:
+            disconnected.cancel()
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+
+    async def _forward(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        status, headers, chunks = await loop.run_in_executor(
+            self._executor, _call_wsgi, self.wsgi_app, _environ(scope, body))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''.join(chunks), 'more_body': False})
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _until_disconnect(receive, coro):
+    """Run `coro`; returns False (and cancels it) if the client disconnects first."""
+    task = asyncio.ensure_future(coro)
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    await asyncio.wait({task, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    if disconnected.done():
+        task.cancel()
+        return False
+    disconnected.cancel()
+    return True
+
+
+def _environ(scope, body):
+    """PEP 3333 environ for an ASGI HTTP scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name, value = name.decode('latin1'), value.decode('latin1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(app, environ):
+    # Jalan di thread pool; body dikumpulkan penuh (stream SSE dilayani langsung oleh AsgiApp)
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+
+    result = app(environ, start_response)
+    try:
+        chunks = list(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], chunks
@@ -0,0 +1,200 @@
+"""Production mode with several worker processes.
+
+State is shared through SQLite (`use_shared_state`). Missions, the job queue
+and corridor conditions live in one process only: the worker holding the
+leader lock runs them. The other workers (followers) forward orders through
+a shared inbox document and answer fleet reads from a view that the leader
+publishes. Without `enable()` every call goes straight to the local scheduler.
+"""
+import threading
+import time
+import traceback
+
+try:
+    import fcntl
+except ImportError:  # Windows: tidak ada flock (dan tidak ada gunicorn), setiap proses jadi leader
+    fcntl = None
+
+from .database_management import use_shared_state
+from .fleet import PRIORITY_NORMAL, reset_robot, scheduler, validate_stops
+from .replanner import replanner
+from .state_store import store
+from .telemetry import telemetry
+from .traffic import check_factor, edge_conditions
+
+INBOX_KEY = 'cluster:inbox'  # perintah dari follower -> leader
+VIEW_KEY = 'cluster:view'    # salinan state armada dari leader -> follower
+PUBLISH_INTERVAL = 0.5       # detik, leader mengecek inbox / memperbarui view
+ELECTION_INTERVAL = 2.0      # detik, follower mencoba jadi leader kalau leader lama mati
+EDGE_ACTIONS = ('block', 'congest', 'clear')
+
+store.register(INBOX_KEY, None, [])
+store.register(VIEW_KEY, None, {})
+
+_enabled = False
+_leader_file = None  # file lock yang dipegang selama proses ini leader
+
+
+def enable(db_path):
+    """Share state through `db_path` and elect one worker to run missions."""
+    global _enabled
+    use_shared_state(db_path)
+    telemetry.log.shared = True
+    _enabled = True
+    lock_path = db_path + '.leader'
+    if not _try_lead(lock_path):
+        threading.Thread(target=_election_loop, args=(lock_path,), name='cluster-election', daemon=True).start()
+
+
+def is_follower():
+    return _enabled and _leader_file is None
+
+
+def _try_lead(lock_path):
+    global _leader_file
+    f = open(lock_path, 'a')
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+    # File tetap terbuka selama proses hidup; lock lepas sendiri kalau worker mati
+    _leader_file = f
+    threading.Thread(target=_leader_loop, name='cluster-leader', daemon=True).start()
+    return True
+
+
+def _election_loop(lock_path):
+    while not _try_lead(lock_path):
+        time.sleep(ELECTION_INTERVAL)
+
+
+def _leader_loop():
+    since = 0
+    published = None
+    while True:
+        since = store.wait_for_change(since, PUBLISH_INTERVAL, key=INBOX_KEY)
+        taken = []
+        if store.get(INBOX_KEY):
+            store.update(INBOX_KEY, lambda inbox: (taken.extend(inbox), inbox.clear()))
+        for command in taken:
+            try:
+                _execute(command)
+            except Exception:
+                traceback.print_exc()
+        view = _live_view()
+        if view != published:
+            store.put(VIEW_KEY, view)
+            published = view
+
+
+def _execute(command):
+    op = command.get('op')
+    if op == 'submit':
+        scheduler.submit_multi(command['stops'], command['nama'], command['priority'])
+    elif op == 'cancel':
+        scheduler.cancel(command['job_id'])
+    elif op == 'reset':
+        reset_robot(command['robot_id'])
+    elif op == 'edges' and command['action'] in EDGE_ACTIONS:
+        getattr(edge_conditions, command['action'])(*command['edge'], **command['kwargs'])
+
+
+def _forward(op, **args):
+    store.update(INBOX_KEY, lambda inbox: inbox.append(dict(args, op=op)))
+
+
+# --- Baca state armada ---
+def _live_view():
+    return {"fleet": _live_fleet(), "missions": _live_missions(), "edges": _live_edges()}
+
+
+def _live_fleet():
+    return scheduler.snapshot()
+
+
+def _live_missions():
+    return {
+        "max_workers": scheduler.executor.max_workers,
+        "missions": scheduler.executor.missions(),
+        "queue": scheduler.queued_jobs(),
+    }
+
+
+def _live_edges():
+    return {"conditions": edge_conditions.active(), "legs": replanner.legs()}
+
+
+def _read(part, live):
+    # Follower: view terakhir dari leader (sebelum ada view: state lokal yang kosong)
+    if is_follower():
+        return store.get(VIEW_KEY).get(part) or live()
+    return live()
+
+
+def fleet_snapshot():
+    """Robots, running jobs and queue, as returned by FleetScheduler.snapshot()."""
+    return _read("fleet", _live_fleet)
+
+
+def missions_snapshot():
+    """Executor missions and job queue for /api/missions."""
+    return _read("missions", _live_missions)
+
+
+def edges_snapshot():
+    """Active corridor conditions and the legs watched by the replanner."""
+    return _read("edges", _live_edges)
+
+
+# --- Perintah ---
+def submit_order(stops, nama, priority=PRIORITY_NORMAL):
+    """Like FleetScheduler.submit_multi; a follower validates and forwards the order to the leader."""
+    if not is_follower():
+        return scheduler.submit_multi(stops, nama, priority)
+    stops, error = validate_stops(stops)
+    if error:
+        return None, error
+    _forward('submit', stops=stops, nama=nama, priority=priority)
+    return {"stops": stops, "nama": nama, "priority": priority}, "DITERUSKAN"
+
+
+def cancel_job(job_id):
+    """Cancel a queued or running job. Returns False if the job is unknown."""
+    if not is_follower():
+        return scheduler.cancel(job_id)
+    fleet = fleet_snapshot()
+    known = [job["id"] for job in fleet["queue"]] + [job["id"] for job in fleet["assigned"].values()]
+    if job_id not in known:
+        return False
+    _forward('cancel', job_id=job_id)
+    return True
+
+
+def reset(robot_id):
+    """Put a robot back to standby. Returns False while it still runs a mission."""
+    if not is_follower():
+        return reset_robot(robot_id)
+    if robot_id in fleet_snapshot()["assigned"]:
+        return False
+    _forward('reset', robot_id=robot_id)
+    return True
+
+
+def change_edges(action, *edge, **kwargs):
+    """Block / congest / clear corridor `edge` = (a, b), or clear all if no edge is given.
+
+    Returns the result of the EdgeConditions method; a follower returns the
+    edges shown in the leader's view for "clear all" and None otherwise.
+    """
+    if action not in EDGE_ACTIONS:
+        raise ValueError("Aksi tidak dikenal")
+    if not is_follower():
+        return getattr(edge_conditions, action)(*edge, **kwargs)
+    if action == 'congest':
+        check_factor(kwargs['factor'])
+    _forward('edges', action=action, edge=list(edge), kwargs=kwargs)
+    if action == 'clear' and not edge:
+        return [(condition["from"], condition["to"]) for condition in edges_snapshot()["conditions"]]
+    return None
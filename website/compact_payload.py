@@ -0,0 +1,55 @@
+import struct
+
+from . import route_calculation
+
+# Format biner (little endian) untuk ESP32:
+#   uint32 version | uint16 status_robot | uint16 status_paket
+#   uint8 jumlah_kode | uint8 jumlah_node
+#   int8  kode[jumlah_kode]      (0 lurus, -1 kiri, 1 kanan, 4 stop)
+#   uint16 node_id[jumlah_node]  (id integer dari CompactGraph)
+HEADER = struct.Struct('<IHHBB')
+MAX_ITEMS = 255
+MAX_NODE_ID = 0xFFFF
+
+
+class PayloadTooLarge(ValueError):
+    """The state does not fit the binary format (too many codes/nodes or a node id above uint16)."""
+
+
+def instruction_codes(instruksi):
+    """Turn codes from `instruksi_navigasi` ([texts, codes] pair, or [] when idle)."""
+    if isinstance(instruksi, (list, tuple)) and len(instruksi) == 2 and isinstance(instruksi[1], (list, tuple)):
+        return [int(code) for code in instruksi[1]]
+    return []
+
+
+def route_node_ids(rute_text):
+    """Integer node ids for an 'A -> B -> C' route (unknown nodes are skipped)."""
+    if not rute_text or rute_text == '-':
+        return []
+    index = route_calculation.compact_graph.index
+    return [index[node] for node in (part.strip() for part in rute_text.split('->')) if node in index]
+
+
+def compact_status(version, robot_data):
+    """Minimal JSON document for the ESP32."""
+    return {
+        "v": version,
+        "s": robot_data.get('status_robot'),
+        "p": robot_data.get('status_paket'),
+        "c": instruction_codes(robot_data.get('instruksi_navigasi')),
+        "r": route_node_ids(robot_data.get('rute_terakhir')),
+    }
+
+
+def pack_status(version, robot_data):
+    """Packed bytes version of compact_status(); PayloadTooLarge if it does not fit the format."""
+    doc = compact_status(version, robot_data)
+    codes, nodes = doc["c"], doc["r"]
+    # Jangan dipotong diam-diam: ESP32 akan mengikuti rute yang tidak lengkap
+    if len(codes) > MAX_ITEMS or len(nodes) > MAX_ITEMS:
+        raise PayloadTooLarge(f"Rute terlalu panjang untuk format biner (maks {MAX_ITEMS}), pakai format JSON")
+    if nodes and max(nodes) > MAX_NODE_ID:
+        raise PayloadTooLarge(f"Id node di atas {MAX_NODE_ID} tidak muat di format biner, pakai format JSON")
+    header = HEADER.pack(version & 0xFFFFFFFF, doc["s"] or 0, doc["p"] or 0, len(codes), len(nodes))
+    return header + struct.pack(f'<{len(codes)}b{len(nodes)}H', *codes, *nodes)
@@ -1,8 +1,48 @@
 import json
 import os
 import subprocess
+import threading
+import time
 import platform  # <--- Ini tambahan penting buat deteksi OS
 
+from .metrics import WIFI_PROBE_SECONDS
+
+PROC_NET_WIRELESS = "/proc/net/wireless"
+PROBE_TIMEOUT = 5  # detik, batas waktu perintah netsh/airport/iwgetid/nmcli
+
+def get_linux_wifi(run=subprocess.check_output, proc_path=PROC_NET_WIRELESS):
+    """SSID on Linux (Raspberry Pi): iwgetid first, then nmcli.
+
+    `run` and `proc_path` can be replaced in tests.
+    """
+    # /proc/net/wireless: 2 baris header lalu 1 baris per interface wireless
+    try:
+        with open(proc_path, 'r') as f:
+            interfaces = [line.split(":", 1)[0].strip() for line in f.readlines()[2:] if ":" in line]
+    except OSError:
+        interfaces = []
+
+    for iface in interfaces or [None]:
+        cmd = ["iwgetid", "-r"] + ([iface] if iface else [])
+        try:
+            ssid = run(cmd, text=True, timeout=PROBE_TIMEOUT).strip()
+        except subprocess.CalledProcessError:
+            continue  # interface ini tidak terhubung, coba interface berikutnya
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            break     # iwgetid tidak ada / macet: langsung ke nmcli
+        if ssid:
+            return ssid
+
+    # Cadangan: NetworkManager, format "yes:NamaWifi"
+    try:
+        output = run(["nmcli", "-t", "-f", "active,ssid", "dev", "wifi"], text=True, timeout=PROBE_TIMEOUT)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    for line in output.splitlines():
+        if line.startswith("yes:"):
+            return line.split(":", 1)[1].strip() or None
+    return None
+
 def get_current_wifi():
     # Cek sistem operasi laptop yang sedang menjalankan kode ini
     system_os = platform.system()
@@ -11,7 +51,7 @@ def get_current_wifi():
         # === SKENARIO 1: WINDOWS (Punya Temanmu) ===
         if system_os == "Windows":
             # Execute the netsh command to get Wi-Fi interface information
-            output = subprocess.check_output(["netsh", "wlan", "show", "interfaces"], text=True)
+            output = subprocess.check_output(["netsh", "wlan", "show", "interfaces"], text=True, timeout=PROBE_TIMEOUT)
             # Split the output into lines
             lines = output.splitlines()
             # Look for the line containing the SSID
@@ -26,7 +66,7 @@ def get_current_wifi():
             # Perintah khusus Mac untuk ambil info Wifi
             # Menggunakan tool bawaan Mac bernama 'airport'
             cmd = "/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport -I"
-            output = subprocess.check_output(cmd, shell=True, text=True)
+            output = subprocess.check_output(cmd, shell=True, text=True, timeout=PROBE_TIMEOUT)
             
             lines = output.splitlines()
             for line in lines:
@@ -37,8 +77,73 @@ def get_current_wifi():
             
             return "Mac Wi-Fi Connected" # Pesan cadangan kalau nama wifi gak terdeteksi
 
+        # === SKENARIO 3: LINUX (Raspberry Pi) ===
+        elif system_os == "Linux":
+            return get_linux_wifi()
+
     except (subprocess.CalledProcessError, IndexError, FileNotFoundError, Exception):
         # Kalau ada error apapun, return None biar website gak crash
         return None
 
-    return None
\ No newline at end of file
+    return None
+
+
+class NetworkInfoProvider:
+    """Caches the Wi-Fi SSID and refreshes it in a background thread.
+
+    `get()` never blocks on a subprocess: it returns the last known value and
+    wakes the refresher when the value is older than `ttl` seconds.
+    """
+
+    def __init__(self, probe=get_current_wifi, ttl=30):
+        self._probe = probe
+        self._ttl = ttl
+        self._value = None
+        self._updated = None  # time.monotonic() of last probe, None = belum pernah
+        self.version = 0      # naik setiap SSID berubah (dipakai untuk ETag dashboard)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.enabled = True   # False (WIFI_PROBE=0): tidak pernah menjalankan probe, SSID tetap None
+
+    def start(self):
+        """Start the refresher thread (idempotent)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="wifi-probe", daemon=True)
+                self._thread.start()
+
+    def get(self):
+        """Return the cached SSID (None if unknown) without blocking."""
+        self.start()
+        updated = self._updated
+        if updated is None or time.monotonic() - updated > self._ttl:
+            self._wake.set()
+        return self._value
+
+    def refresh(self):
+        """Probe now (blocking) and update the cache."""
+        with WIFI_PROBE_SECONDS.time():
+            value = self._probe()
+        if value != self._value:
+            self._value = value
+            self.version += 1
+        self._updated = time.monotonic()
+        return self._value
+
+    def _run(self):
+        while True:
+            self.refresh()
+            # Permintaan selama probe berjalan sudah terlayani oleh hasil probe ini
+            self._wake.clear()
+            # Tidur sampai TTL habis atau ada yang minta data baru
+            self._wake.wait(self._ttl)
+
+
+wifi_provider = NetworkInfoProvider()
+
+def get_cached_wifi():
+    """Non-blocking SSID lookup used by the dashboard."""
+    return wifi_provider.get()
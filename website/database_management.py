@@ -1,12 +1,16 @@
 import json
 import os
-from .dashboard_home import get_current_wifi
-from .status_book_callingcard import StatusRobot, StatusElektronika, StatusPaket, get_status_robot, get_status_elektronika, get_status_paket
+from .dashboard_home import get_cached_wifi, wifi_provider
+from .status_book_callingcard import StatusRobot, StatusElektronika, StatusPaket, describe
+from .state_store import SqliteBackend, store
+from .history_store import HistoryStore
+from .metrics import DB_SECONDS, timed
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ELECTRONICDB_FILE = os.path.join(BASE_DIR, '..', 'electronicsystem_database.json')
 ROBOT_STATUS_FILE = os.path.join(BASE_DIR, '..', 'robot_status.json')
-DELIVERY_HISTORY_FILE = os.path.join(BASE_DIR, '..', 'trekkinghistory_database.json')
+DELIVERY_HISTORY_FILE = os.path.join(BASE_DIR, '..', 'trekkinghistory_database.json')  # format lama (JSON array)
+DELIVERY_HISTORY_LOG = os.path.join(BASE_DIR, '..', 'trekkinghistory_database.jsonl')
 
 # Default states
 DEFAULT_ELECTRONICS = {
@@ -24,73 +28,141 @@ DEFAULT_ROBOT_STATUS = {
     "tujuan_sekarang": "STANDBY",
     "pengirim_terakhir": "-",
     "rute_terakhir": "-",
-    "instruksi_navigasi": []
+    "instruksi_navigasi": [],
+    "posisi": "START"
 }
 
+# Robot pertama memakai robot_status.json seperti sebelumnya,
+# robot lain (armada) memakai robot_status_<ID>.json
+DEFAULT_ROBOT_ID = 'ROBOT_1'
+
+# State disimpan di memori (state_store), file JSON hanya sebagai persistensi
+ELECTRONICS_KEY = 'electronics'
+ROBOT_KEY = 'robot'
+store.register(ELECTRONICS_KEY, ELECTRONICDB_FILE, DEFAULT_ELECTRONICS)
+store.register(ROBOT_KEY, ROBOT_STATUS_FILE, DEFAULT_ROBOT_STATUS)
+
+def robot_key(robot_id=DEFAULT_ROBOT_ID):
+    """State store key for a robot's status document."""
+    return ROBOT_KEY if robot_id == DEFAULT_ROBOT_ID else f'{ROBOT_KEY}:{robot_id}'
+
+def register_robot(robot_id, persist=True):
+    """Register the status document of an extra robot (memory only if persist=False)."""
+    key = robot_key(robot_id)
+    if robot_id == DEFAULT_ROBOT_ID:
+        return key
+    path = os.path.join(BASE_DIR, '..', f'robot_status_{robot_id}.json') if persist else None
+    store.register(key, path, DEFAULT_ROBOT_STATUS)
+    return key
+
+# History: JSON Lines append-only, dimigrasi sekali dari file JSON array lama
+history_store = HistoryStore(DELIVERY_HISTORY_LOG, legacy_path=DELIVERY_HISTORY_FILE)
+
+def use_shared_state(db_path):
+    """Multi-process mode (several server workers): state in one SQLite database, history appends under flock."""
+    store.use_backend(SqliteBackend(db_path))
+    history_store.shared = True
+
 def read_electronics_status():
-    """Read hardware/electronics status from dedicated file."""
-    try:
-        with open(ELECTRONICDB_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return DEFAULT_ELECTRONICS
-
-def read_robot_status():
-    """Read current robot delivery status from dedicated file."""
-    try:
-        with open(ROBOT_STATUS_FILE, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return DEFAULT_ROBOT_STATUS
+    """Read hardware/electronics status from the in-memory state store."""
+    return store.get(ELECTRONICS_KEY)
 
+def read_robot_status(robot_id=DEFAULT_ROBOT_ID):
+    """Read current robot delivery status from the in-memory state store."""
+    return store.get(robot_key(robot_id))
+
+def read_robot_snapshot(robot_id=DEFAULT_ROBOT_ID):
+    """Return (state version, robot status) read atomically."""
+    return store.snapshot(robot_key(robot_id))
+
+def read_state_modified(*keys):
+    """Return (latest version, latest change time) of the given state keys, for HTTP caching."""
+    versions = [store.version(key) for key in keys]
+    times = [t for t in (store.modified(key) for key in keys) if t is not None]
+    return max(versions), (max(times) if times else None)
+
+def read_dashboard_version():
+    """Return ((state version, SSID version), last modified) of everything shown by read_statuses()."""
+    version, modified = read_state_modified(ELECTRONICS_KEY, ROBOT_KEY)
+    return (version, wifi_provider.version), modified
+
+def wait_robot_status_change(since, timeout, robot_id=DEFAULT_ROBOT_ID):
+    """Block until the robot status version passes `since` (or timeout). Returns the current version."""
+    return store.wait_for_change(since, timeout, key=robot_key(robot_id))
+
+@timed(DB_SECONDS, op='read_statuses')
 def read_statuses():
     """Combine electronics and robot status for dashboard display."""
     electronics = read_electronics_status()
     robot = read_robot_status()
     
-    context = {
-        "status_robot": get_status_robot(robot.get('status_robot')),
-        "status_pengiriman": get_status_paket(robot.get('status_paket')),
-        "WiFi_Name": get_current_wifi(),
-        "tujuan_display": robot.get('tujuan_sekarang') if robot.get('status_robot') == int(StatusRobot.ROBOT_MENGANTAR_PAKET) else "",
-        "status_wifi": get_status_elektronika(electronics.get('wifi')),
-        "hw_pi": get_status_elektronika(electronics.get('raspberry')),
-        "hw_esp": get_status_elektronika(electronics.get('esp32')),
-        "hw_cam": get_status_elektronika(electronics.get('camera')),
-        "total_angka": electronics.get('total_pengiriman')
-    }
+    context = describe({
+        "status_robot": (StatusRobot, robot.get('status_robot')),
+        "status_pengiriman": (StatusPaket, robot.get('status_paket')),
+        "status_wifi": (StatusElektronika, electronics.get('wifi')),
+        "hw_pi": (StatusElektronika, electronics.get('raspberry')),
+        "hw_esp": (StatusElektronika, electronics.get('esp32')),
+        "hw_cam": (StatusElektronika, electronics.get('camera')),
+    })
+    context["WiFi_Name"] = get_cached_wifi()
+    context["tujuan_display"] = robot.get('tujuan_sekarang') if robot.get('status_robot') == int(StatusRobot.ROBOT_MENGANTAR_PAKET) else ""
+    context["total_angka"] = electronics.get('total_pengiriman')
+    context["baterai"] = electronics.get('baterai')  # dari telemetry robot, None kalau belum ada
     return context
 
-def update_tujuan_db(tujuan_baru, nama_pengirim, rute_text, instructions_list, status_code, status_paket=None):
+@timed(DB_SECONDS, op='update_tujuan_db')
+def update_tujuan_db(tujuan_baru, nama_pengirim, rute_text, instructions_list, status_code, status_paket=None,
+                     robot_id=DEFAULT_ROBOT_ID, posisi=None):
     """Update robot status and delivery information."""
-    robot_data = read_robot_status()
-    
-    robot_data['tujuan_sekarang'] = tujuan_baru
-    robot_data['pengirim_terakhir'] = nama_pengirim
-    robot_data['rute_terakhir'] = rute_text
-    robot_data['status_robot'] = int(status_code)
-    if status_paket is not None:
-        robot_data['status_paket'] = int(status_paket)
-    robot_data['instruksi_navigasi'] = instructions_list
-    
-    write_robot_status(robot_data)
+    def apply(robot_data):
+        robot_data['tujuan_sekarang'] = tujuan_baru
+        robot_data['pengirim_terakhir'] = nama_pengirim
+        robot_data['rute_terakhir'] = rute_text
+        robot_data['status_robot'] = int(status_code)
+        if status_paket is not None:
+            robot_data['status_paket'] = int(status_paket)
+        robot_data['instruksi_navigasi'] = instructions_list
+        if posisi is not None:
+            robot_data['posisi'] = posisi
+
+    # Read-modify-write dalam satu lock, file ditulis belakangan oleh writer thread
+    store.update(robot_key(robot_id), apply)
+
+def update_route_db(robot_id, rute_text=None, instructions_list=None, status_code=None, posisi=None):
+    """Update only the given route/instruction/status/position fields of a robot (e.g. after re-routing)."""
+    def apply(robot_data):
+        if rute_text is not None:
+            robot_data['rute_terakhir'] = rute_text
+        if instructions_list is not None:
+            robot_data['instruksi_navigasi'] = instructions_list
+        if status_code is not None:
+            robot_data['status_robot'] = int(status_code)
+        if posisi is not None:
+            robot_data['posisi'] = posisi
+
+    store.update(robot_key(robot_id), apply)
+
+def write_robot_status(data, robot_id=DEFAULT_ROBOT_ID):
+    """Write robot status to the state store (persisted asynchronously)."""
+    store.put(robot_key(robot_id), data)
 
-def write_robot_status(data):
-    """Write robot status to dedicated file."""
-    os.makedirs(os.path.dirname(ROBOT_STATUS_FILE), exist_ok=True)
-    with open(ROBOT_STATUS_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+def update_electronics_status(**fields):
+    """Set hardware codes / battery of the main robot. Nothing is written (no version bump) if unchanged."""
+    current = read_electronics_status()
+    if all(current.get(name) == value for name, value in fields.items()):
+        return False
+    store.update(ELECTRONICS_KEY, lambda electronics: electronics.update(fields))
+    return True
 
+def increment_total_pengiriman():
+    """Count one more completed delivery on the dashboard counter."""
+    def apply(electronics):
+        electronics['total_pengiriman'] = electronics.get('total_pengiriman', 0) + 1
+    store.update(ELECTRONICS_KEY, apply)
+
+@timed(DB_SECONDS, op='add_to_delivery_history')
 def add_to_delivery_history(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, rute_pulang_text, instruksi_pulang, status_paket_text):
     """Append completed delivery to history log."""
-    try:
-        with open(DELIVERY_HISTORY_FILE, 'r') as f:
-            history = json.load(f)
-            if not isinstance(history, list):
-                history = []
-    except (FileNotFoundError, json.JSONDecodeError):
-        history = []
-    
     delivery_record = {
         "tujuan_sekarang": tujuan_awal,
         "pengirim_terakhir": nama_pengirim,
@@ -100,9 +172,13 @@ def add_to_delivery_history(tujuan_awal, nama_pengirim, rute_pergi_text, instruk
         "instruksi_pulang": instruksi_pulang,
         "status_paket": status_paket_text
     }
-    
-    history.append(delivery_record)
-    
-    os.makedirs(os.path.dirname(DELIVERY_HISTORY_FILE), exist_ok=True)
-    with open(DELIVERY_HISTORY_FILE, 'w') as f:
-        json.dump(history, f, indent=4)
\ No newline at end of file
+    history_store.append(delivery_record)
+
+def count_delivery_history():
+    """Number of records in the delivery history (grows by one per append)."""
+    return history_store.count()
+
+@timed(DB_SECONDS, op='read_delivery_history')
+def read_delivery_history(offset=0, limit=50):
+    """Return (total, records) for one page of the delivery history."""
+    return history_store.count(), history_store.page(offset, limit)
@@ -0,0 +1,303 @@
+import heapq
+import itertools
+import threading
+import time
+
+from .database_management import DEFAULT_ROBOT_ID, read_robot_status, register_robot, update_tujuan_db
+from .mission_executor import executor as mission_executor
+from .multi_stop import plan_tour, tour_plan
+from .route_index import find_route, get_route_index, route_cost, route_instructions
+from .status_book_callingcard import StatusRobot, StatusPaket
+from .traffic import edge_conditions
+from . import metrics
+
+# Robot dengan status ini sedang menjalankan misi / bermasalah, jadi tidak bisa diberi job
+BUSY_STATUSES = {
+    int(StatusRobot.ROBOT_MENGANTAR_PAKET),
+    int(StatusRobot.ROBOT_TELAH_MENGANTAR_PAKET),
+    int(StatusRobot.ROBOT_MENUJU_STATION),
+    int(StatusRobot.ROBOT_MENGALAMI_KENDALA),
+}
+
+PRIORITY_NORMAL = 0
+PRIORITY_URGENT = 10
+
+
+def validate_stops(stops):
+    """Normalise and check the rooms of an order. Returns (stops, None) or (None, error message)."""
+    stops = list(dict.fromkeys(stop.strip().upper() for stop in stops if stop.strip()))
+    if not stops:
+        return None, "Lokasi tidak ada"
+    # Validasi pada map statis: koridor yang sedang tertutup tidak menolak pesanan,
+    # job menunggu di antrian sampai ada jalur
+    index = get_route_index()
+    for tujuan in stops:
+        if tujuan not in index:
+            return None, "Lokasi tidak ada"
+        if index.cost('START', tujuan) is None:
+            return None, "Jalur Tidak Ditemukan"
+    return stops, None
+
+
+class Job:
+    """One delivery order waiting for (or assigned to) a robot."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, tujuan, nama, priority=PRIORITY_NORMAL, stops=None):
+        self.id = next(Job._ids)
+        self.stops = list(stops) if stops else [tujuan]  # titik antar (multi-drop), urut setelah dispatch
+        self.tujuan = tujuan
+        self.nama = nama
+        self.priority = priority
+        self.created = time.time()
+        self.robot_id = None
+
+    @property
+    def key(self):
+        """Dedupe key: the same sender sending to the same room(s) twice is one job."""
+        return f"{'+'.join(sorted(self.stops))}|{(self.nama or '').strip().lower()}"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "tujuan": self.tujuan,
+            "stops": self.stops,
+            "nama": self.nama,
+            "priority": self.priority,
+            "created": self.created,
+            "robot_id": self.robot_id,
+            "key": self.key,
+        }
+
+
+class JobQueue:
+    """Priority queue of jobs; FIFO among jobs with the same priority."""
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+
+    def push(self, job):
+        heapq.heappush(self._heap, (-job.priority, next(self._seq), job))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def remove(self, job_id):
+        """Remove a queued job by id. Returns the job or None."""
+        for i, entry in enumerate(self._heap):
+            if entry[2].id == job_id:
+                self._heap.pop(i)
+                heapq.heapify(self._heap)
+                return entry[2]
+        return None
+
+    def jobs(self):
+        return [entry[2] for entry in sorted(self._heap)]
+
+
+class FleetScheduler:
+    """Assigns queued jobs to the nearest idle robot.
+
+    `runner(job, robot_id, rute_text, instruksi)` starts the mission and must
+    call `mission_finished(robot_id)` when the robot is back at the station.
+    By default missions run on the bounded mission executor.
+    """
+
+    def __init__(self, robot_ids=(DEFAULT_ROBOT_ID,), runner=None, executor=mission_executor):
+        self._lock = threading.RLock()
+        self._queue = JobQueue()
+        self._assigned = {}  # robot_id -> Job yang sedang dijalankan
+        self.executor = executor
+        self.runner = runner or self._start_on_executor
+        self.robot_ids = []
+        self.set_robots(robot_ids)
+
+    def set_robots(self, robot_ids, persist=True):
+        with self._lock:
+            self.robot_ids = list(robot_ids)
+            for robot_id in self.robot_ids:
+                register_robot(robot_id, persist=persist)
+
+    # --- Order ---
+    def submit(self, tujuan, nama, priority=PRIORITY_NORMAL):
+        """Queue a delivery. Returns (job, message); job is None if the destination is invalid.
+
+        Submitting a job whose key matches a queued or running job returns
+        that job with message "DUPLIKAT" instead of adding a new one.
+        """
+        return self.submit_multi([tujuan], nama, priority)
+
+    def submit_multi(self, stops, nama, priority=PRIORITY_NORMAL):
+        """Queue one mission delivering to several rooms; the visiting order is planned at dispatch."""
+        stops, error = validate_stops(stops)
+        if error:
+            return None, error
+        if len(stops) == 1:
+            job = Job(stops[0], nama, priority)
+        else:
+            job = Job(" + ".join(stops), nama, priority, stops=stops)
+        with self._lock:
+            for other in list(self._queue.jobs()) + list(self._assigned.values()):
+                if other.key == job.key:
+                    return other, "DUPLIKAT"
+            self._queue.push(job)
+        self.dispatch()
+        return job, "OK"
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or abort a running mission (robot goes to KENDALA)."""
+        with self._lock:
+            if self._queue.remove(job_id) is not None:
+                return True
+            running = any(job.id == job_id for job in self._assigned.values())
+        return running and self.executor.cancel(job_id)
+
+    def mission_finished(self, robot_id):
+        with self._lock:
+            self._assigned.pop(robot_id, None)
+        self.dispatch()
+
+    # --- Scheduling ---
+    def idle_robots(self):
+        with self._lock:
+            return [robot_id for robot_id in self.robot_ids
+                    if robot_id not in self._assigned
+                    and read_robot_status(robot_id).get('status_robot') not in BUSY_STATUSES]
+
+    def dispatch(self):
+        """Assign as many queued jobs as there are idle robots."""
+        started = []
+        with self._lock:
+            while len(self._queue):
+                idle = self.idle_robots()
+                if not idle:
+                    break
+                job = self._queue.pop()
+                robot_id = self._nearest(idle, job)
+                if robot_id is None:
+                    # Tidak ada robot idle yang punya rute ke tujuan ini
+                    self._queue.push(job)
+                    break
+                job.robot_id = robot_id
+                self._assigned[robot_id] = job
+                started.append(job)
+
+        for job in started:
+            posisi = read_robot_status(job.robot_id).get('posisi', 'START')
+            if len(job.stops) > 1:
+                # Urutan kunjungan termurah dari posisi robot, instruksi semua leg digabung
+                order, _ = plan_tour(job.stops, start=posisi)
+                if order is not None:
+                    job.stops = order
+                job.tujuan = " + ".join(job.stops)
+                path, instruksi = tour_plan(posisi, job.stops)
+            else:
+                path, _ = find_route(posisi, job.tujuan)
+                instruksi = route_instructions(posisi, job.tujuan)
+            # Koridor bisa tertutup sejak _nearest; robot lalu menunggu (KENDALA) sampai replanner menemukan jalur
+            self.runner(job, job.robot_id, " -> ".join(path) if path else "-", instruksi or [])
+        return started
+
+    def _nearest(self, robot_ids, job):
+        best, best_cost = None, None
+        for robot_id in robot_ids:
+            posisi = read_robot_status(robot_id).get('posisi', 'START')
+            # Jarak memperhitungkan koridor yang tertutup / macet
+            if len(job.stops) > 1:
+                order, cost = plan_tour(job.stops, start=posisi)
+                cost = cost if order is not None else None
+            else:
+                cost = route_cost(posisi, job.tujuan)
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best, best_cost = robot_id, cost
+        return best
+
+    def _start_on_executor(self, job, robot_id, rute_text, instruksi):
+        """Default runner: run the mockup simulation on the mission executor."""
+        from .mockup_robot import run_multi_stop_simulation, run_robot_simulation
+
+        if len(job.stops) > 1:
+            func, tujuan = run_multi_stop_simulation, list(job.stops)
+        else:
+            func, tujuan = run_robot_simulation, job.tujuan
+        mission, _ = self.executor.submit(
+            job.id, job.key, func,
+            args=(tujuan, job.nama, rute_text, instruksi),
+            kwargs={"robot_id": robot_id},
+            label=f"{job.tujuan} ({job.nama})", robot_id=robot_id,
+            on_done=lambda mission: self.mission_finished(robot_id))
+        return mission
+
+    def _hand_off(self, job, robot_id, rute_text, instruksi):
+        """Runner without the simulator (SIMULATOR=0): the real robot drives the mission.
+
+        The route and instructions go to the robot status (read by the robot
+        from /api/robot-data) and the assignment is released at once; the robot
+        stays busy (MENGANTAR) until it is reset to standby.
+        """
+        update_tujuan_db(job.tujuan, job.nama, rute_text, instruksi,
+                         status_code=int(StatusRobot.ROBOT_MENGANTAR_PAKET),
+                         status_paket=int(StatusPaket.PAKET_DIANTAR),
+                         robot_id=robot_id)
+        self.mission_finished(robot_id)
+
+    # --- Introspeksi ---
+    def queued_jobs(self):
+        with self._lock:
+            return [job.to_dict() for job in self._queue.jobs()]
+
+    def assigned_jobs(self):
+        with self._lock:
+            return {robot_id: job.to_dict() for robot_id, job in self._assigned.items()}
+
+    def snapshot(self):
+        """Robots with their state plus the job queue, for /api/fleet."""
+        with self._lock:
+            robots = {robot_id: read_robot_status(robot_id) for robot_id in self.robot_ids}
+            return {
+                "robots": robots,
+                "assigned": self.assigned_jobs(),
+                "queue": self.queued_jobs(),
+            }
+
+
+scheduler = FleetScheduler()
+# Koridor dibuka lagi -> job yang tertahan bisa langsung dikirim
+edge_conditions.add_listener(lambda changed: scheduler.dispatch())
+
+@metrics.register_collector
+def _fleet_metrics():
+    states = {}
+    for mission in scheduler.executor.missions():
+        states[mission["state"]] = states.get(mission["state"], 0) + 1
+    return [("fleet_queued_jobs", "gauge", "Jobs waiting for a robot.", [({}, len(scheduler.queued_jobs()))]),
+            ("fleet_assigned_jobs", "gauge", "Jobs running on a robot.", [({}, len(scheduler.assigned_jobs()))]),
+            ("mission_executor_missions", "gauge", "Missions known to the executor per state.",
+             [({"state": state}, count) for state, count in sorted(states.items())])]
+
+def configure_fleet(robot_ids, max_workers=None, simulator=True):
+    """Set the robots managed by the scheduler (e.g. from app.config['ROBOT_IDS']).
+
+    With `simulator=False` missions are handed to the real robots instead of
+    the mockup simulation (which is then never imported).
+    """
+    scheduler.set_robots(robot_ids)
+    scheduler.runner = scheduler._start_on_executor if simulator else scheduler._hand_off
+    if max_workers:
+        scheduler.executor.resize(max_workers)
+
+def reset_robot(robot_id):
+    """Put a robot stuck in KENDALA back to standby. Returns False while it still runs a mission."""
+    if robot_id in scheduler.assigned_jobs():
+        return False
+    update_tujuan_db("STANDBY", "-", "-", [],
+                     status_code=int(StatusRobot.ROBOT_STANDBY_DISTATION),
+                     status_paket=int(StatusPaket.MENUNGGU_PAKET),
+                     robot_id=robot_id, posisi='START')
+    scheduler.dispatch()
+    return True
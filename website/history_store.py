@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from array import array
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows: tidak ada flock, mode multi-proses tidak didukung
+    fcntl = None
+
+
+class HistoryStore:
+    """Append-only delivery history in JSON Lines format (one record per line).
+
+    Appending is O(1) regardless of history size. A byte-offset index of the
+    lines is built once on first read and then kept up to date by `append`,
+    so `page(offset, limit)` seeks straight to the requested records.
+
+    With `shared=True` several processes may append to the same file:
+    appends hold an exclusive flock, and the index picks up records written
+    by other processes before every read.
+    """
+
+    def __init__(self, path, legacy_path=None, fsync=True, shared=False):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fsync = fsync
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._offsets = None  # array('q') posisi byte awal tiap baris valid
+        self._end = 0         # byte pertama yang belum masuk index
+        self._migrated = False
+
+    # --- Tulis ---
+    def append(self, record):
+        """Append one record and return its position in the history."""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self._ensure_ready()
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'ab') as f:
+                if self.shared:
+                    _lock_file(f)  # dilepas saat file ditutup
+                    self._catch_up()
+                position = f.seek(0, os.SEEK_END)
+                f.write(line)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._offsets.append(position)
+            self._end = position + len(line)
+            return len(self._offsets) - 1
+
+    # --- Baca ---
+    def count(self):
+        with self._lock:
+            self._ensure_ready()
+            return len(self._offsets)
+
+    def iter_records(self, start=0):
+        """Yield records lazily from position `start` without loading the whole file."""
+        with self._lock:
+            self._ensure_ready()
+            if start >= len(self._offsets):
+                return
+            position = self._offsets[start]
+        with open(self.path, 'rb') as f:
+            f.seek(position)
+            for raw in f:
+                record = _parse_line(raw)
+                if record is not None:
+                    yield record
+
+    def page(self, offset=0, limit=50):
+        """Return up to `limit` records starting at `offset` (oldest first)."""
+        return list(islice(self.iter_records(max(offset, 0)), max(limit, 0)))
+
+    # --- Internal ---
+    def _ensure_ready(self):
+        # Caller must hold self._lock
+        if not self._migrated:
+            self._migrate_legacy()
+            self._migrated = True
+        if self._offsets is None:
+            self._offsets = self._build_index()
+        elif self.shared:
+            self._catch_up()
+
+    def _catch_up(self):
+        # Caller must hold self._lock. Index record yang ditambahkan proses lain
+        try:
+            if os.path.getsize(self.path) <= self._end:
+                return
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(self._end)
+            position = self._end
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # baris yang sedang ditulis proses lain
+                if _parse_line(raw) is not None:
+                    self._offsets.append(position)
+                position += len(raw)
+        self._end = position
+
+    def _build_index(self):
+        offsets = array('q')
+        try:
+            f = open(self.path, 'rb+')
+        except FileNotFoundError:
+            return offsets
+        with f:
+            if self.shared:
+                _lock_file(f)  # jangan "perbaiki" baris yang sedang ditulis proses lain
+            position = 0
+            last = b'\n'
+            for raw in f:
+                if _parse_line(raw) is not None:
+                    offsets.append(position)
+                position += len(raw)
+                last = raw[-1:]
+            if last != b'\n':
+                # Baris terakhir terpotong (crash saat menulis): tutup dengan newline
+                f.write(b'\n')
+                position += 1
+        self._end = position
+        return offsets
+
+    def _migrate_legacy(self):
+        """One-shot import of the old JSON array file into the JSON Lines log.
+
+        Runs only while the .jsonl file does not exist yet; the old file is
+        left untouched.
+        """
+        if not self.legacy_path or os.path.exists(self.path):
+            return
+        try:
+            f = open(self.legacy_path, 'r')
+        except FileNotFoundError:
+            return
+        with f:
+            if self.shared:
+                # Worker lain bisa sedang migrasi juga: tunggu, lalu cukup pakai hasilnya
+                _lock_file(f)
+                if os.path.exists(self.path):
+                    return
+            try:
+                history = json.load(f)
+            except json.JSONDecodeError:
+                return
+            if not isinstance(history, list):
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as out:
+                for record in history:
+                    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.path)
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _parse_line(raw):
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
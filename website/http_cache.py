@@ -0,0 +1,140 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Response, current_app, request
+
+from . import metrics
+from .state_store import store
+
+GZIP_MIN_SIZE = 1024   # byte, payload lebih kecil tidak dikompres
+GZIP_LEVEL = 6
+CACHE_ENTRIES = 128
+PROCESS_EPOCH = format(time.time_ns() // 1000, 'x')  # untuk ETag yang memuat counter milik proses ini
+
+
+class VersionedCache:
+    """Small LRU cache of rendered bodies.
+
+    Keys include the state version(s) the body was built from, so a new
+    version simply misses and old entries age out of the LRU.
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        # Build di luar lock; dua request bersamaan paling buruk build dua kali
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = VersionedCache()
+
+@metrics.register_collector
+def _cache_metrics():
+    return [("response_cache_hits_total", "counter", "Rendered bodies served from the version cache.",
+             [({}, response_cache.hits)]),
+            ("response_cache_misses_total", "counter", "Rendered bodies built because the version changed.",
+             [({}, response_cache.misses)])]
+
+
+def make_etag(*parts, per_process=False):
+    """Strong ETag built from state version parts, e.g. make_etag('robot', 12).
+
+    Prefixed with the state store epoch, so an ETag from before a restart
+    never matches the restarted versions. `per_process=True` also adds this
+    process's epoch, for parts that are counters of one worker (e.g. the
+    SSID or telemetry version) rather than shared state versions.
+    """
+    prefix = (store.epoch, PROCESS_EPOCH) if per_process else (store.epoch,)
+    return '"' + '-'.join(str(part) for part in prefix + parts) + '"'
+
+
+def etag_matches(etag):
+    """True if the request's If-None-Match already names `etag` (weak comparison)."""
+    return request.if_none_match.contains_weak(etag.strip('"'))
+
+
+def not_modified_since(last_modified):
+    """True if If-Modified-Since is not older than `last_modified` (a timestamp)."""
+    since = request.if_modified_since
+    return since is not None and last_modified is not None and int(last_modified) <= since.timestamp()
+
+
+def conditional_response(etag, build, last_modified=None, max_age=0):
+    """Return 304 (no body) if the client is up to date, else `build()`.
+
+    If-None-Match wins over If-Modified-Since, as in RFC 9110. ETag,
+    Last-Modified and Cache-Control are set on both answers.
+    """
+    if request.if_none_match:
+        fresh = etag_matches(etag)
+    else:
+        fresh = not_modified_since(last_modified)
+    response = Response(status=304) if fresh else build()
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    # no-cache = boleh disimpan tapi harus revalidasi (murah, karena 304)
+    response.headers['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'no-cache'
+    return response
+
+
+def json_body(data):
+    """Serialize `data` the same way jsonify() does, as bytes."""
+    return (current_app.json.dumps(data) + '\n').encode('utf-8')
+
+
+def cached_json(key, build_data):
+    """JSON response whose body is cached under `key` (key must include the state version)."""
+    body = response_cache.get_or_build(('json',) + tuple(key), lambda: json_body(build_data()))
+    return Response(body, mimetype='application/json')
+
+
+def gzip_response(response, cache_key=None, min_size=GZIP_MIN_SIZE):
+    """Gzip `response` in place if the client accepts it and the body is large enough.
+
+    With `cache_key` the compressed body is cached too. The ETag becomes weak
+    because the bytes differ from the uncompressed variant.
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.accept_encodings):
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+    if cache_key is None:
+        compressed = gzip.compress(body, GZIP_LEVEL)
+    else:
+        compressed = response_cache.get_or_build(('gzip',) + tuple(cache_key),
+                                                 lambda: gzip.compress(body, GZIP_LEVEL))
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = 'gzip'
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response.headers['ETag'] = 'W/' + etag
+    return response
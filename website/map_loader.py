@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+from array import array
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MAP_FILE = os.path.join(BASE_DIR, 'maps', 'denah_baru.json')
+
+
+class CompactGraph:
+    """Array-backed (CSR) graph with integer node ids.
+
+    Neighbors of node `i` are `targets[offsets[i]:offsets[i + 1]]` with the
+    matching `weights`. Coordinates live in `xs`/`ys`; `names[i]` and
+    `index[name]` translate between ids and node names.
+    """
+
+    def __init__(self, names, xs, ys, edges):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.xs = array('d', xs)
+        self.ys = array('d', ys)
+
+        # Hitung derajat tiap node lalu isi array CSR
+        n = len(self.names)
+        degree = [0] * n
+        for source, _, _ in edges:
+            degree[source] += 1
+        offsets = array('l', [0]) * (n + 1)
+        for i in range(n):
+            offsets[i + 1] = offsets[i] + degree[i]
+        targets = array('l', [0]) * len(edges)
+        weights = array('d', [0.0]) * len(edges)
+        fill = list(offsets[:n])
+        for source, target, weight in edges:
+            pos = fill[source]
+            targets[pos] = target
+            weights[pos] = weight
+            fill[source] += 1
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.names)
+
+    def neighbors(self, node_id):
+        """Iterate (neighbor_id, weight) pairs of `node_id`."""
+        targets, weights = self.targets, self.weights
+        for pos in range(self.offsets[node_id], self.offsets[node_id + 1]):
+            yield targets[pos], weights[pos]
+
+    def ids(self, path):
+        """Node names -> integer ids."""
+        return [self.index[name] for name in path]
+
+    def path_names(self, path_ids):
+        """Integer ids -> node names."""
+        names = self.names
+        return [names[i] for i in path_ids]
+
+    def point(self, node_id):
+        return self.xs[node_id], self.ys[node_id]
+
+    def to_dicts(self):
+        """(graph, coords) in the nested-dict format used by the rest of the app."""
+        graph = {}
+        for i, name in enumerate(self.names):
+            graph[name] = {self.names[j]: _as_number(w) for j, w in self.neighbors(i)}
+        coords = {name: (_as_number(self.xs[i]), _as_number(self.ys[i])) for i, name in enumerate(self.names)}
+        return graph, coords
+
+    @classmethod
+    def from_dicts(cls, graph, coords):
+        names = list(graph)
+        for name in coords:
+            if name not in graph:
+                names.append(name)
+        index = {name: i for i, name in enumerate(names)}
+        xs = [coords.get(name, (0, 0))[0] for name in names]
+        ys = [coords.get(name, (0, 0))[1] for name in names]
+        edges = [(index[a], index[b], w) for a, neighbors in graph.items() for b, w in neighbors.items()]
+        return cls(names, xs, ys, edges)
+
+
+def _as_number(value):
+    # Bobot/koordinat bulat ditampilkan sebagai int seperti di definisi lama
+    return int(value) if float(value).is_integer() else value
+
+
+def _build(nodes, edge_rows, bidirectional):
+    names = [node_id for node_id, _, _ in nodes]
+    index = {name: i for i, name in enumerate(names)}
+    if len(index) != len(names):
+        raise ValueError("Node id duplikat di file map")
+    edges = []
+    for source, target, weight, directed in edge_rows:
+        if source not in index or target not in index:
+            raise ValueError(f"Edge {source} -> {target} memakai node yang tidak ada")
+        edges.append((index[source], index[target], float(weight)))
+        if bidirectional and not directed:
+            edges.append((index[target], index[source], float(weight)))
+    return CompactGraph(names, [x for _, x, _ in nodes], [y for _, _, y in nodes], edges)
+
+
+def load_map_json(path):
+    """Load a map from JSON: {"nodes": [{"id", "x", "y"}], "edges": [{"from", "to", "weight"}]}."""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    nodes = [(str(node['id']).upper(), float(node['x']), float(node['y'])) for node in data['nodes']]
+    edge_rows = [(str(edge['from']).upper(), str(edge['to']).upper(), edge['weight'], edge.get('directed', False))
+                 for edge in data['edges']]
+    return _build(nodes, edge_rows, data.get('bidirectional', True))
+
+
+def load_map_csv(path):
+    """Load a map from CSV rows `node,<id>,<x>,<y>` and `edge,<from>,<to>,<weight>[,directed]`."""
+    nodes, edge_rows = [], []
+    with open(path, 'r', newline='') as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#'):
+                continue
+            kind = row[0].strip().lower()
+            if kind == 'node':
+                nodes.append((row[1].strip().upper(), float(row[2]), float(row[3])))
+            elif kind == 'edge':
+                directed = len(row) > 4 and row[4].strip().lower() in ('1', 'true', 'directed')
+                edge_rows.append((row[1].strip().upper(), row[2].strip().upper(), float(row[3]), directed))
+    return _build(nodes, edge_rows, True)
+
+
+def load_map_image(path=DEFAULT_MAP_FILE):
+    """Floor plan picture of a JSON map: {"file", "width", "height", "points": {node: (px, py)}}, or None.
+
+    `points` are pixel positions of nodes on the picture; the map's own x/y
+    are route units and need not be to scale with the drawing.
+    """
+    if path.lower().endswith('.csv'):
+        return None
+    with open(path, 'r') as f:
+        image = json.load(f).get('image')
+    if not image:
+        return None
+    return {
+        "file": image['file'],
+        "width": float(image['width']),
+        "height": float(image['height']),
+        "points": {str(node).upper(): (float(px), float(py)) for node, (px, py) in image.get('points', {}).items()},
+    }
+
+
+def load_map(path=DEFAULT_MAP_FILE):
+    """Load a map file (.json or .csv) into a CompactGraph."""
+    if path.lower().endswith('.csv'):
+        return load_map_csv(path)
+    return load_map_json(path)
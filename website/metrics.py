@@ -0,0 +1,198 @@
+"""Lightweight timers/counters exposed in Prometheus text format at /metrics.
+
+When metrics are disabled every instrumented call costs one global flag
+check; nothing is recorded.
+"""
+import bisect
+import functools
+import threading
+import time
+
+# Detik; long-poll bisa sampai LONG_POLL_MAX_TIMEOUT (60)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = False
+_metrics = []      # urutan output /metrics
+_collectors = []   # fungsi -> [(name, type, help, [(labels, value)])], dibaca saat scrape
+
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+def enabled():
+    return _enabled
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        if not _enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # labels -> [jumlah per bucket..., +Inf], sum
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        if not _enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def time(self, **labels):
+        """Context manager timing a block into this histogram."""
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(key + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter() if _enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+def timed(histogram, **labels):
+    """Decorator recording the duration of every call in `histogram`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorate
+
+
+def register_collector(func):
+    """Add a callback returning [(name, type, help, [(labels dict, value)])] evaluated at scrape time."""
+    _collectors.append(func)
+    return func
+
+
+def render():
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, help_text, samples in collect():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(key):
+    if not key:
+        return ""
+    parts = []
+    for name, value in key:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# --- Metrik hot path ---
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Latency of HTTP requests per route.")
+REQUESTS = Counter("http_requests_total", "HTTP requests per route, method and status.")
+STORE_IO_SECONDS = Histogram("state_store_io_seconds", "JSON state file reads and writes.")
+DB_SECONDS = Histogram("database_op_seconds", "database_management operations.")
+WIFI_PROBE_SECONDS = Histogram("wifi_probe_seconds", "Wi-Fi SSID probe (netsh/airport/iwgetid/nmcli subprocess).")
+ROUTE_SECONDS = Histogram("route_planning_seconds", "Route planning (A*, route index lookups, D* Lite repairs).")
+TEMPLATE_SECONDS = Histogram("template_render_seconds", "Jinja template rendering.")
+TELEMETRY_SAMPLES = Counter("telemetry_samples_total", "Telemetry samples received per robot and result.")
+
+
+def init_app(app):
+    """Install request/template timing hooks on `app` (enabled by METRICS_ENABLED)."""
+    from flask import before_render_template, g, request, template_rendered
+
+    enable(app.config.get('METRICS_ENABLED', True))
+
+    @app.before_request
+    def _start_timer():
+        if _enabled:
+            g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=request.method)
+            REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+    def _template_start(sender, template, context, **extra):
+        if _enabled:
+            g.setdefault('_metrics_templates', []).append(time.perf_counter())
+
+    def _template_done(sender, template, context, **extra):
+        starts = g.get('_metrics_templates')
+        if starts:
+            TEMPLATE_SECONDS.observe(time.perf_counter() - starts.pop(), template=template.name)
+
+    # weak=False: handler lokal di atas tidak punya referensi lain
+    before_render_template.connect(_template_start, app, weak=False)
+    template_rendered.connect(_template_done, app, weak=False)
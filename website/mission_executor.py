@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MISSION_QUEUED = 'queued'
+MISSION_RUNNING = 'running'
+MISSION_DONE = 'done'
+MISSION_CANCELLED = 'cancelled'
+MISSION_FAILED = 'failed'
+
+ACTIVE_STATES = (MISSION_QUEUED, MISSION_RUNNING)
+DEFAULT_MAX_WORKERS = 4
+FINISHED_KEEP = 50  # berapa misi selesai yang tetap ditampilkan di introspeksi
+
+
+class Mission:
+    """A unit of work in the executor, with its own cancel event."""
+
+    def __init__(self, mission_id, key, label, robot_id):
+        self.id = mission_id
+        self.key = key
+        self.label = label
+        self.robot_id = robot_id
+        self.state = MISSION_QUEUED
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "key": self.key,
+            "label": self.label,
+            "robot_id": self.robot_id,
+            "state": self.state,
+            "error": self.error,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class MissionExecutor:
+    """Bounded pool that runs missions, dedupes them by key and supports cancellation.
+
+    `func` is called as `func(*args, cancel_event=..., **kwargs)` and should
+    return soon after `cancel_event` is set. `label`/`robot_id` are only
+    metadata for the introspection endpoint.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self._lock = threading.Lock()
+        self._missions = {}  # id -> Mission (aktif + beberapa yang sudah selesai)
+        self._by_key = {}    # key -> Mission aktif
+        self._finished = []
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mission')
+
+    def resize(self, max_workers):
+        """Replace the pool with one of a different size (running missions keep going)."""
+        with self._lock:
+            if max_workers == self.max_workers:
+                return
+            old_pool = self._pool
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mission')
+            self.max_workers = max_workers
+        old_pool.shutdown(wait=False)
+
+    def submit(self, mission_id, key, func, args=(), kwargs=None, label=None, robot_id=None, on_done=None):
+        """Submit a mission. Returns (mission, created); an active mission with the same key is reused."""
+        with self._lock:
+            existing = self._by_key.get(key)
+            if existing is not None and existing.state in ACTIVE_STATES:
+                return existing, False
+            mission = Mission(mission_id, key, label or key, robot_id)
+            self._missions[mission_id] = mission
+            self._by_key[key] = mission
+            mission.future = self._pool.submit(self._run, mission, func, tuple(args), dict(kwargs or {}), on_done)
+            return mission, True
+
+    def cancel(self, mission_id):
+        """Ask a mission to stop. Returns False if it is unknown or already finished."""
+        with self._lock:
+            mission = self._missions.get(mission_id)
+            if mission is None or mission.state not in ACTIVE_STATES:
+                return False
+            mission.cancel_event.set()
+            return True
+
+    def get(self, mission_id):
+        with self._lock:
+            return self._missions.get(mission_id)
+
+    def missions(self):
+        """Running/queued missions plus the most recently finished ones."""
+        with self._lock:
+            return [mission.to_dict() for mission in self._missions.values()]
+
+    def _run(self, mission, func, args, kwargs, on_done):
+        with self._lock:
+            mission.state = MISSION_RUNNING
+            mission.started = time.time()
+        state = MISSION_FAILED
+        try:
+            if not mission.cancel_event.is_set():
+                func(*args, cancel_event=mission.cancel_event, **kwargs)
+            state = MISSION_CANCELLED if mission.cancel_event.is_set() else MISSION_DONE
+        except Exception as error:
+            mission.error = repr(error)
+        finally:
+            with self._lock:
+                mission.state = state
+                mission.finished = time.time()
+                if self._by_key.get(mission.key) is mission:
+                    del self._by_key[mission.key]
+                self._finished.append(mission.id)
+                while len(self._finished) > FINISHED_KEEP:
+                    self._missions.pop(self._finished.pop(0), None)
+            if on_done is not None:
+                on_done(mission)
+
+
+executor = MissionExecutor()
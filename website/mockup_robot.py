@@ -1,42 +1,175 @@
 import time
 import json
 import os
-from .database_management import update_tujuan_db, ROBOT_STATUS_FILE, add_to_delivery_history
-from .route_instructions import generate_return_instructions
-from .route_calculation import coords
+from .database_management import update_tujuan_db, update_route_db, read_robot_status, ROBOT_STATUS_FILE, add_to_delivery_history, increment_total_pengiriman, DEFAULT_ROBOT_ID
+from .route_instructions import generate_instructions, generate_return_instructions
+from . import route_calculation
 from .status_book_callingcard import StatusRobot, StatusElektronika, StatusPaket
+from .stats import record_mission
+from .replanner import replanner
+from .traffic import edge_conditions
+
+class MissionAborted(Exception):
+    """Raised inside the simulation when its mission is cancelled."""
+
+def _tunggu(detik, cancel_event):
+    # Tidur yang bisa dibatalkan: pakai Event.wait kalau ada cancel_event
+    if cancel_event is None:
+        time.sleep(detik)
+    elif cancel_event.wait(detik):
+        raise MissionAborted()
+
+# Durasi default mockup (detik)
+WAKTU_PERGI = 5
+WAKTU_TUNGGU = 15   # menunggu paket diambil
+WAKTU_PULANG = 5
+WAKTU_CEK_JALUR = 1  # detik, interval cek ulang selama jalur tertutup
+
+def run_robot_simulation(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id=DEFAULT_ROBOT_ID,
+                         cancel_event=None):
+    """Drive one mission 104 -> 105 -> 106 -> 103; on cancel the robot goes to 107 (KENDALA)."""
+    _run_steps(mission_steps(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id), cancel_event,
+               lambda: abort_mission(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id))
+
+def run_multi_stop_simulation(tujuan_list, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id=DEFAULT_ROBOT_ID,
+                              cancel_event=None):
+    """run_robot_simulation() for a multi-drop mission (drop points in visiting order)."""
+    _run_steps(multi_stop_steps(tujuan_list, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id), cancel_event,
+               lambda: abort_mission(" + ".join(tujuan_list), nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id))
+
+def _run_steps(steps, cancel_event, on_abort):
+    try:
+        for detik in steps:
+            _tunggu(detik, cancel_event)
+    except MissionAborted:
+        steps.close()  # lepas leg dari replanner
+        on_abort()
+
+def abort_mission(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id=DEFAULT_ROBOT_ID, log=print):
+    log(f"[{robot_id}] Misi dibatalkan, robot berhenti (KENDALA).")
+    update_tujuan_db(
+        tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi,
+        status_code=107, # Status KENDALA
+        status_paket=301, # Status TIDAK TERSEDIA
+        robot_id=robot_id
+    )
+
+def drive(robot_id, goal, rute_text, waktu_edge, log=print):
+    """Generator: move the robot node by node to `goal`, following the route kept by the replanner.
+
+    The position is written to the robot status at every node. When the
+    route changes (blocked/congested corridor) the robot continues on the new
+    one; while no route exists it waits and checks again. Returns the list of
+    visited nodes.
+    """
+    posisi = read_robot_status(robot_id).get('posisi', 'START')
+    dilewati = [posisi]
+    replanner.begin_leg(robot_id, goal, posisi, rute_text)
+    try:
+        while posisi != goal:
+            rute = replanner.advance(robot_id, posisi)
+            if not rute or len(rute) < 2:
+                log(f"[{robot_id}] Jalur ke {goal} tertutup, menunggu...")
+                yield WAKTU_CEK_JALUR
+                continue
+            yield waktu_edge(rute[0], rute[1])
+            posisi = rute[1]
+            update_route_db(robot_id, posisi=posisi)
+            dilewati.append(posisi)
+    finally:
+        replanner.end_leg(robot_id)
+    return dilewati
+
+def _edge_timer(rute_text, total, waktu_tempuh):
+    # Tanpa waktu_tempuh: durasi mockup dibagi rata per edge, diperlambat faktor macet
+    if waktu_tempuh:
+        base = lambda a, b: waktu_tempuh(f"{a} -> {b}")
+    else:
+        edges = max(len(rute_text.split('->')) - 1, 1)
+        base = lambda a, b: total / edges
+
+    def waktu_edge(a, b):
+        factor = edge_conditions.factor(a, b)
+        return base(a, b) * (factor if factor != float('inf') else 1)
+    return waktu_edge
+
+def mission_steps(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id=DEFAULT_ROBOT_ID,
+                  waktu_tempuh=None, waktu_tunggu=WAKTU_TUNGGU, clock=time.monotonic,
+                  simpan_history=True, log=print):
+    """Generator with the mission state transitions; yields how many seconds to wait between them.
+
+    run_robot_simulation waits in real time, sim_engine on a virtual clock.
+    `waktu_tempuh(rute_text)` gives the travel time of a route; it is called
+    per edge ('A -> B') while driving (default: fixed mockup durations).
+    """
+    yield from multi_stop_steps([tujuan_awal], nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id,
+                                waktu_tempuh, waktu_tunggu, clock, simpan_history, log)
+
+def multi_stop_steps(tujuan_list, nama_pengirim, rute_pergi_text, instruksi_pergi, robot_id=DEFAULT_ROBOT_ID,
+                     waktu_tempuh=None, waktu_tunggu=WAKTU_TUNGGU, clock=time.monotonic,
+                     simpan_history=True, log=print):
+    """mission_steps() for several drop points visited in the given order, then back to START.
+
+    `rute_pergi_text`/`instruksi_pergi` describe the whole tour (multi_stop.tour_plan).
+    At the start of every leg the robot gets the remaining tour; at each
+    drop point it stops (105) and waits for the package to be taken.
+    """
+    from .multi_stop import tour_plan
+    from .route_index import find_route
 
-def run_robot_simulation(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi):
-    
     # --- BYPASS CEK HARDWARE (Supaya Demo Lancar) ---
     # Kita hapus logika pengecekan error yang bikin macet.
     # Langsung dianggap OK.
-    print("[ROBOT] Simulasi dimulai (Mode Bypass Hardware)...")
+    log(f"[{robot_id}] Simulasi dimulai (Mode Bypass Hardware)...")
+    waktu_mulai = clock()
+    antar = []  # (tujuan, rute leg, instruksi leg) per titik antar
 
-    # --- MULAI MENGANTAR PAKET (104) ---
-    print("[ROBOT] Bergerak Mengantar...")
-    update_tujuan_db(
-        tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, 
-        status_code=104, # Status MENGANTAR
-        status_paket=303 # Status PAKET DIANTAR
-    )
-    time.sleep(5) 
+    for i, tujuan in enumerate(tujuan_list):
+        posisi = read_robot_status(robot_id).get('posisi', 'START')
+        if len(tujuan_list) == 1:
+            rute_leg, instruksi_leg = rute_pergi_text, instruksi_pergi
+        else:
+            leg, _ = find_route(posisi, tujuan)
+            rute_leg = " -> ".join(leg) if leg else "-"
+            if i > 0:
+                # Sisa tour dihitung ulang dari posisi sekarang
+                sisa_rute, sisa_instruksi = tour_plan(posisi, tujuan_list[i:])
+                rute_pergi_text = " -> ".join(sisa_rute) if sisa_rute else "-"
+                instruksi_pergi = sisa_instruksi or []
 
-    # --- SAMPAI TUJUAN (105) ---
-    print(f"[ROBOT] Sampai di {tujuan_awal}.")
-    update_tujuan_db(
-        tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi, 
-        status_code=105, # Status SAMPAI
-        status_paket=304 # Status PAKET TIBA
-    )
-    
-    time.sleep(15) # Menunggu paket diambil
+        # --- MULAI MENGANTAR PAKET (104) ---
+        log(f"[{robot_id}] Bergerak Mengantar ke {tujuan}...")
+        update_tujuan_db(
+            tujuan, nama_pengirim, rute_pergi_text, instruksi_pergi,
+            status_code=104, # Status MENGANTAR
+            status_paket=303, # Status PAKET DIANTAR
+            robot_id=robot_id
+        )
+        dilewati = yield from drive(robot_id, tujuan, rute_leg,
+                                    _edge_timer(rute_leg, WAKTU_PERGI, waktu_tempuh), log)
+        if len(tujuan_list) > 1 or " -> ".join(dilewati) != rute_leg:
+            # Rute berubah di jalan (re-routing) / leg dari tour: simpan rute yang benar-benar dilalui
+            rute_leg = " -> ".join(dilewati)
+            instruksi_leg = generate_instructions(dilewati, route_calculation.coords)
+
+        # --- SAMPAI TUJUAN (105) ---
+        log(f"[{robot_id}] Sampai di {tujuan}.")
+        update_tujuan_db(
+            tujuan, nama_pengirim, rute_leg, instruksi_leg,
+            status_code=105, # Status SAMPAI
+            status_paket=304, # Status PAKET TIBA
+            robot_id=robot_id, posisi=tujuan
+        )
+        antar.append((tujuan, rute_leg, instruksi_leg))
+
+        yield waktu_tunggu # Menunggu paket diambil
 
     # --- PULANG KE STATION (106) ---
-    print("[ROBOT] Kembali ke Station...")
-    
+    log(f"[{robot_id}] Kembali ke Station...")
+    tujuan_akhir = tujuan_list[-1]
+
     # NEW CODE (Fix: Capture codes)
-    instruksi_pulang_text, instruksi_pulang_codes, rute_pulang_text = generate_return_instructions(tujuan_awal, coords)
+    instruksi_pulang_text, instruksi_pulang_codes, rute_pulang_text = generate_return_instructions(tujuan_akhir, route_calculation.coords)
     
     # Format properly as a tuple ([texts], [codes]) so JSON structure matches Status 104
     full_return_instructions = (instruksi_pulang_text, instruksi_pulang_codes)
@@ -44,21 +177,41 @@ def run_robot_simulation(tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_
     update_tujuan_db(
         "STATION (PULANG)", "SYSTEM", rute_pulang_text, full_return_instructions, 
         status_code=106, # Status PULANG
-        status_paket=301 # Status TIDAK TERSEDIA
+        status_paket=301, # Status TIDAK TERSEDIA
+        robot_id=robot_id
     )
     
-    time.sleep(5)
+    dilewati = yield from drive(robot_id, 'START', rute_pulang_text,
+                                _edge_timer(rute_pulang_text, WAKTU_PULANG, waktu_tempuh), log)
+    if " -> ".join(dilewati) != rute_pulang_text:
+        rute_pulang_text = " -> ".join(dilewati)
+        instruksi_pulang_text = ["--- MODE PULANG ---"] + generate_instructions(dilewati, route_calculation.coords)[0]
 
     # --- STANDBY (103) ---
-    print("[ROBOT] Misi Selesai. Standby.")
+    log(f"[{robot_id}] Misi Selesai. Standby.")
     update_tujuan_db(
         "STANDBY", "-", "-", [], 
         status_code=103, # Status STANDBY
-        status_paket=302 # Status MENUNGGU PAKET
+        status_paket=302, # Status MENUNGGU PAKET
+        robot_id=robot_id, posisi='START'
     )
-    
-    # --- SIMPAN HISTORY ---
-    add_to_delivery_history(
-        tujuan_awal, nama_pengirim, rute_pergi_text, instruksi_pergi,
-        rute_pulang_text, instruksi_pulang_text, "Paket tiba di Tujuan"
-    )
\ No newline at end of file
+
+    if not simpan_history:
+        return
+
+    durasi = clock() - waktu_mulai
+    for i, (tujuan, rute_leg, instruksi_leg) in enumerate(antar):
+        # Durasi misi dan rute pulang hanya dicatat sekali, pada titik antar terakhir
+        terakhir = i == len(antar) - 1
+
+        # --- UPDATE STATISTIK (counter inkremental, tanpa scan history) ---
+        # Dicatat sebelum history supaya seed awal statistik tidak menghitung misi ini dua kali
+        record_mission(tujuan, nama_pengirim, durasi if terakhir else None, rute_pulang_text if terakhir else None)
+        increment_total_pengiriman()
+
+        # --- SIMPAN HISTORY ---
+        add_to_delivery_history(
+            tujuan, nama_pengirim, rute_leg, instruksi_leg,
+            rute_pulang_text if terakhir else None, instruksi_pulang_text if terakhir else None,
+            "Paket tiba di Tujuan"
+        )
@@ -0,0 +1,146 @@
+"""Visiting order for multi-drop missions.
+
+The distance matrix comes from the precomputed route index (or live A* while
+corridors are blocked/congested). Small sets are solved exactly with the
+Held-Karp DP; larger ones use nearest neighbour + 2-opt.
+"""
+import itertools
+
+from .route_index import find_route, route_cost, route_instructions
+
+HELD_KARP_LIMIT = 10   # 2^n * n^2 masih murah sampai sekitar 10 tujuan
+_INF = float('inf')
+NO_ROUTE = "Jalur Tidak Ditemukan"
+
+
+def distance_matrix(nodes):
+    """matrix[i][j] = route cost nodes[i] -> nodes[j] (inf if unreachable)."""
+    matrix = []
+    for a in nodes:
+        row = []
+        for b in nodes:
+            cost = 0.0 if a == b else route_cost(a, b)
+            row.append(_INF if cost is None else cost)
+        matrix.append(row)
+    return matrix
+
+
+def plan_tour(stops, start='START', end='START'):
+    """Cheapest order to visit `stops` from `start` (returning to `end`, None = open tour).
+
+    Returns (order, cost), or (None, "Jalur Tidak Ditemukan") like
+    find_route() if some stop cannot be reached. A stop at `start` itself
+    is kept as a zero-cost first visit.
+    """
+    stops = list(dict.fromkeys(stop.upper() for stop in stops))
+    if start in stops:
+        # Robot sudah di titik antar ini: antar dulu di tempat, sisanya direncanakan dari sini
+        stops.remove(start)
+        if not stops:
+            cost = 0.0 if end is None else distance_matrix([start, end])[0][1]
+            return ([start], cost) if cost != _INF else (None, NO_ROUTE)
+        order, cost = plan_tour(stops, start, end)
+        return ([start] + order, cost) if order is not None else (None, cost)
+    if not stops:
+        return [], 0.0
+    nodes = [start] + stops + ([end] if end is not None else [])
+    matrix = distance_matrix(nodes)
+    end_index = len(nodes) - 1 if end is not None else None
+    if len(stops) <= HELD_KARP_LIMIT:
+        order, cost = _held_karp(matrix, len(stops), end_index)
+    else:
+        order, cost = _two_opt(matrix, _nearest_neighbour(matrix, len(stops)), end_index)
+    if cost == _INF:
+        # Urutan dengan biaya inf tidak lengkap / tidak bisa dijalani
+        return None, NO_ROUTE
+    return [stops[i - 1] for i in order], cost
+
+
+def tour_cost(matrix, order, end_index=None):
+    """Cost of visiting `order` (indices into matrix, 0 = start)."""
+    cost, prev = 0.0, 0
+    for node in order:
+        cost += matrix[prev][node]
+        prev = node
+    if end_index is not None:
+        cost += matrix[prev][end_index]
+    return cost
+
+
+def tour_plan(start, order):
+    """(route names, (texts, codes)) for driving start -> order[0] -> ... -> order[-1].
+
+    Instructions are the per-leg route_instructions joined together, so each
+    drop point ends with code 4 (berhenti) before the next leg starts.
+    """
+    path, texts, codes = [start], [], []
+    prev = start
+    for stop in order:
+        leg, _ = find_route(prev, stop)
+        instruksi = route_instructions(prev, stop)
+        if leg is None or instruksi is None:
+            return None, None
+        path.extend(leg[1:])
+        texts.extend(instruksi[0])
+        codes.extend(instruksi[1])
+        prev = stop
+    return path, (texts, codes)
+
+
+def _held_karp(matrix, n, end_index):
+    # Stop diberi indeks 1..n di matrix; dp[(mask, last)] = (cost, prev)
+    dp = {(1 << i, i): (matrix[0][i + 1], None) for i in range(n)}
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(n), size):
+            mask = sum(1 << i for i in subset)
+            for last in subset:
+                prev_mask = mask & ~(1 << last)
+                best = (_INF, None)
+                for prev in subset:
+                    if prev == last:
+                        continue
+                    cost = dp[(prev_mask, prev)][0] + matrix[prev + 1][last + 1]
+                    if cost < best[0]:
+                        best = (cost, prev)
+                dp[(mask, last)] = best
+
+    full = (1 << n) - 1
+    best_last, best_cost = 0, _INF
+    for last in range(n):
+        cost = dp[(full, last)][0] + (matrix[last + 1][end_index] if end_index is not None else 0)
+        if cost < best_cost:
+            best_last, best_cost = last, cost
+    if best_cost == _INF:
+        # Ada tujuan yang tidak terjangkau: parent-nya None, backtrack akan berhenti di tengah
+        return None, _INF
+
+    # Susun urutan dari belakang lewat parent
+    order, mask, last = [], full, best_last
+    while last is not None:
+        order.append(last + 1)
+        mask, last = mask & ~(1 << last), dp[(mask, last)][1]
+    order.reverse()
+    return order, best_cost
+
+
+def _nearest_neighbour(matrix, n):
+    order, current, left = [], 0, set(range(1, n + 1))
+    while left:
+        current = min(left, key=lambda node: matrix[current][node])
+        order.append(current)
+        left.remove(current)
+    return order
+
+
+def _two_opt(matrix, order, end_index):
+    best = tour_cost(matrix, order, end_index)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                cost = tour_cost(matrix, candidate, end_index)
+                if cost < best - 1e-9:
+                    order, best, improved = candidate, cost, True
+    return order, best
@@ -0,0 +1,261 @@
+import heapq
+import math
+import threading
+
+from . import route_calculation
+from .database_management import read_robot_status, update_route_db
+from .metrics import ROUTE_SECONDS
+from .route_instructions import generate_instructions_ids
+from .status_book_callingcard import StatusRobot
+from .traffic import edge_conditions
+
+_INF = float('inf')
+
+
+class DStarLite:
+    """Incremental shortest path (D* Lite) on a CompactGraph.
+
+    Searches backwards from the goal, so when the robot moves (`move_to`) or
+    edge weights change (`update_edges`) only the affected part of the search
+    is repaired instead of planning from scratch.
+    """
+
+    def __init__(self, cgraph, start, goal, weights=None, scale=None):
+        self.cgraph = cgraph
+        self.start = start
+        self.goal = goal
+        self.weights = weights if weights is not None else cgraph.weights
+        self.scale = scale if scale is not None else route_calculation.compact_heuristic_scale(cgraph)
+        self.expanded = 0  # jumlah node yang diekspansi (untuk introspeksi/benchmark)
+
+        n = len(cgraph)
+        offsets, targets = cgraph.offsets, cgraph.targets
+        # Sisi masuk tiap node: (asal, posisi bobot di CSR)
+        self._pred = [[] for _ in range(n)]
+        for u in range(n):
+            for pos in range(offsets[u], offsets[u + 1]):
+                self._pred[targets[pos]].append((u, pos))
+
+        self._g = [_INF] * n
+        self._rhs = [_INF] * n
+        self._rhs[goal] = 0.0
+        self._km = 0.0
+        self._last = start
+        self._open = {}   # node -> key aktif (entri heap lain dianggap basi)
+        self._heap = []
+        self._push(goal)
+
+    # --- API ---
+    def compute(self):
+        """Repair the search until the path from `start` is known. Returns its cost (inf if none)."""
+        g, rhs, heap, open_ = self._g, self._rhs, self._heap, self._open
+        while heap:
+            key, node = heap[0]
+            if open_.get(node) != key:
+                heapq.heappop(heap)
+                continue
+            start = self.start
+            if not (key < self._key(start) or rhs[start] != g[start]):
+                break
+            heapq.heappop(heap)
+            new_key = self._key(node)
+            if key < new_key:
+                self._push(node, new_key)
+            elif g[node] > rhs[node]:
+                g[node] = rhs[node]
+                del open_[node]
+                self.expanded += 1
+                weights = self.weights
+                for pred, pos in self._pred[node]:
+                    if pred != self.goal:
+                        rhs[pred] = min(rhs[pred], weights[pos] + g[node])
+                    self._update(pred)
+            else:
+                g[node] = _INF
+                self.expanded += 1
+                for pred, _ in self._pred[node]:
+                    self._recompute_rhs(pred)
+                self._recompute_rhs(node)
+        return g[self.start]
+
+    def path(self):
+        """Node ids from `start` to `goal` following the repaired search, or None."""
+        if self._g[self.start] == _INF and self._rhs[self.start] == _INF:
+            return None
+        offsets, targets, weights, g = self.cgraph.offsets, self.cgraph.targets, self.weights, self._g
+        node, path = self.start, [self.start]
+        while node != self.goal:
+            best, best_cost = None, _INF
+            for pos in range(offsets[node], offsets[node + 1]):
+                cost = weights[pos] + g[targets[pos]]
+                if cost < best_cost:
+                    best, best_cost = targets[pos], cost
+            if best is None or len(path) > len(g):
+                return None
+            path.append(best)
+            node = best
+        return path
+
+    def move_to(self, node):
+        """The robot reached `node`: it becomes the new start of the search."""
+        if node == self.start:
+            return
+        self._km += self._h(self._last, node)
+        self._last = node
+        self.start = node
+
+    def update_edges(self, weights, changed):
+        """Apply new `weights` (same layout as cgraph.weights); `changed` are (u, v) id pairs."""
+        self.weights = weights
+        for u, _ in changed:
+            self._recompute_rhs(u)
+
+    # --- Internal ---
+    def _h(self, a, b):
+        xs, ys = self.cgraph.xs, self.cgraph.ys
+        return self.scale * math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def _key(self, node):
+        m = min(self._g[node], self._rhs[node])
+        return (m + self._h(self.start, node) + self._km, m)
+
+    def _push(self, node, key=None):
+        key = key or self._key(node)
+        self._open[node] = key
+        heapq.heappush(self._heap, (key, node))
+
+    def _update(self, node):
+        if self._g[node] != self._rhs[node]:
+            self._push(node)
+        else:
+            self._open.pop(node, None)
+
+    def _recompute_rhs(self, node):
+        if node != self.goal:
+            offsets, targets, weights, g = self.cgraph.offsets, self.cgraph.targets, self.weights, self._g
+            self._rhs[node] = min((weights[pos] + g[targets[pos]] for pos in range(offsets[node], offsets[node + 1])),
+                                  default=_INF)
+        self._update(node)
+
+
+class Leg:
+    """One leg of a mission (robot driving to `goal`) tracked by the replanner."""
+
+    def __init__(self, robot_id, goal, planner):
+        self.robot_id = robot_id
+        self.goal = goal
+        self.planner = planner
+        self.path = None
+        self.paused_status = None  # status robot sebelum jalur tertutup (dipulihkan saat ada jalur lagi)
+        self.replans = 0
+
+    def to_dict(self):
+        cg = self.planner.cgraph
+        return {
+            "robot_id": self.robot_id,
+            "goal": self.goal,
+            "posisi": cg.names[self.planner.start],
+            "rute": cg.path_names(self.path) if self.path else None,
+            "blocked": self.paused_status is not None,
+            "replans": self.replans,
+            "expanded": self.planner.expanded,
+        }
+
+
+class Replanner:
+    """Keeps a D* Lite search per driving robot and repairs it when corridors change.
+
+    A changed route is pushed to the robot status (rute_terakhir and the
+    regenerated instruksi_navigasi). With no route left the robot is put in
+    KENDALA (107) and its previous status comes back once a route reopens.
+    """
+
+    def __init__(self, conditions=edge_conditions):
+        self._lock = threading.RLock()
+        self._legs = {}  # robot_id -> Leg
+        self.conditions = conditions
+        conditions.add_listener(self.on_conditions_changed)
+
+    def begin_leg(self, robot_id, goal, posisi=None, rute_text=None):
+        """Start tracking `robot_id` driving from `posisi` to `goal`.
+
+        `rute_text` is the route already sent to the robot; it is only
+        replaced (and pushed) when the repaired search finds a different one.
+        """
+        cg = route_calculation.compact_graph
+        if posisi is None:
+            posisi = read_robot_status(robot_id).get('posisi', 'START')
+        if posisi not in cg.index or goal not in cg.index:
+            return False
+        planner = DStarLite(cg, cg.index[posisi], cg.index[goal],
+                            weights=self.conditions.effective_weights(cg), scale=route_calculation.current_scale())
+        leg = Leg(robot_id, goal, planner)
+        nodes = [node.strip() for node in rute_text.split('->')] if rute_text and rute_text != '-' else []
+        if nodes and all(node in cg.index for node in nodes):
+            leg.path = cg.ids(nodes)
+        with self._lock:
+            self._legs[robot_id] = leg
+        return True
+
+    def advance(self, robot_id, posisi):
+        """The robot reached `posisi`. Returns the remaining route (names) from there, or None if blocked."""
+        with self._lock:
+            leg = self._legs.get(robot_id)
+            if leg is None:
+                return None
+            cg = leg.planner.cgraph
+            if posisi in cg.index:
+                node = cg.index[posisi]
+                leg.planner.move_to(node)
+                # Bagian rute yang sudah dilewati tidak dibandingkan lagi
+                if leg.path and node in leg.path:
+                    leg.path = leg.path[leg.path.index(node):]
+            self._repair(leg)
+            return cg.path_names(leg.path) if leg.path else None
+
+    def end_leg(self, robot_id):
+        with self._lock:
+            self._legs.pop(robot_id, None)
+
+    def legs(self):
+        with self._lock:
+            return [leg.to_dict() for leg in self._legs.values()]
+
+    def on_conditions_changed(self, changed):
+        """Listener for traffic.edge_conditions: repair every active leg."""
+        with self._lock:
+            for leg in list(self._legs.values()):
+                cg = leg.planner.cgraph
+                ids = [(cg.index[a], cg.index[b]) for a, b in changed if a in cg.index and b in cg.index]
+                leg.planner.update_edges(self.conditions.effective_weights(cg), ids)
+                self._repair(leg)
+
+    def _repair(self, leg):
+        # Caller must hold self._lock
+        planner = leg.planner
+        with ROUTE_SECONDS.time(op='dstar_repair'):
+            planner.compute()
+            path = planner.path()
+        # Jalur tertutup sejak awal leg juga perlu dilaporkan (KENDALA)
+        if path == leg.path and not (path is None and leg.paused_status is None):
+            return
+        leg.path = path
+        leg.replans += 1
+        self._push(leg)
+
+    def _push(self, leg):
+        cg = leg.planner.cgraph
+        status = read_robot_status(leg.robot_id).get('status_robot')
+        if leg.path is None:
+            if leg.paused_status is None:
+                leg.paused_status = status
+            update_route_db(leg.robot_id, "-", [], status_code=int(StatusRobot.ROBOT_MENGALAMI_KENDALA))
+            return
+        texts, codes = generate_instructions_ids(leg.path, cg)
+        status_code = None
+        if leg.paused_status is not None:
+            status_code, leg.paused_status = leg.paused_status, None
+        update_route_db(leg.robot_id, " -> ".join(cg.path_names(leg.path)), (texts, codes), status_code=status_code)
+
+
+replanner = Replanner()
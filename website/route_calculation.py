@@ -1,94 +1,205 @@
 import heapq
 import math
+import threading
 
-# === 1. DEFINISI GRAPH (JALUR DAN KONEKSI) ===
-# Format: 'NODE_AWAL': {'NODE_TUJUAN': JARAK}
-graph = {
-    # --- AREA START & UTAMA ---
-    'START': {'SIMPANG_UTAMA': 2},
-    'SIMPANG_UTAMA': {'START': 2, 'SIMPANG_KIRI_1': 3, 'BELOKAN_KANAN_AWAL': 3},
-
-    # --- JALUR KANAN (MENUJU 11B, 12A, 12B) ---
-    'BELOKAN_KANAN_AWAL': {'SIMPANG_UTAMA': 3, 'SIMPANG_KANAN_1': 3},
-    
-    'SIMPANG_KANAN_1': {
-        'BELOKAN_KANAN_AWAL': 3, 
-        '11B': 2, '12A': 2, '12B': 2
-    },
-    '11B': {'SIMPANG_KANAN_1': 2},
-    '12A': {'SIMPANG_KANAN_1': 2},
-    '12B': {'SIMPANG_KANAN_1': 2},
-
-    # --- JALUR KIRI (MENUJU 10A, 10B, 11A) ---
-    'SIMPANG_KIRI_1': {
-        'SIMPANG_UTAMA': 3,
-        'SIMPANG_KIRI_2': 2,     # Kanan (naik)
-        'BELOKAN_MENUJU_SK3': 2  # Lurus (kiri)
-    },
-
-    # Sub-Jalur Kiri Atas (Menuju 11A)
-    'SIMPANG_KIRI_2': {
-        'SIMPANG_KIRI_1': 2,
-        'BELOKAN_11A': 2,
-        'SIMPANG_KIRI_3': 3
-    },
-    'BELOKAN_11A': {'SIMPANG_KIRI_2': 2, '11A': 2},
-    '11A': {'BELOKAN_11A': 2},
-
-    # Sub-Jalur Kiri Bawah (Menuju 10A, 10B)
-    'BELOKAN_MENUJU_SK3': {'SIMPANG_KIRI_1': 2, 'SIMPANG_KIRI_3': 2},
-    
-    'SIMPANG_KIRI_3': {
-        'BELOKAN_MENUJU_SK3': 2,
-        '10A': 2, '10B': 2,
-        'SIMPANG_KIRI_2': 3
-    },
-    '10A': {'SIMPANG_KIRI_3': 2},
-    '10B': {'SIMPANG_KIRI_3': 2}
-}
-
-# === 2. KOORDINAT (X, Y) UNTUK LOGIKA BELOKAN ===
-coords = {
-    'START':           (10, 0),
-    'SIMPANG_UTAMA':   (10, 3),
-
-    # Area Kanan
-    'BELOKAN_KANAN_AWAL': (16, 3),
-    'SIMPANG_KANAN_1':    (16, 8),
-    '11B':                (14, 8),
-    '12A':                (16, 11),
-    '12B':                (18, 8),
-
-    # Area Kiri
-    'SIMPANG_KIRI_1':     (4, 3),
-    'SIMPANG_KIRI_2':     (4, 8),
-    'BELOKAN_11A':        (4, 12),
-    '11A':                (6, 12),
-    'BELOKAN_MENUJU_SK3': (1, 3),
-    'SIMPANG_KIRI_3':     (1, 8),
-    '10A':                (-1, 8),
-    '10B':                (1, 11)
-}
+from .map_loader import CompactGraph, DEFAULT_MAP_FILE, load_map
+from .metrics import ROUTE_SECONDS, timed
+
+# === 1. DEFINISI GRAPH (JALUR DAN KONEKSI) + 2. KOORDINAT (X, Y) ===
+# Map dibaca dari file (website/maps/denah_baru.json) ke CompactGraph (CSR,
+# id integer). `graph` dan `coords` tetap tersedia dalam format dict lama:
+#   graph  = {'NODE_AWAL': {'NODE_TUJUAN': JARAK}}
+#   coords = {'NODE': (X, Y)}
+# Map default baru dibaca saat `graph`/`coords`/`compact_graph` pertama dipakai
+# (atau saat warm-up, lihat startup.py), bukan saat modul diimpor.
+
+# Naik setiap kali definisi map berubah; dipakai route_index untuk rebuild
+graph_version = 0
+_map_lock = threading.Lock()
+
+def __getattr__(name):
+    if name in ('graph', 'coords', 'compact_graph'):
+        ensure_map()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def ensure_map():
+    """Load the default map if no map is active yet. Returns the active CompactGraph."""
+    cg = globals().get('compact_graph')
+    if cg is None:
+        with _map_lock:
+            if 'compact_graph' not in globals():
+                _activate(load_map(DEFAULT_MAP_FILE))
+            cg = globals()['compact_graph']
+    return cg
+
+def set_map(new_graph, new_coords):
+    """Replace the graph/coords definition and invalidate derived route tables."""
+    _activate(CompactGraph.from_dicts(new_graph, new_coords))
+
+def load_map_file(path):
+    """Load a .json/.csv map file and make it the active map."""
+    _activate(load_map(path))
+
+def _activate(cg):
+    global graph, coords, graph_version, compact_graph
+    new_graph, new_coords = cg.to_dicts()
+    if 'graph' in globals():
+        # Dict lama diisi ulang in-place karena modul lain mengimpor objeknya langsung
+        graph.clear()
+        graph.update(new_graph)
+        coords.clear()
+        coords.update(new_coords)
+    else:
+        graph, coords = new_graph, new_coords
+    # compact_graph terakhir: ensure_map() menganggap map siap begitu nama ini ada
+    compact_graph = cg
+    graph_version += 1
 
 # === 3. FUNGSI A* (Standar) ===
 def heuristic(node, goal):
+    ensure_map()
     if node not in coords or goal not in coords: return 999
     x1, y1 = coords[node]
     x2, y2 = coords[goal]
     return math.sqrt((x1 - x2)**2 + (y1 - y2)**2)
 
-def a_star_search(start, goal):
-    start, goal = start.upper(), goal.upper()
-    if start not in graph or goal not in graph: return None, "Lokasi tidak ada"
-    queue = [(0, start, [])]
-    visited = set()
+def heuristic_scale(graph, coords):
+    """Largest factor k such that k * euclidean distance never exceeds an edge weight.
+
+    Bobot edge di map tidak sama dengan jarak koordinat (mis. SIMPANG_UTAMA ->
+    SIMPANG_KIRI_1 berbobot 3 tapi jaraknya 6), jadi heuristic harus diskalakan
+    supaya tetap admissible dan A* tetap menghasilkan rute terpendek.
+    """
+    scale = float('inf')
+    for node, neighbors in graph.items():
+        if node not in coords:
+            return 0.0
+        x1, y1 = coords[node]
+        for neighbor, weight in neighbors.items():
+            if neighbor not in coords:
+                return 0.0
+            x2, y2 = coords[neighbor]
+            dist = math.hypot(x1 - x2, y1 - y2)
+            if dist > 0:
+                scale = min(scale, weight / dist)
+    return scale if scale != float('inf') else 0.0
+
+def a_star(graph, coords, start, goal, scale=None):
+    """A* over `graph` (dict of dicts). Returns the node list or None.
+
+    g-score dan f-score disimpan terpisah, path dibentuk dari parent pointer
+    di akhir, dan node yang sudah closed dilewati sebelum diekspansi.
+    """
+    if scale is None:
+        scale = heuristic_scale(graph, coords)
+    gx, gy = coords[goal] if scale else (0, 0)
+    hypot = math.hypot
+
+    def h(node):
+        if not scale:
+            return 0
+        x, y = coords[node]
+        return scale * hypot(x - gx, y - gy)
+
+    g_score = {start: 0}
+    parent = {}
+    closed = set()
+    counter = 0  # tie-breaker supaya heap tidak membandingkan nama node
+    queue = [(h(start), counter, start)]
     while queue:
-        cost, current, path = heapq.heappop(queue)
-        path = path + [current]
-        if current == goal: return path, "OK"
-        if current in visited: continue
-        visited.add(current)
+        _, _, current = heapq.heappop(queue)
+        if current in closed:
+            continue
+        if current == goal:
+            path = [current]
+            while current != start:
+                current = parent[current]
+                path.append(current)
+            path.reverse()
+            return path
+        closed.add(current)
+        g_current = g_score[current]
         for neighbor, weight in graph[current].items():
-            if neighbor not in visited:
-                heapq.heappush(queue, (cost + weight + heuristic(neighbor, goal), neighbor, path))
-    return None, "Jalur Tidak Ditemukan"
\ No newline at end of file
+            if neighbor in closed:
+                continue
+            tentative = g_current + weight
+            if tentative < g_score.get(neighbor, float('inf')):
+                g_score[neighbor] = tentative
+                parent[neighbor] = current
+                counter += 1
+                heapq.heappush(queue, (tentative + h(neighbor), counter, neighbor))
+    return None
+
+def compact_heuristic_scale(cg):
+    """heuristic_scale() for a CompactGraph."""
+    xs, ys, offsets, targets, weights = cg.xs, cg.ys, cg.offsets, cg.targets, cg.weights
+    scale = float('inf')
+    for node in range(len(cg)):
+        for pos in range(offsets[node], offsets[node + 1]):
+            other = targets[pos]
+            dist = math.hypot(xs[node] - xs[other], ys[node] - ys[other])
+            if dist > 0:
+                scale = min(scale, weights[pos] / dist)
+    return scale if scale != float('inf') else 0.0
+
+def a_star_compact(cg, start_id, goal_id, scale=None, weights=None):
+    """A* over a CompactGraph with integer node ids. Returns the id list or None.
+
+    `weights` overrides `cg.weights` (same layout), e.g. with blocked (inf) or
+    congested edges; overrides must not be lower than the map weights.
+    """
+    if scale is None:
+        scale = compact_heuristic_scale(cg)
+    if weights is None:
+        weights = cg.weights
+    xs, ys, offsets, targets = cg.xs, cg.ys, cg.offsets, cg.targets
+    gx, gy = xs[goal_id], ys[goal_id]
+    hypot = math.hypot
+
+    g_score = {start_id: 0.0}
+    parent = {}
+    closed = set()
+    queue = [(scale * hypot(xs[start_id] - gx, ys[start_id] - gy), start_id)]
+    while queue:
+        _, current = heapq.heappop(queue)
+        if current in closed:
+            continue
+        if current == goal_id:
+            path = [current]
+            while current != start_id:
+                current = parent[current]
+                path.append(current)
+            path.reverse()
+            return path
+        closed.add(current)
+        g_current = g_score[current]
+        for pos in range(offsets[current], offsets[current + 1]):
+            neighbor = targets[pos]
+            if neighbor in closed:
+                continue
+            tentative = g_current + weights[pos]
+            if tentative < g_score.get(neighbor, float('inf')):
+                g_score[neighbor] = tentative
+                parent[neighbor] = current
+                heapq.heappush(queue, (tentative + scale * hypot(xs[neighbor] - gx, ys[neighbor] - gy), neighbor))
+    return None
+
+_scale_cache = (None, None)
+
+def current_scale():
+    global _scale_cache
+    version, scale = _scale_cache
+    if version != graph_version:
+        scale = compact_heuristic_scale(ensure_map())
+        _scale_cache = (graph_version, scale)
+    return scale
+
+@timed(ROUTE_SECONDS, op='a_star_search')
+def a_star_search(start, goal):
+    start, goal = start.upper(), goal.upper()
+    cg = ensure_map()
+    if start not in cg.index or goal not in cg.index: return None, "Lokasi tidak ada"
+    path_ids = a_star_compact(cg, cg.index[start], cg.index[goal], scale=current_scale())
+    if path_ids is None: return None, "Jalur Tidak Ditemukan"
+    return cg.path_names(path_ids), "OK"
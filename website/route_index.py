@@ -0,0 +1,224 @@
+import heapq
+import threading
+from array import array
+from collections import OrderedDict
+
+from . import route_calculation
+from .route_instructions import generate_instructions_ids
+from .traffic import edge_conditions
+from .metrics import ROUTE_SECONDS, timed
+
+# Instruksi semua pasangan dihitung di depan hanya untuk map sangat kecil
+# (n^2 pasangan); selebihnya dibentuk saat pertama diminta lalu disimpan.
+EAGER_LIMIT = 50
+# Tabel all-pairs butuh O(n^2) memori/waktu (dan dibangun ulang di tiap worker
+# serta setiap set_map); di atas batas ini pohon Dijkstra per sumber dihitung
+# saat diminta dan hanya TREE_CACHE_SIZE terakhir disimpan (16 byte per node
+# per pohon: array 'd' + array 'l'). Path/instruksi maksimal PAIR_CACHE_SIZE.
+ALL_PAIRS_LIMIT = 300
+TREE_CACHE_SIZE = 16
+PAIR_CACHE_SIZE = 4096
+
+
+class RouteIndex:
+    """Shortest routes over a static CompactGraph (per-source Dijkstra).
+
+    Distances and parent trees are kept as one `array` per source, indexed by
+    integer node id. Up to ALL_PAIRS_LIMIT nodes every source is built up
+    front, so `path()`, `cost()` and `instructions()` are lookups; on larger
+    maps a source tree is built on its first query and kept in a small LRU
+    (queries mostly start at robot positions and START).
+    """
+
+    def __init__(self, cgraph, eager=None, all_pairs=None):
+        self.cgraph = cgraph
+        self.all_pairs = len(cgraph) <= ALL_PAIRS_LIMIT if all_pairs is None else all_pairs
+        self._lock = threading.Lock()
+        self._trees = OrderedDict()  # source -> (dist, parent)
+        self._paths = {}
+        self._instructions = {}
+        if self.all_pairs:
+            for source in range(len(cgraph)):
+                self._trees[source] = _dijkstra(cgraph, source)
+
+        if eager is None:
+            eager = self.all_pairs and len(cgraph) <= EAGER_LIMIT
+        if eager:
+            for start in range(len(cgraph)):
+                for goal in range(len(cgraph)):
+                    self._instruction_ids(start, goal)
+
+    def __contains__(self, name):
+        return name in self.cgraph.index
+
+    def cost(self, start, goal):
+        """Shortest distance, or None if there is no route."""
+        ids = self._ids(start, goal)
+        if ids is None:
+            return None
+        d = self._tree(ids[0])[0][ids[1]]
+        return d if d != _INF else None
+
+    def path(self, start, goal):
+        """Shortest path as a new list of node names, or None."""
+        ids = self._ids(start, goal)
+        path = self._path_ids(*ids) if ids else None
+        return self.cgraph.path_names(path) if path is not None else None
+
+    def instructions(self, start, goal):
+        """(texts, codes) from generate_instructions for the shortest path, as fresh lists."""
+        ids = self._ids(start, goal)
+        cached = self._instruction_ids(*ids) if ids else None
+        if cached is None:
+            return None
+        texts, codes = cached
+        return list(texts), list(codes)
+
+    def _ids(self, start, goal):
+        index = self.cgraph.index
+        if start not in index or goal not in index:
+            return None
+        return index[start], index[goal]
+
+    def _instruction_ids(self, start, goal):
+        key = (start, goal)
+        cached = self._instructions.get(key)
+        if cached is None:
+            path = self._path_ids(start, goal)
+            if path is None:
+                return None
+            cached = generate_instructions_ids(path, self.cgraph)
+            self._remember(self._instructions, key, cached)
+        return cached
+
+    def _path_ids(self, start, goal):
+        key = (start, goal)
+        path = self._paths.get(key)
+        if path is None:
+            dist, parent = self._tree(start)
+            if dist[goal] == _INF:
+                return None
+            nodes = [goal]
+            while nodes[-1] != start:
+                nodes.append(parent[nodes[-1]])
+            path = tuple(reversed(nodes))
+            self._remember(self._paths, key, path)
+        return path
+
+    def _tree(self, source):
+        if self.all_pairs:
+            return self._trees[source]
+        with self._lock:
+            tree = self._trees.get(source)
+            if tree is not None:
+                self._trees.move_to_end(source)
+                return tree
+        # Dijkstra di luar lock; dua request bersamaan paling buruk menghitung dua kali
+        tree = _dijkstra(self.cgraph, source)
+        with self._lock:
+            self._trees[source] = tree
+            while len(self._trees) > TREE_CACHE_SIZE:
+                self._trees.popitem(last=False)
+        return tree
+
+    def _remember(self, cache, key, value):
+        # Buang dan simpan dalam satu lock, supaya cache tidak melewati batas saat request bersamaan
+        with self._lock:
+            while len(cache) >= PAIR_CACHE_SIZE:
+                cache.pop(next(iter(cache)))  # buang yang paling lama disimpan
+            cache[key] = value
+
+
+_INF = float('inf')
+
+def _dijkstra(cgraph, source):
+    n = len(cgraph)
+    offsets, targets, weights = cgraph.offsets, cgraph.targets, cgraph.weights
+    dist = array('d', [_INF]) * n
+    parent = array('l', [-1]) * n
+    dist[source] = 0.0
+    done = bytearray(n)
+    queue = [(0.0, source)]
+    while queue:
+        d, node = heapq.heappop(queue)
+        if done[node]:
+            continue
+        done[node] = 1
+        for pos in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[pos]
+            nd = d + weights[pos]
+            if nd < dist[neighbor]:
+                dist[neighbor] = nd
+                parent[neighbor] = node
+                heapq.heappush(queue, (nd, neighbor))
+    return dist, parent
+
+
+_index = None
+_index_version = None
+_lock = threading.Lock()
+
+def get_route_index():
+    """Return the index for the current map, rebuilding it if the graph changed."""
+    global _index, _index_version
+    route_calculation.ensure_map()  # map default dibaca dulu, supaya graph_version sudah final
+    version = route_calculation.graph_version
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != route_calculation.graph_version:
+                version = route_calculation.graph_version
+                _index = RouteIndex(route_calculation.compact_graph)
+                _index_version = version
+    return _index
+
+@timed(ROUTE_SECONDS, op='find_route')
+def find_route(start, goal):
+    """Drop-in replacement for a_star_search(start, goal) backed by the route index.
+
+    While corridors are blocked or congested (traffic.edge_conditions) the
+    static index is bypassed and A* runs on the adjusted weights.
+    """
+    start, goal = start.upper(), goal.upper()
+    index = get_route_index()
+    if start not in index or goal not in index:
+        return None, "Lokasi tidak ada"
+    if len(edge_conditions):
+        path_ids = _live_path_ids(start, goal)
+        path = index.cgraph.path_names(path_ids) if path_ids is not None else None
+    else:
+        path = index.path(start, goal)
+    if path is None:
+        return None, "Jalur Tidak Ditemukan"
+    return path, "OK"
+
+@timed(ROUTE_SECONDS, op='route_instructions')
+def route_instructions(start, goal):
+    """(texts, codes) for the shortest route, or None if there is no route."""
+    start, goal = start.upper(), goal.upper()
+    index = get_route_index()
+    if len(edge_conditions) and start in index and goal in index:
+        path_ids = _live_path_ids(start, goal)
+        return generate_instructions_ids(path_ids, index.cgraph) if path_ids is not None else None
+    return index.instructions(start, goal)
+
+def route_cost(start, goal):
+    """Route length taking blocked/congested corridors into account, or None if unreachable."""
+    start, goal = start.upper(), goal.upper()
+    index = get_route_index()
+    if not len(edge_conditions) or start not in index or goal not in index:
+        return index.cost(start, goal)
+    path_ids = _live_path_ids(start, goal)
+    if path_ids is None:
+        return None
+    cg = index.cgraph
+    weights = edge_conditions.effective_weights(cg)
+    return sum(_edge_weight(cg, weights, u, v) for u, v in zip(path_ids, path_ids[1:]))
+
+def _live_path_ids(start, goal):
+    cg = route_calculation.compact_graph
+    weights = edge_conditions.effective_weights(cg)
+    return route_calculation.a_star_compact(cg, cg.index[start], cg.index[goal],
+                                            scale=route_calculation.current_scale(), weights=weights)
+
+def _edge_weight(cg, weights, u, v):
+    return min(weights[pos] for pos in range(cg.offsets[u], cg.offsets[u + 1]) if cg.targets[pos] == v)
@@ -17,7 +17,16 @@ def get_turn_direction(p1, p2, p3):
 def generate_instructions(path, coords):
     if not path or len(path) < 2:
         return ["Diam di tempat"], [4]
+    return _build_instructions(path, [coords[node] for node in path])
 
+def generate_instructions_ids(path_ids, cgraph):
+    """generate_instructions() for a path of integer node ids on a CompactGraph."""
+    if not path_ids or len(path_ids) < 2:
+        return ["Diam di tempat"], [4]
+    xs, ys = cgraph.xs, cgraph.ys
+    return _build_instructions(cgraph.path_names(path_ids), [(xs[i], ys[i]) for i in path_ids])
+
+def _build_instructions(path, points):
     text_list = []
     code_list = []
     
@@ -33,8 +42,7 @@ def generate_instructions(path, coords):
             text_list.append(f"Maju menuju {next_node}")
             continue
             
-        prev_node = path[i-1]
-        p1, p2, p3 = coords[prev_node], coords[curr_node], coords[next_node]
+        p1, p2, p3 = points[i-1], points[i], points[i+1]
         
         direction_text, direction_code = get_turn_direction(p1, p2, p3)
         
@@ -56,10 +64,11 @@ def generate_instructions(path, coords):
     return text_list, code_list
 
 def generate_return_instructions(current_node, coords):
-    from .route_calculation import a_star_search
-    path, _ = a_star_search(current_node, 'START')
+    # Rute pulang diambil dari tabel rute yang sudah dihitung (route_index)
+    from .route_index import find_route
+    path, _ = find_route(current_node, 'START')
     if path:
-        # Menangkap 2 output (text, code)
+        # Instruksi dari path yang sama; lookup kedua bisa None kalau koridor baru saja ditutup
         text, codes = generate_instructions(path, coords)
         text.insert(0, "--- MODE PULANG ---")
         # Mengembalikan 3 hal: Teks, Kode, String Rute
@@ -0,0 +1,206 @@
+"""Discrete-event mission simulator on a virtual clock.
+
+Runs many robots and missions in one process through the same
+mission_steps() transitions (update_tujuan_db 104 -> 105 -> 106 -> 103) as
+the real-time mockup, without real sleeping unless a time scale is set.
+
+    python -m website.sim_engine --robots 5 --missions 500
+"""
+import argparse
+import heapq
+import itertools
+import json
+import random
+import time
+from collections import deque
+
+from .database_management import register_robot
+from .mockup_robot import WAKTU_TUNGGU, mission_steps
+from . import route_calculation
+from .route_index import find_route, route_instructions
+
+DEFAULT_SPEED = 1.0  # satuan bobot edge per detik
+
+
+class VirtualClock:
+    """Simulation time in seconds.
+
+    time_scale = 0 runs as fast as possible (no sleeping); time_scale = 60
+    plays one simulated minute per real second; time_scale = 1 is real time.
+    """
+
+    def __init__(self, time_scale=0.0):
+        self.now = 0.0
+        self.time_scale = time_scale
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, when):
+        if self.time_scale > 0 and when > self.now:
+            time.sleep((when - self.now) / self.time_scale)
+        self.now = max(self.now, when)
+
+
+class SimulationEngine:
+    """Event heap + generator processes that yield delays in simulated seconds."""
+
+    def __init__(self, time_scale=0.0):
+        self.clock = VirtualClock(time_scale)
+        self._events = []
+        self._seq = itertools.count()
+
+    @property
+    def now(self):
+        return self.clock.now
+
+    def schedule(self, delay, callback, *args):
+        heapq.heappush(self._events, (self.clock.now + max(delay, 0), next(self._seq), callback, args))
+
+    def process(self, steps, on_done=None):
+        """Run a generator process: every yielded number is a wait in simulated seconds."""
+        def resume():
+            try:
+                delay = next(steps)
+            except StopIteration:
+                if on_done is not None:
+                    on_done()
+                return
+            self.schedule(delay, resume)
+        self.schedule(0, resume)
+
+    def run(self, until=None):
+        """Process events (up to simulated time `until`). Returns the number of events handled."""
+        handled = 0
+        while self._events:
+            when, _, callback, args = self._events[0]
+            if until is not None and when > until:
+                break
+            heapq.heappop(self._events)
+            self.clock.advance_to(when)
+            callback(*args)
+            handled += 1
+        return handled
+
+
+def route_travel_time(rute_text, speed=DEFAULT_SPEED):
+    """Travel time of an 'A -> B -> C' route from the edge weights in route_calculation.graph."""
+    nodes = [node.strip() for node in rute_text.split('->')] if rute_text and rute_text != '-' else []
+    distance = sum(route_calculation.graph[a][b] for a, b in zip(nodes, nodes[1:]))
+    return distance / speed
+
+
+class FleetSimulation:
+    """Many simulated robots serving a FIFO stream of orders on one virtual clock.
+
+    Simulated robots are registered memory-only (no robot_status_*.json files)
+    and, unless `record=True`, missions do not touch history or statistics.
+    """
+
+    def __init__(self, robot_count=1, time_scale=0.0, speed=DEFAULT_SPEED, waktu_tunggu=WAKTU_TUNGGU,
+                 prefix='SIM', record=False):
+        self.engine = SimulationEngine(time_scale)
+        self.speed = speed
+        self.waktu_tunggu = waktu_tunggu
+        self.record = record
+        self.robot_ids = [f"{prefix}_{i + 1}" for i in range(robot_count)]
+        for robot_id in self.robot_ids:
+            register_robot(robot_id, persist=False)
+        self._idle = deque(self.robot_ids)
+        self._queue = deque()
+        self.completed = []   # (tujuan, waktu_antri, durasi_misi)
+        self.rejected = 0
+        self.max_queue = 0
+
+    def add_order(self, at, tujuan, nama):
+        """Order arriving at simulated time `at`."""
+        self.engine.schedule(at - self.engine.now, self._arrive, tujuan.upper(), nama)
+
+    def _arrive(self, tujuan, nama):
+        path, _ = find_route('START', tujuan)
+        if path is None:
+            self.rejected += 1
+            return
+        self._queue.append((tujuan, nama, " -> ".join(path), self.engine.now))
+        self.max_queue = max(self.max_queue, len(self._queue))
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._queue and self._idle:
+            robot_id = self._idle.popleft()
+            tujuan, nama, rute_text, tiba = self._queue.popleft()
+            mulai = self.engine.now
+            steps = mission_steps(
+                tujuan, nama, rute_text, route_instructions('START', tujuan), robot_id,
+                waktu_tempuh=lambda rute: route_travel_time(rute, self.speed),
+                waktu_tunggu=self.waktu_tunggu, clock=self.engine.clock,
+                simpan_history=self.record, log=_quiet)
+            self.engine.process(steps, on_done=lambda robot_id=robot_id, tujuan=tujuan, tiba=tiba, mulai=mulai:
+                                self._finish(robot_id, tujuan, tiba, mulai))
+
+    def _finish(self, robot_id, tujuan, tiba, mulai):
+        self.completed.append((tujuan, mulai - tiba, self.engine.now - mulai))
+        self._idle.append(robot_id)
+        self._dispatch()
+
+    def run(self, until=None):
+        """Run the simulation and return a summary report."""
+        started = time.perf_counter()
+        events = self.engine.run(until)
+        wall = time.perf_counter() - started
+        count = len(self.completed)
+        return {
+            "robots": len(self.robot_ids),
+            "missions_completed": count,
+            "missions_rejected": self.rejected,
+            "events": events,
+            "simulated_seconds": round(self.engine.now, 2),
+            "wall_seconds": round(wall, 4),
+            "max_queue": self.max_queue,
+            "mean_wait": round(sum(w for _, w, _ in self.completed) / count, 2) if count else 0,
+            "mean_mission": round(sum(d for _, _, d in self.completed) / count, 2) if count else 0,
+        }
+
+
+def _quiet(*args):
+    pass
+
+
+def random_traffic(count, mean_interval, seed=13):
+    """Orders with exponential inter-arrival times to random rooms (non-junction nodes)."""
+    rng = random.Random(seed)
+    graph = route_calculation.graph
+    rooms = [node for node in graph if node != 'START' and len(graph[node]) == 1]
+    at = 0.0
+    orders = []
+    for i in range(count):
+        at += rng.expovariate(1 / mean_interval)
+        orders.append({"at": round(at, 2), "tujuan": rng.choice(rooms), "nama": f"SIM{i}"})
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Discrete-event load simulation of robot missions")
+    parser.add_argument("--robots", type=int, default=3)
+    parser.add_argument("--missions", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=20.0, help="rata-rata detik antar pesanan")
+    parser.add_argument("--time-scale", type=float, default=0.0, help="0 = secepatnya, 1 = real time")
+    parser.add_argument("--speed", type=float, default=DEFAULT_SPEED)
+    parser.add_argument("--traffic", help="file JSON berisi [{at, tujuan, nama}] untuk di-replay")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    if args.traffic:
+        with open(args.traffic, 'r') as f:
+            orders = json.load(f)
+    else:
+        orders = random_traffic(args.missions, args.interval, args.seed)
+
+    sim = FleetSimulation(args.robots, time_scale=args.time_scale, speed=args.speed)
+    for order in orders:
+        sim.add_order(order["at"], order["tujuan"], order.get("nama", "-"))
+    print(json.dumps(sim.run(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
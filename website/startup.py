@@ -0,0 +1,113 @@
+"""Cold start of the app: phase timings, a one-line report and the warm-up hook.
+
+create_app() times its phases with `report.phase(name)` and prints one line
+when the app is ready; if importing the package plus create_app() took
+longer than STARTUP_TARGET_SECONDS a warning follows (target for the
+Raspberry Pi). The map, route index, state documents and history index are
+built on first use; the warm-up builds them right after start (in a
+background thread by default) so the first requests do not pay for it.
+The timings are also exported on /metrics.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from . import metrics
+
+DEFAULT_TARGET_SECONDS = 2.0
+WARMUP_MODES = ('background', 'sync', 'off')
+TEMPLATES = ('dashboard_home.html', 'dashboard_send.html')
+
+_last = None  # laporan create_app() terakhir di proses ini
+
+
+class StartupReport:
+    """Durations of the startup phases of one create_app() call (the first one includes the import)."""
+
+    def __init__(self, import_seconds=0.0):
+        self.started = time.perf_counter()
+        self.import_seconds = import_seconds  # import paket website (0 untuk create_app() berikutnya)
+        self.phases = [("import", import_seconds)] if import_seconds else []  # (nama, detik) urut waktu
+        self.warmup = []        # (langkah, detik) dari warm-up
+        self.total = None
+
+    @contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - began))
+
+    def finish(self, target=DEFAULT_TARGET_SECONDS, log=print):
+        """Record the total time and print the report line (plus a warning above `target`)."""
+        global _last
+        self.total = self.import_seconds + time.perf_counter() - self.started
+        _last = self
+        parts = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases)
+        log(f"[startup] siap dalam {self.total * 1000:.0f} ms ({parts})")
+        if target and self.total > target:
+            log(f"[startup] PERINGATAN: start {self.total:.2f} s melebihi target {target:.2f} s")
+        return self.total
+
+    def to_dict(self):
+        return {"total": self.total, "phases": dict(self.phases), "warmup": dict(self.warmup)}
+
+
+def _warmup_steps(app):
+    from .database_management import history_store
+    from .route_calculation import ensure_map
+    from .route_index import get_route_index
+    from .state_store import store
+    from .stats import ensure_initialized
+    from .telemetry import floor_plan
+
+    return [
+        ("map", ensure_map),
+        ("route_index", get_route_index),
+        ("state", store.preload),
+        ("history_index", history_store.count),
+        ("stats", ensure_initialized),
+        ("floor_plan", floor_plan),
+        ("templates", lambda: [app.jinja_env.get_template(name) for name in TEMPLATES]),
+    ]
+
+
+def warm_up(app, report):
+    """Build everything that is otherwise created on first use; timings go to `report.warmup`."""
+    for name, step in _warmup_steps(app):
+        began = time.perf_counter()
+        try:
+            step()
+        except Exception as error:
+            # Gagal di sini bukan fatal: langkah ini diulang saat pertama dipakai
+            print(f"[startup] warm-up {name} gagal: {error}")
+        report.warmup.append((name, time.perf_counter() - began))
+    total = sum(seconds for _, seconds in report.warmup)
+    print(f"[startup] warm-up selesai dalam {total * 1000:.0f} ms")
+
+
+def start_warm_up(app, report, mode='background'):
+    """Run warm_up() now ('sync'), in a daemon thread ('background') or not at all ('off').
+
+    'sync' makes create_app() (and the startup total) include the warm-up.
+    """
+    if mode not in WARMUP_MODES:
+        raise ValueError(f"WARMUP harus salah satu dari {', '.join(WARMUP_MODES)}")
+    if mode == 'sync':
+        warm_up(app, report)
+    elif mode == 'background':
+        threading.Thread(target=warm_up, args=(app, report), name='startup-warmup', daemon=True).start()
+
+
+@metrics.register_collector
+def _startup_metrics():
+    report = _last
+    if report is None:
+        return []
+    return [("app_startup_seconds", "gauge", "Package import plus create_app() time of this process.",
+             [({}, report.total)]),
+            ("app_startup_phase_seconds", "gauge", "Duration of each create_app() phase.",
+             [({"phase": name}, seconds) for name, seconds in report.phases]),
+            ("app_warmup_step_seconds", "gauge", "Duration of each warm-up step (map, route index, ...).",
+             [({"step": name}, seconds) for name, seconds in list(report.warmup)])]
@@ -0,0 +1,433 @@
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .metrics import STORE_IO_SECONDS, timed
+
+SHARED_POLL_INTERVAL = 0.2  # detik, interval cek database saat menunggu perubahan (multi-proses)
+
+
+class StateStore:
+    """Thread-safe in-memory store for the JSON state documents.
+
+    Reads are served from memory. Writes bump a global version number and are
+    persisted by a background writer thread: bursts of writes are coalesced
+    into a single file write, and files are replaced atomically (temp file +
+    rename) so a reader never sees a half-written document.
+
+    With `use_backend(SqliteBackend(...))` documents are shared by several
+    worker processes instead: writes go straight to the database in one
+    transaction and versions come from the database, so they match across
+    workers. The JSON files are then only read as the initial content.
+    """
+
+    def __init__(self, flush_delay=0.25, reload_interval=1.0):
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._docs = {}       # key -> data (dict/list)
+        self._paths = {}      # key -> file path (None = memory only)
+        self._defaults = {}   # key -> default data if file is missing
+        self._mtimes = {}     # key -> mtime of the file we last loaded/wrote
+        self._checked = {}    # key -> time of last mtime check
+        self._dirty = set()
+        self._inflight = set()  # key yang sedang ditulis writer
+        self._version = 0
+        self._key_versions = {}
+        self._key_times = {}  # key -> time.time() perubahan terakhir (untuk Last-Modified)
+        self._flush_delay = flush_delay
+        self._reload_interval = reload_interval
+        self._writer = None
+        self._backend = None  # SqliteBackend saat multi-proses
+        self._listeners = []  # dipanggil setiap versi naik (mis. untuk membangunkan coroutine)
+        # Versi mulai lagi dari 0 setiap start: epoch membedakan versi (dan ETag) sebelum/sesudah restart
+        self.epoch = _new_epoch()
+
+    # --- Registrasi dokumen ---
+    def register(self, key, path, default):
+        """Register a document key backed by `path` (or memory only if None)."""
+        with self._cond:
+            self._paths[key] = path
+            self._defaults[key] = copy.deepcopy(default)
+            self._docs.pop(key, None)
+            self._dirty.discard(key)
+
+    def path(self, key):
+        return self._paths.get(key)
+
+    @property
+    def shared(self):
+        return self._backend is not None
+
+    def add_listener(self, callback):
+        """Call `callback()` after every version change, from the thread that made it (keep it short)."""
+        with self._cond:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._cond:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def poll(self):
+        """Shared mode: pick up commits from other processes now (wakes waiters and listeners)."""
+        if self._backend is not None:
+            with self._cond:
+                self._sync()
+
+    def use_backend(self, backend):
+        """Share every document with other processes through `backend` (None = back to per-process files)."""
+        self.flush()
+        with self._cond:
+            self._backend = backend
+            # Versi di SQLite tetap naik melewati restart, jadi epoch-nya milik database
+            self.epoch = backend.epoch() if backend is not None else _new_epoch()
+            self._docs.clear()
+            self._key_versions.clear()
+            self._key_times.clear()
+
+    # --- Baca ---
+    def get(self, key):
+        """Return a private copy of the document stored under `key`."""
+        with self._cond:
+            return copy.deepcopy(self._load(key))
+
+    def version(self, key=None):
+        """Global state version, or the version of the last change to `key`."""
+        with self._cond:
+            if key is None:
+                return self._version
+            if key in self._paths:
+                self._load(key)  # sekalian cek edit manual, supaya versi (ETag) ikut berubah
+            return self._key_versions.get(key, 0)
+
+    def modified(self, key):
+        """Wall-clock time of the last change to `key` (None if unknown)."""
+        with self._cond:
+            if key in self._paths:
+                self._load(key)
+            # Belum pernah diubah sejak start: pakai mtime file yang dimuat
+            return self._key_times.get(key, self._mtimes.get(key))
+
+    def snapshot(self, key):
+        """Return (version of `key`, copy of document) read under one lock."""
+        with self._cond:
+            data = copy.deepcopy(self._load(key))
+            return self._key_versions.get(key, 0), data
+
+    def preload(self):
+        """Load every registered document now (warm-up) instead of on its first read."""
+        with self._cond:
+            for key in list(self._paths):
+                self._load(key)
+
+    def wait_for_change(self, since, timeout=None, key=None):
+        """Block until the version (global, or of `key`) differs from `since`.
+
+        A `since` newer than the current version comes from before a restart
+        (stale) and returns at once. Returns the current version (equal to
+        `since` on timeout).
+        """
+        with self._cond:
+            if key is None:
+                current = lambda: self._version
+            else:
+                current = lambda: self._key_versions.get(key, 0)
+            if self._backend is None:
+                self._cond.wait_for(lambda: current() != since, timeout)
+                return current()
+            # Commit dari proses lain tidak membangunkan Condition: cek database berkala
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                self._sync()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if current() != since or (remaining is not None and remaining <= 0):
+                    return current()
+                self._cond.wait(SHARED_POLL_INTERVAL if remaining is None else min(SHARED_POLL_INTERVAL, remaining))
+
+    # --- Tulis ---
+    def put(self, key, data):
+        """Replace the document stored under `key`."""
+        with self._cond:
+            if self._backend is not None:
+                self._write_shared(key, lambda current: copy.deepcopy(data))
+            else:
+                self._set(key, copy.deepcopy(data))
+
+    def update(self, key, func):
+        """Atomically read-modify-write a document.
+
+        `func` receives a copy of the current document and mutates it in place.
+        """
+        with self._cond:
+            if self._backend is not None:
+                def apply(current):
+                    func(current)
+                    return current
+                return copy.deepcopy(self._write_shared(key, apply))
+            data = copy.deepcopy(self._load(key))
+            func(data)
+            self._set(key, data)
+            return copy.deepcopy(data)
+
+    def flush(self):
+        """Write all pending documents to disk right now."""
+        self._write_pending()
+
+    # --- Internal ---
+    def _load(self, key):
+        # Caller must hold self._cond
+        if self._backend is not None:
+            return self._load_shared(key)
+        path = self._paths.get(key)
+        if key in self._docs:
+            if path and key not in self._dirty and key not in self._inflight:
+                self._maybe_reload(key, path)
+            return self._docs[key]
+        self._docs[key] = self._read_file(key)
+        return self._docs[key]
+
+    def _read_file(self, key):
+        path = self._paths.get(key)
+        data = None
+        if path:
+            try:
+                data = _read_json(path)
+                self._mtimes[key] = os.path.getmtime(path)
+            except (FileNotFoundError, json.JSONDecodeError):
+                data = None
+            self._checked[key] = time.monotonic()
+        if data is None:
+            data = copy.deepcopy(self._defaults.get(key, {}))
+        return data
+
+    def _load_shared(self, key):
+        # Caller must hold self._cond
+        self._sync()
+        if key not in self._docs:
+            row = self._backend.load(key)
+            if row is None:
+                # Belum pernah ditulis ke database: isi awal dari file JSON / default
+                self._docs[key] = self._read_file(key)
+            else:
+                self._docs[key], self._key_versions[key], self._key_times[key] = row
+        return self._docs[key]
+
+    def _sync(self):
+        # Caller must hold self._cond. Ada commit dari proses lain -> buang dokumen yang sudah lama
+        if not self._backend.changed():
+            return
+        version, rows = self._backend.versions()
+        for key, (key_version, modified) in rows.items():
+            if self._key_versions.get(key) != key_version:
+                self._docs.pop(key, None)
+                self._key_versions[key] = key_version
+                self._key_times[key] = modified
+        if version > self._version:
+            self._version = version
+            self._notify()
+
+    def _write_shared(self, key, func):
+        # Caller must hold self._cond. Read-modify-write dalam satu transaksi, aman antar proses
+        data, version, modified = self._backend.write(key, func, lambda: copy.deepcopy(self._load_shared(key)))
+        self._docs[key] = data
+        self._key_versions[key] = version
+        self._key_times[key] = modified
+        self._version = max(self._version, version)
+        self._notify()
+        return data
+
+    def _maybe_reload(self, key, path):
+        # File boleh diedit manual (Mockup DB), jadi cek mtime sesekali saja.
+        now = time.monotonic()
+        if now - self._checked.get(key, 0) < self._reload_interval:
+            return
+        self._checked[key] = now
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return
+        if mtime == self._mtimes.get(key):
+            return
+        try:
+            data = _read_json(path)
+        except (OSError, json.JSONDecodeError):
+            return
+        self._mtimes[key] = mtime
+        self._docs[key] = data
+        self._bump(key)
+
+    def _set(self, key, data):
+        self._docs[key] = data
+        self._bump(key)
+        if self._paths.get(key):
+            self._dirty.add(key)
+            self._ensure_writer()
+
+    def _bump(self, key):
+        self._version += 1
+        self._key_versions[key] = self._version
+        self._key_times[key] = time.time()
+        self._notify()
+
+    def _notify(self):
+        # Caller must hold self._cond
+        self._cond.notify_all()
+        for callback in self._listeners:
+            callback()
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop, name="state-store-writer", daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: bool(self._dirty))
+            # Tunggu sebentar supaya beberapa perubahan beruntun digabung jadi satu tulis
+            time.sleep(self._flush_delay)
+            self._write_pending()
+
+    def _take_dirty(self):
+        with self._cond:
+            pending = [(key, self._paths[key], json.dumps(self._docs[key], indent=4)) for key in self._dirty]
+            self._inflight.update(self._dirty)
+            self._dirty.clear()
+            return pending
+
+    def _write_pending(self):
+        # Ambil dan tulis di bawah _io_lock supaya urutan tulis sama dengan urutan snapshot
+        with self._io_lock:
+            for key, path, payload in self._take_dirty():
+                try:
+                    mtime = _atomic_write(path, payload)
+                except OSError:
+                    # Gagal tulis: tandai dirty lagi supaya dicoba ulang nanti
+                    with self._cond:
+                        self._inflight.discard(key)
+                        self._dirty.add(key)
+                    continue
+                with self._cond:
+                    # Dicatat supaya tulisan kita sendiri tidak dianggap edit manual
+                    self._mtimes[key] = mtime
+                    self._inflight.discard(key)
+
+
+class SqliteBackend:
+    """State documents shared by several worker processes through one SQLite database in WAL mode.
+
+    Each document is one row holding its JSON text, the version of its last
+    change and the change time. Version numbers are unique across all
+    processes, and a reader notices commits from other processes through
+    PRAGMA data_version without reading any rows.
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._pid = None
+        self._conn = None
+        self._data_version = None
+
+    def _connection(self):
+        # Koneksi tidak boleh dipakai lintas fork (mis. gunicorn --preload): buat ulang per proses
+        if self._pid != os.getpid():
+            import sqlite3  # hanya dipakai mode multi-proses, tidak perlu di startup biasa
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS documents ('
+                         'key TEXT PRIMARY KEY, data TEXT NOT NULL, version INTEGER NOT NULL, modified REAL NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._pid, self._conn, self._data_version = os.getpid(), conn, None
+        return self._conn
+
+    def epoch(self):
+        """Epoch of this database, created once; it changes only if the database is recreated."""
+        conn = self._connection()
+        conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('epoch', ?)", (_new_epoch(),))
+        return conn.execute("SELECT value FROM meta WHERE name = 'epoch'").fetchone()[0]
+
+    def changed(self):
+        """True if another process committed since the previous call (always True on the first call)."""
+        data_version = self._connection().execute('PRAGMA data_version').fetchone()[0]
+        changed = data_version != self._data_version
+        self._data_version = data_version
+        return changed
+
+    @timed(STORE_IO_SECONDS, op='versions')
+    def versions(self):
+        """Return (latest version, {key: (version, modified)}) of all stored documents."""
+        rows = self._connection().execute('SELECT key, version, modified FROM documents').fetchall()
+        return max((row[1] for row in rows), default=0), {key: (version, modified) for key, version, modified in rows}
+
+    @timed(STORE_IO_SECONDS, op='read')
+    def load(self, key):
+        """Return (data, version, modified) of `key`, or None if it was never written."""
+        row = self._connection().execute('SELECT data, version, modified FROM documents WHERE key = ?',
+                                         (key,)).fetchone()
+        return None if row is None else (json.loads(row[0]), row[1], row[2])
+
+    @timed(STORE_IO_SECONDS, op='write')
+    def write(self, key, func, initial):
+        """Replace `key` by `func(current)` in one write transaction. Returns (data, version, modified).
+
+        `initial()` supplies the current document if `key` is not in the database yet.
+        """
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')  # kunci tulis dulu, supaya baca-ubah-tulis tidak balapan antar proses
+        try:
+            row = conn.execute('SELECT data FROM documents WHERE key = ?', (key,)).fetchone()
+            data = func(json.loads(row[0]) if row else initial())
+            version = conn.execute('SELECT COALESCE(MAX(version), 0) + 1 FROM documents').fetchone()[0]
+            modified = time.time()
+            conn.execute('INSERT OR REPLACE INTO documents (key, data, version, modified) VALUES (?, ?, ?, ?)',
+                         (key, json.dumps(data), version, modified))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return data, version, modified
+
+
+def _new_epoch():
+    return format(time.time_ns() // 1000, 'x')
+
+
+@timed(STORE_IO_SECONDS, op='read')
+def _read_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+@timed(STORE_IO_SECONDS, op='write')
+def _atomic_write(path, payload):
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            mtime = os.fstat(f.fileno()).st_mtime
+        os.replace(tmp_path, path)
+        return mtime
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# Satu store untuk seluruh proses
+store = StateStore()
+atexit.register(store.flush)
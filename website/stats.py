@@ -0,0 +1,104 @@
+import bisect
+import os
+import threading
+
+from .state_store import store
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATS_FILE = os.path.join(BASE_DIR, '..', 'delivery_stats.json')
+STATS_KEY = 'stats'
+
+# Batas atas bucket histogram (inklusif); bucket terakhir "lebih dari"
+DURATION_BUCKETS = [30, 60, 120, 300, 600, 1800]   # detik per misi
+RETURN_LENGTH_BUCKETS = [2, 4, 6, 8, 12]           # jumlah segmen rute pulang
+
+DEFAULT_STATS = {
+    "initialized": False,
+    "total": 0,
+    "per_tujuan": {},
+    "per_pengirim": {},
+    "durasi": {"count": 0, "mean": 0.0, "min": None, "max": None, "histogram": {}},
+    "panjang_pulang": {"count": 0, "mean": 0.0, "histogram": {}},
+}
+
+store.register(STATS_KEY, STATS_FILE, DEFAULT_STATS)
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def bucket_label(value, buckets):
+    """Histogram label for `value`, e.g. '<=60' or '>1800'."""
+    i = bisect.bisect_left(buckets, value)
+    return f"<={buckets[i]}" if i < len(buckets) else f">{buckets[-1]}"
+
+
+def route_length(route_text):
+    """Number of segments in a 'A -> B -> C' route string."""
+    if not route_text or route_text == '-':
+        return 0
+    return route_text.count('->')
+
+
+def _add_running(summary, value, buckets):
+    summary["count"] += 1
+    summary["mean"] += (value - summary["mean"]) / summary["count"]
+    if "min" in summary:
+        summary["min"] = value if summary["min"] is None else min(summary["min"], value)
+        summary["max"] = value if summary["max"] is None else max(summary["max"], value)
+    label = bucket_label(value, buckets)
+    summary["histogram"][label] = summary["histogram"].get(label, 0) + 1
+
+
+def _count_delivery(stats, tujuan, pengirim, return_length):
+    stats["total"] += 1
+    stats["per_tujuan"][tujuan] = stats["per_tujuan"].get(tujuan, 0) + 1
+    stats["per_pengirim"][pengirim] = stats["per_pengirim"].get(pengirim, 0) + 1
+    if return_length is not None:
+        _add_running(stats["panjang_pulang"], return_length, RETURN_LENGTH_BUCKETS)
+
+
+def ensure_initialized():
+    """Seed the counters from the existing history once (only if no stats file exists yet)."""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized or store.get(STATS_KEY).get("initialized"):
+            _initialized = True
+            return
+        from .database_management import history_store
+
+        # Scan history di luar lock store, lalu simpan sekali
+        stats = store.get(STATS_KEY)
+        for record in history_store.iter_records():
+            rute_pulang = record.get("rute_pulang")
+            _count_delivery(stats, record.get("tujuan_sekarang", "-"), record.get("pengirim_terakhir", "-"),
+                            route_length(rute_pulang) if rute_pulang is not None else None)
+        stats["initialized"] = True
+        store.put(STATS_KEY, stats)
+        _initialized = True
+
+
+def record_mission(tujuan, pengirim, duration_seconds, rute_pulang_text):
+    """Update all aggregates for one completed delivery (O(1), no history scan).
+
+    In a multi-drop mission only the last drop passes the duration and the
+    return route; the others pass None and are only counted.
+    """
+    ensure_initialized()
+
+    def apply(stats):
+        _count_delivery(stats, tujuan, pengirim,
+                        route_length(rute_pulang_text) if rute_pulang_text is not None else None)
+        if duration_seconds is not None:
+            _add_running(stats["durasi"], round(duration_seconds, 2), DURATION_BUCKETS)
+
+    store.update(STATS_KEY, apply)
+
+
+def read_stats():
+    """Current aggregates (copy)."""
+    ensure_initialized()
+    stats = store.get(STATS_KEY)
+    stats.pop("initialized", None)
+    return stats
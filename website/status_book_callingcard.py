@@ -1,6 +1,41 @@
+import json
+import zlib
 from enum import IntEnum
+from types import MappingProxyType
 
-class StatusRobot(IntEnum):
+
+def _display(text, color):
+    # Read-only supaya entri yang dibagi ke semua pemanggil tidak bisa diubah
+    return MappingProxyType({"text": text, "color": color})
+
+UNKNOWN_STATUS = _display("UNKNOWN", "text-secondary")
+
+# Tabel kode -> tampilan per enum, diisi sekali saat import oleh _register()
+_TABLES = {}
+
+
+class DisplayStatus(IntEnum):
+    """IntEnum whose members carry their dashboard text and color."""
+
+    @property
+    def display(self):
+        return _TABLES[type(self)][int(self)]
+
+    @property
+    def text(self):
+        return self.display["text"]
+
+    @property
+    def color(self):
+        return self.display["color"]
+
+    @classmethod
+    def lookup(cls, code):
+        """Display entry for `code` (UNKNOWN if it is not a member of this enum)."""
+        return _TABLES[cls].get(code, UNKNOWN_STATUS)
+
+
+class StatusRobot(DisplayStatus):
     ROBOT_TIDAK_AKTIF = 101
     ROBOT_AKTIF = 102
     ROBOT_STANDBY_DISTATION = 103
@@ -9,7 +44,7 @@ class StatusRobot(IntEnum):
     ROBOT_MENUJU_STATION = 106
     ROBOT_MENGALAMI_KENDALA = 107
 
-class StatusElektronika(IntEnum):
+class StatusElektronika(DisplayStatus):
     ELEKTRONIKA_ERROR = 201
     ELEKTRONIKA_TIDAK_TERHUBUNG = 202
     ELEKTRONIKA_OK = 203
@@ -17,58 +52,71 @@ class StatusElektronika(IntEnum):
     WIFI_TIDAK_TERHUBUNG = 252
     WIFI_TERHUBUNG = 253
 
-class StatusPaket(IntEnum):
+class StatusPaket(DisplayStatus):
     ROBOT_TIDAK_TERSEDIA = 301
     MENUNGGU_PAKET = 302
     PAKET_DIANTAR = 303
     PAKET_TIBA = 304
 
+
+def _register(enum_cls, entries):
+    missing = set(enum_cls) - set(entries)
+    if missing:
+        raise ValueError(f"{enum_cls.__name__}: tampilan belum didefinisikan untuk {sorted(missing)}")
+    _TABLES[enum_cls] = MappingProxyType({int(member): _display(text, color) for member, (text, color) in entries.items()})
+
+_register(StatusRobot, {
+    StatusRobot.ROBOT_TIDAK_AKTIF: ("ROBOT TIDAK AKTIF", "text-danger"),                   # Merah
+    StatusRobot.ROBOT_AKTIF: ("ROBOT AKTIF", "text-secondary"),                             # Grey
+    StatusRobot.ROBOT_STANDBY_DISTATION: ("ROBOT STANDBY DI STATION", "text-warning"),      # Amber
+    StatusRobot.ROBOT_MENGANTAR_PAKET: ("ROBOT MENGANTAR PAKET, MENUJU TUJUAN ", "text-primary"),  # Biru
+    StatusRobot.ROBOT_TELAH_MENGANTAR_PAKET: ("ROBOT TIBA DI TUJUAN", "text-success"),      # Hijau
+    StatusRobot.ROBOT_MENUJU_STATION: ("ROBOT KEMBALI KE STATION", "text-primary"),         # Biru
+    StatusRobot.ROBOT_MENGALAMI_KENDALA: ("ROBOT MENGALAMI KENDALA", "text-danger"),        # Merah
+})
+
+_register(StatusElektronika, {
+    StatusElektronika.ELEKTRONIKA_ERROR: ("ERROR", "text-danger"),                          # Merah
+    StatusElektronika.ELEKTRONIKA_TIDAK_TERHUBUNG: ("TERHUBUNG", "text-warning"),           # Amber
+    StatusElektronika.ELEKTRONIKA_OK: ("OK", "text-success"),                               # Hijau
+    StatusElektronika.WIFI_ERROR: ("WIFI ERROR", "text-danger"),                            # Merah
+    StatusElektronika.WIFI_TIDAK_TERHUBUNG: ("TIDAK TERHUBUNG", "text-danger"),             # Merah
+    StatusElektronika.WIFI_TERHUBUNG: ("OK", "text-success"),                               # Hijau
+})
+
+_register(StatusPaket, {
+    StatusPaket.ROBOT_TIDAK_TERSEDIA: ("ROBOT TIDAK TERSEDIA", "text-danger"),              # Merah
+    StatusPaket.MENUNGGU_PAKET: ("MENUNGGU PAKET", "text-warning"),                         # Amber
+    StatusPaket.PAKET_DIANTAR: ("PAKET DIANTAR", "text-primary"),                           # Biru
+    StatusPaket.PAKET_TIBA: ("PAKET TIBA", "text-success"),                                 # Hijau
+})
+
+
 def get_status_robot(code):
-    robot_status = {"text": "UNKNOWN", "color": "text-secondary"}
-    
-    if code == 101:
-        robot_status = {"text": "ROBOT TIDAK AKTIF", "color": "text-danger"} # Merah
-    elif code == 102:
-        robot_status = {"text": "ROBOT AKTIF", "color": "text-secondary"} # Grey
-    elif code == 103:
-        robot_status = {"text": "ROBOT STANDBY DI STATION", "color": "text-warning"} # Amber
-    elif code == 104:
-        robot_status = {"text": "ROBOT MENGANTAR PAKET, MENUJU TUJUAN ", "color": "text-primary"} # Biru
-    elif code == 105:
-        robot_status = {"text": "ROBOT TIBA DI TUJUAN", "color": "text-success"} # Hijau
-    elif code == 106:
-        robot_status = {"text": "ROBOT KEMBALI KE STATION", "color": "text-primary"} # Hijau
-    elif code == 107:
-        robot_status = {"text": "ROBOT MENGALAMI KENDALA", "color": "text-danger"} # Merah
-    return robot_status
+    return StatusRobot.lookup(code)
 
 def get_status_elektronika(code):
-    elektronika_status = {"text": "UNKNOWN", "color": "text-secondary"}
-    
-    if code == 201:
-        elektronika_status = {"text": "ERROR", "color": "text-danger"} # Merah
-    elif code == 202:
-        elektronika_status = {"text": "TERHUBUNG", "color": "text-warning"} # Amber
-    elif code == 203:
-        elektronika_status = {"text": "OK", "color": "text-success"} # Hijau
-    elif code == 251:
-        elektronika_status = {"text": "WIFI ERROR", "color": "text-danger"} # Merah
-    elif code == 252:
-        elektronika_status = {"text": "TIDAK TERHUBUNG", "color": "text-danger"} # Merah
-    elif code == 253:
-        elektronika_status = {"text": "OK", "color": "text-success"} # Hijau
-    return elektronika_status
+    return StatusElektronika.lookup(code)
 
 def get_status_paket(code):
-    paket_status = {"text": "UNKNOWN", "color": "text-secondary"}
-    
-    if code == 301:
-        paket_status = {"text": "ROBOT TIDAK TERSEDIA", "color": "text-danger"} # Merah
-    elif code == 302:
-        paket_status = {"text": "MENUNGGU PAKET", "color": "text-warning"} # Amber
-    elif code == 303:
-        paket_status = {"text": "PAKET DIANTAR", "color": "text-primary"} # Biru
-    elif code == 304:
-        paket_status = {"text": "PAKET TIBA", "color": "text-success"} # Hijau
-        
-    return paket_status
\ No newline at end of file
+    return StatusPaket.lookup(code)
+
+
+def describe(context):
+    """Bulk lookup: {name: (enum class, code)} -> {name: display entry}."""
+    return {name: _TABLES[enum_cls].get(code, UNKNOWN_STATUS) for name, (enum_cls, code) in context.items()}
+
+
+def status_code_table():
+    """Plain-dict copy of every code mapping, for /api/status-codes."""
+    table = {
+        enum_cls.__name__: {
+            str(int(member)): {"name": member.name, **member.display} for member in enum_cls
+        }
+        for enum_cls in _TABLES
+    }
+    table["UNKNOWN"] = dict(UNKNOWN_STATUS)
+    return table
+
+# Berubah hanya kalau tabel di atas diubah, jadi klien cukup mengambil sekali
+STATUS_TABLE_VERSION = format(zlib.crc32(json.dumps(status_code_table(), sort_keys=True).encode('utf-8')), '08x')
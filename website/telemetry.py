@@ -0,0 +1,258 @@
+"""Robot telemetry: position and hardware health samples sent to POST /api/telemetry.
+
+Each robot keeps its last RING_SIZE samples in memory (ring buffer). The
+newest sample updates the robot's `posisi` and, for the main robot, the
+hardware codes and battery shown by read_statuses(). Every PERSIST_INTERVAL
+seconds the samples of that window are summarised into one record per
+robot and appended to telemetry_log.jsonl.
+
+With several server workers each process keeps its own ring buffers; the
+position and hardware codes go through the shared state store.
+"""
+import atexit
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from .database_management import (DEFAULT_ROBOT_ID, read_robot_status, update_electronics_status,
+                                  update_route_db)
+from .history_store import HistoryStore
+from .map_loader import DEFAULT_MAP_FILE, load_map_image
+from .metrics import TELEMETRY_SAMPLES
+from .status_book_callingcard import StatusElektronika
+from . import route_calculation
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TELEMETRY_LOG = os.path.join(BASE_DIR, '..', 'telemetry_log.jsonl')
+
+RING_SIZE = 600          # sampel per robot (10 menit @ 1 Hz)
+PERSIST_INTERVAL = 60    # detik per record ringkasan di telemetry_log.jsonl
+MAX_BATCH = 500          # sampel per request
+
+# Field komponen -> kode StatusElektronika yang boleh dikirim
+HARDWARE_CODES = {int(code) for code in (StatusElektronika.ELEKTRONIKA_ERROR,
+                                         StatusElektronika.ELEKTRONIKA_TIDAK_TERHUBUNG,
+                                         StatusElektronika.ELEKTRONIKA_OK)}
+WIFI_CODES = {int(code) for code in (StatusElektronika.WIFI_ERROR,
+                                     StatusElektronika.WIFI_TIDAK_TERHUBUNG,
+                                     StatusElektronika.WIFI_TERHUBUNG)}
+COMPONENTS = {"raspberry": HARDWARE_CODES, "esp32": HARDWARE_CODES, "camera": HARDWARE_CODES, "wifi": WIFI_CODES}
+
+
+class TelemetrySample:
+    """One reading from a robot; fields the robot did not send are None."""
+
+    __slots__ = ("t", "node", "battery", "codes")
+
+    def __init__(self, t, node=None, battery=None, codes=None):
+        self.t = t
+        self.node = node
+        self.battery = battery
+        self.codes = codes or {}  # komponen -> kode StatusElektronika
+
+    @classmethod
+    def parse(cls, raw, now):
+        """Validate one sample from the request body; raises ValueError with the reason."""
+        if not isinstance(raw, dict):
+            raise ValueError("Sampel harus object JSON")
+        t = raw.get('t', now)
+        # JSON dari Python menerima NaN/Infinity; timestamp seperti itu merusak window dan history
+        if isinstance(t, bool) or not isinstance(t, (int, float)) or not math.isfinite(t):
+            raise ValueError("t harus timestamp (detik)")
+        node = raw.get('node')
+        if node is not None:
+            node = str(node).upper()
+            if node not in route_calculation.coords:
+                raise ValueError(f"Node {node} tidak ada di map")
+        battery = raw.get('battery')
+        if battery is not None:
+            if isinstance(battery, bool) or not isinstance(battery, (int, float)) or not math.isfinite(battery) or not 0 <= battery <= 100:
+                raise ValueError("battery harus 0-100")
+            battery = float(battery)
+        codes = {}
+        for name, allowed in COMPONENTS.items():
+            if raw.get(name) is not None:
+                # list/dict tidak bisa dicek dengan `in` pada set (TypeError), tolak lebih dulu
+                if not isinstance(raw[name], (int, str)) or raw[name] not in allowed:
+                    raise ValueError(f"Kode {name} tidak dikenal: {raw[name]}")
+                codes[name] = int(raw[name])
+        if node is None and battery is None and not codes:
+            raise ValueError("Sampel kosong")
+        return cls(float(t), node, battery, codes)
+
+    def to_dict(self):
+        return dict({"t": self.t, "node": self.node, "battery": self.battery}, **self.codes)
+
+
+class _Window:
+    """Running summary of the samples since the last persisted record (O(1) per sample)."""
+
+    def __init__(self):
+        self.count = 0
+        self.start = None
+        self.end = None
+        self.node = None
+        self.battery_sum = 0.0
+        self.battery_count = 0
+        self.battery_min = None
+        self.worst = {}  # komponen -> kode terburuk (kode kecil = lebih buruk)
+
+    def add(self, sample):
+        self.count += 1
+        self.start = sample.t if self.start is None else min(self.start, sample.t)
+        if self.end is None or sample.t >= self.end:
+            self.end = sample.t
+            self.node = sample.node or self.node
+        if sample.battery is not None:
+            self.battery_sum += sample.battery
+            self.battery_count += 1
+            self.battery_min = sample.battery if self.battery_min is None else min(self.battery_min, sample.battery)
+        for name, code in sample.codes.items():
+            self.worst[name] = min(self.worst.get(name, code), code)
+
+    def to_record(self, robot_id):
+        return dict({
+            "robot_id": robot_id,
+            "start": self.start,
+            "end": self.end,
+            "samples": self.count,
+            "node": self.node,
+            "battery_mean": round(self.battery_sum / self.battery_count, 1) if self.battery_count else None,
+            "battery_min": self.battery_min,
+        }, **self.worst)
+
+
+class TelemetryStore:
+    """Per-robot ring buffers of telemetry samples with periodic downsampled persistence."""
+
+    def __init__(self, log_path=TELEMETRY_LOG, ring_size=RING_SIZE, persist_interval=PERSIST_INTERVAL):
+        self._lock = threading.Lock()
+        self._rings = {}    # robot_id -> deque(maxlen=ring_size), urut waktu terima
+        self._latest = {}   # robot_id -> sampel dengan t terbesar
+        self._windows = {}  # robot_id -> _Window yang belum ditulis
+        self._thread = None
+        self.ring_size = ring_size
+        self.persist_interval = persist_interval
+        self.log = HistoryStore(log_path, fsync=False)
+        self.version = 0    # naik setiap ada sampel terbaru baru (untuk ETag /api/positions)
+
+    def ingest(self, robot_id, raw_samples, now=None):
+        """Store a batch of raw samples. Returns (accepted count, [{"index", "error"}])."""
+        now = time.time() if now is None else now
+        samples, errors = [], []
+        for i, raw in enumerate(raw_samples):
+            try:
+                samples.append(TelemetrySample.parse(raw, now))
+            except ValueError as error:
+                errors.append({"index": i, "error": str(error)})
+        TELEMETRY_SAMPLES.inc(len(samples), robot_id=robot_id, result='accepted')
+        if errors:
+            TELEMETRY_SAMPLES.inc(len(errors), robot_id=robot_id, result='rejected')
+        if not samples:
+            return 0, errors
+
+        samples.sort(key=lambda sample: sample.t)
+        with self._lock:
+            ring = self._rings.setdefault(robot_id, deque(maxlen=self.ring_size))
+            window = self._windows.setdefault(robot_id, _Window())
+            ring.extend(samples)
+            for sample in samples:
+                window.add(sample)
+            previous = self._latest.get(robot_id)
+            # Batch yang datang terlambat tidak memundurkan posisi / status
+            newest = samples[-1] if previous is None or samples[-1].t >= previous.t else None
+            if newest is not None:
+                self._latest[robot_id] = _merge(previous, newest)
+                self.version += 1
+        self._ensure_thread()
+        if newest is not None:
+            self._apply(robot_id, samples)
+        return len(samples), errors
+
+    def latest(self, robot_id):
+        """Newest known value of every field (as dict), or None."""
+        with self._lock:
+            sample = self._latest.get(robot_id)
+            return sample.to_dict() if sample else None
+
+    def recent(self, robot_id, limit=100):
+        """The last `limit` samples of the ring buffer, oldest first."""
+        with self._lock:
+            ring = self._rings.get(robot_id, ())
+            return [sample.to_dict() for sample in list(ring)[-limit:]] if limit > 0 else []
+
+    def flush(self):
+        """Append one summary record per robot for the current window."""
+        with self._lock:
+            windows, self._windows = self._windows, {}
+        for robot_id, window in windows.items():
+            if window.count:
+                self.log.append(window.to_record(robot_id))
+
+    # --- Internal ---
+    def _apply(self, robot_id, samples):
+        # Posisi dan status hardware mengikuti nilai terbaru di batch
+        node = next((sample.node for sample in reversed(samples) if sample.node), None)
+        if node and read_robot_status(robot_id).get('posisi') != node:
+            update_route_db(robot_id, posisi=node)
+        if robot_id != DEFAULT_ROBOT_ID:
+            return  # electronicsystem_database.json hanya untuk robot utama
+        fields = {}
+        for sample in samples:
+            fields.update(sample.codes)
+            if sample.battery is not None:
+                fields['baterai'] = int(round(sample.battery))
+        if fields:
+            update_electronics_status(**fields)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._persist_loop, name="telemetry-persist", daemon=True)
+            self._thread.start()
+
+    def _persist_loop(self):
+        while True:
+            time.sleep(self.persist_interval)
+            self.flush()
+
+
+def _merge(previous, sample):
+    # Field yang tidak dikirim di sampel baru tetap memakai nilai terakhir
+    if previous is None:
+        return sample
+    return TelemetrySample(sample.t, sample.node or previous.node,
+                           previous.battery if sample.battery is None else sample.battery,
+                           dict(previous.codes, **sample.codes))
+
+
+# --- Posisi di gambar denah ---
+_floor_plan = None
+
+def floor_plan():
+    """Floor plan picture info of the default map (see map_loader.load_map_image)."""
+    global _floor_plan
+    if _floor_plan is None:
+        _floor_plan = load_map_image(DEFAULT_MAP_FILE) or {}
+    return _floor_plan
+
+def floor_plan_point(node):
+    """(left %, top %) of `node` on the floor plan picture, or None if unknown."""
+    image = floor_plan()
+    if not image or node not in route_calculation.coords:
+        return None
+    if node in image["points"]:
+        px, py = image["points"][node]
+        return round(100 * px / image["width"], 2), round(100 * py / image["height"], 2)
+    # Node tanpa titik di gambar: skala kotak koordinat map ke seluruh gambar (y map ke atas)
+    xs = [x for x, _ in route_calculation.coords.values()]
+    ys = [y for _, y in route_calculation.coords.values()]
+    x, y = route_calculation.coords[node]
+    left = 100 * (x - min(xs)) / ((max(xs) - min(xs)) or 1)
+    top = 100 * (max(ys) - y) / ((max(ys) - min(ys)) or 1)
+    return round(left, 2), round(top, 2)
+
+
+telemetry = TelemetryStore()
+atexit.register(telemetry.flush)
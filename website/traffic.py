@@ -0,0 +1,187 @@
+import heapq
+import threading
+import time
+from array import array
+
+from . import route_calculation
+
+BLOCKED = float('inf')
+
+
+def check_factor(factor):
+    """Raise ValueError unless `factor` is a valid congestion factor."""
+    if not factor >= 1:
+        raise ValueError("Faktor macet harus >= 1")
+
+
+class EdgeCondition:
+    """A temporary weight change on one directed edge (a -> b)."""
+
+    def __init__(self, a, b, factor, expires=None, reason=''):
+        self.a = a
+        self.b = b
+        self.factor = factor     # BLOCKED, atau pengali bobot >= 1 (macet)
+        self.expires = expires   # time.time() saat kondisi berakhir, None = sampai di-clear
+        self.reason = reason
+
+    @property
+    def blocked(self):
+        return self.factor == BLOCKED
+
+    def to_dict(self):
+        return {
+            "from": self.a,
+            "to": self.b,
+            "blocked": self.blocked,
+            "factor": None if self.blocked else self.factor,
+            "expires": self.expires,
+            "reason": self.reason,
+        }
+
+
+class EdgeConditions:
+    """Blocked / congested corridors with optional expiry.
+
+    Conditions are keyed by node names so they survive a map reload.
+    Listeners are called with the list of changed (a, b) edges after every
+    change, including expiry (handled by a background thread).
+    """
+
+    def __init__(self, clock=time.time):
+        self._cond = threading.Condition()
+        self._entries = {}     # (a, b) -> EdgeCondition
+        self._expiry = []      # heap (expires, a, b)
+        self._listeners = []
+        self._clock = clock
+        self._thread = None
+        self._weights_cache = (None, None, None)  # (cgraph, version, weights)
+        self.version = 0
+
+    # --- Ubah kondisi ---
+    def block(self, a, b, ttl=None, reason='', both_ways=True):
+        """Mark corridor a -> b (and b -> a) as impassable, optionally for `ttl` seconds."""
+        return self._set(a, b, BLOCKED, ttl, reason, both_ways)
+
+    def congest(self, a, b, factor, ttl=None, reason='', both_ways=True):
+        """Multiply the weight of a -> b by `factor` (>= 1 keeps A*/D* Lite heuristics admissible)."""
+        check_factor(factor)
+        return self._set(a, b, float(factor), ttl, reason, both_ways)
+
+    def clear(self, a=None, b=None, both_ways=True):
+        """Remove the condition on a -> b (and b -> a), or every condition if no edge is given."""
+        with self._cond:
+            if a is None:
+                keys = list(self._entries)
+            else:
+                keys = [key for key in _keys(a.upper(), b.upper(), both_ways) if key in self._entries]
+            for key in keys:
+                del self._entries[key]
+            if keys:
+                self.version += 1
+        self._notify(keys)
+        return keys
+
+    def expire(self):
+        """Drop conditions whose time is up. Returns the changed edges."""
+        now = self._clock()
+        changed = []
+        with self._cond:
+            while self._expiry and self._expiry[0][0] <= now:
+                expires, a, b = heapq.heappop(self._expiry)
+                entry = self._entries.get((a, b))
+                # Entri bisa sudah di-clear atau diganti dengan expiry lain
+                if entry is not None and entry.expires == expires:
+                    del self._entries[(a, b)]
+                    changed.append((a, b))
+            if changed:
+                self.version += 1
+        self._notify(changed)
+        return changed
+
+    def add_listener(self, func):
+        self._listeners.append(func)
+
+    # --- Baca ---
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def active(self):
+        self.expire()
+        with self._cond:
+            return [entry.to_dict() for entry in self._entries.values()]
+
+    def factor(self, a, b):
+        with self._cond:
+            entry = self._entries.get((a, b))
+            return entry.factor if entry is not None else 1.0
+
+    def effective_weights(self, cgraph):
+        """Copy of `cgraph.weights` with the conditions applied (cached per version)."""
+        self.expire()
+        with self._cond:
+            cached_graph, cached_version, weights = self._weights_cache
+            if cached_graph is cgraph and cached_version == self.version:
+                return weights
+            weights = array('d', cgraph.weights)
+            index, offsets, targets = cgraph.index, cgraph.offsets, cgraph.targets
+            for (a, b), entry in self._entries.items():
+                if a not in index or b not in index:
+                    continue
+                u, v = index[a], index[b]
+                for pos in range(offsets[u], offsets[u + 1]):
+                    if targets[pos] == v:
+                        weights[pos] = weights[pos] * entry.factor
+            self._weights_cache = (cgraph, self.version, weights)
+            return weights
+
+    # --- Internal ---
+    def _set(self, a, b, factor, ttl, reason, both_ways):
+        a, b = a.upper(), b.upper()
+        expires = self._clock() + ttl if ttl else None
+        keys = _keys(a, b, both_ways)
+        with self._cond:
+            for key in keys:
+                self._entries[key] = EdgeCondition(key[0], key[1], factor, expires, reason)
+                if expires is not None:
+                    heapq.heappush(self._expiry, (expires, key[0], key[1]))
+            self.version += 1
+            if expires is not None:
+                self._ensure_expiry_thread()
+                self._cond.notify_all()
+        self._notify(keys)
+        return keys
+
+    def _notify(self, changed):
+        if not changed:
+            return
+        for func in list(self._listeners):
+            func(changed)
+
+    def _ensure_expiry_thread(self):
+        # Caller must hold self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._expiry_loop, name="edge-expiry", daemon=True)
+            self._thread.start()
+
+    def _expiry_loop(self):
+        while True:
+            with self._cond:
+                timeout = self._expiry[0][0] - self._clock() if self._expiry else None
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+            self.expire()
+
+
+def _keys(a, b, both_ways):
+    return [(a, b), (b, a)] if both_ways else [(a, b)]
+
+
+def edge_exists(a, b):
+    """True if the active map has a direct edge a -> b or b -> a."""
+    graph = route_calculation.graph
+    a, b = a.upper(), b.upper()
+    return b in graph.get(a, {}) or a in graph.get(b, {})
+
+
+edge_conditions = EdgeConditions()
@@ -1,94 +1,377 @@
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify # Added jsonify
-from website.database_management import read_statuses, update_tujuan_db, ROBOT_STATUS_FILE
-from .route_calculation import a_star_search, coords
-from .route_instructions import generate_instructions
-from .mockup_robot import run_robot_simulation # Function for simulation
-from .status_book_callingcard import StatusRobot, StatusElektronika, StatusPaket
-import threading
-import json 
-import os
+from flask import Blueprint, Response, render_template, request, redirect, url_for, jsonify # Added jsonify
+from website.database_management import read_statuses, read_robot_snapshot, wait_robot_status_change, read_delivery_history, DEFAULT_ROBOT_ID
+from website.database_management import read_dashboard_version, read_state_modified, count_delivery_history, robot_key, read_robot_status
+from .fleet import scheduler, BUSY_STATUSES
+from .status_book_callingcard import StatusRobot, StatusElektronika, StatusPaket, status_code_table, STATUS_TABLE_VERSION
+from .stats import read_stats, STATS_KEY
+from .http_cache import conditional_response, make_etag, cached_json, gzip_response, response_cache
+from .compact_payload import PayloadTooLarge, compact_status, pack_status
+from .traffic import edge_exists
+from .telemetry import telemetry, floor_plan, floor_plan_point, MAX_BATCH
+from .state_store import store
+from . import cluster
+from . import route_calculation
+from . import metrics
+import json
+import math
 
 views = Blueprint('views', __name__)
 
+LONG_POLL_TIMEOUT = 25      # detik, default tunggu untuk ?since=
+LONG_POLL_MAX_TIMEOUT = 60
+SSE_HEARTBEAT = 15          # detik, komentar keep-alive untuk koneksi SSE
+HISTORY_PAGE_LIMIT = 50
+HISTORY_MAX_LIMIT = 500
+STATUS_CODES_MAX_AGE = 24 * 3600  # tabel kode hanya berubah saat deploy
+TELEMETRY_PAGE_LIMIT = 100
+# Field status robot yang ditampilkan MONITOR; perubahan lain (mis. posisi per node) tidak me-reload halaman
+MONITOR_FIELDS = ('status_robot', 'status_paket', 'tujuan_sekarang', 'rute_terakhir')
+
+def long_poll_timeout(value):
+    """Clamp a requested long-poll timeout to 0..LONG_POLL_MAX_TIMEOUT (nan/inf -> default)."""
+    # min(nan, 60) tetap nan: tanpa cek ini request tidak pernah selesai
+    if not math.isfinite(value):
+        return LONG_POLL_TIMEOUT
+    return min(max(0.0, value), LONG_POLL_MAX_TIMEOUT)
+
 @views.route('/')
 def home():
-    context = read_statuses()
-    return render_template("dashboard_home.html", **context)
+    # HTML hasil render disimpan per versi state + versi SSID, jadi render ulang hanya kalau ada perubahan
+    (version, wifi_version), modified = read_dashboard_version()
+    cache_key = ('home', version, wifi_version)
+
+    def build():
+        return Response(response_cache.get_or_build(
+            cache_key, lambda: render_template("dashboard_home.html", **read_statuses())), mimetype='text/html')
+
+    return conditional_response(make_etag(*cache_key, per_process=True), build, last_modified=modified)
 
 # --- NEW API ENDPOINT FOR ESP32 ---
 @views.route('/api/robot-data')
-def api_robot_data():
+@views.route('/api/robot-data/<robot_id>')
+def api_robot_data(robot_id=DEFAULT_ROBOT_ID):
     """
     ESP32 polls this to get the current status and route.
+    Tiap robot di armada punya endpoint sendiri: /api/robot-data/<robot_id>
+
+    Long-poll: `?since=<version>` waits until the status version is newer than
+    `since` (or `timeout` seconds pass) before answering. Versions restart
+    when X-State-Epoch changes; a `since` from before that answers at once.
+    """
+    robot_id = robot_id.upper()
+    if robot_id not in scheduler.robot_ids:
+        return jsonify({"error": "Robot tidak terdaftar"}), 404
+
+    since = request.args.get('since', type=int)
+    if since is not None:
+        timeout = long_poll_timeout(request.args.get('timeout', LONG_POLL_TIMEOUT, type=float))
+        wait_robot_status_change(since, timeout, robot_id)
+
+    version, data = read_robot_snapshot(robot_id)
+    _, modified = read_state_modified(robot_key(robot_id))
+    with_version = since is not None
+    if with_version:
+        data['version'] = version
+
+    # Body JSON di-cache per versi; polling tanpa perubahan cukup dijawab 304
+    cache_key = ('robot-data', robot_id, version, int(with_version))
+    response = conditional_response(make_etag(*cache_key), lambda: cached_json(cache_key, lambda: data),
+                                    last_modified=modified)
+    response.headers['X-State-Version'] = str(version)
+    response.headers['X-State-Epoch'] = store.epoch
+    return response
+
+@views.route('/api/robot-data/compact')
+@views.route('/api/robot-data/<robot_id>/compact')
+def api_robot_data_compact(robot_id=DEFAULT_ROBOT_ID):
+    """
+    Payload ringkas untuk ESP32: kode belok, id node rute dan versi state.
+    JSON minimal {"v", "s", "p", "c", "r"} atau `?format=bin` (lihat compact_payload).
+    Mendukung If-None-Match: kalau versi belum berubah balas 304 tanpa body.
+    Rute yang tidak muat di format biner dibalas 406, bukan dipotong.
+    """
+    robot_id = robot_id.upper()
+    if robot_id not in scheduler.robot_ids:
+        return jsonify({"error": "Robot tidak terdaftar"}), 404
+
+    since = request.args.get('since', type=int)
+    if since is not None:
+        timeout = long_poll_timeout(request.args.get('timeout', LONG_POLL_TIMEOUT, type=float))
+        wait_robot_status_change(since, timeout, robot_id)
+
+    fmt = 'bin' if request.args.get('format') == 'bin' else 'json'
+    version, data = read_robot_snapshot(robot_id)
+    # Versi map ikut di ETag karena id node berubah kalau map diganti
+    etag = make_etag(robot_id, version, route_calculation.graph_version, fmt)
+
+    def build():
+        if fmt == 'bin':
+            return Response(pack_status(version, data), mimetype='application/octet-stream')
+        return jsonify(compact_status(version, data))
+
+    try:
+        return conditional_response(etag, build)
+    except PayloadTooLarge as error:
+        # Tidak bisa dikirim sebagai biner; klien diminta pindah ke JSON
+        return jsonify({"error": str(error)}), 406
+
+@views.route('/api/robot-data/stream')
+def api_robot_data_stream():
+    """
+    Server-Sent Events: kirim status robot setiap kali update_tujuan_db mengubah state.
+    """
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    since = request.args.get('since', last_event_id if last_event_id is not None else -1, type=int)
+
+    def event_stream(since):
+        while True:
+            version = wait_robot_status_change(since, SSE_HEARTBEAT)
+            if version == since:
+                yield ": keep-alive\n\n"
+                continue
+            version, data = read_robot_snapshot()
+            since = version
+            yield f"id: {version}\nevent: status\ndata: {json.dumps(data)}\n\n"
+
+    return Response(event_stream(since), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@views.route('/api/history')
+def api_history():
+    """
+    Riwayat pengiriman per halaman: /api/history?offset=0&limit=50
+    """
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', HISTORY_PAGE_LIMIT, type=int), 0), HISTORY_MAX_LIMIT)
+    # History hanya bertambah, jadi jumlah record cukup sebagai versi
+    cache_key = ('history', count_delivery_history(), offset, limit)
+
+    def build_data():
+        total, items = read_delivery_history(offset, limit)
+        return {"total": total, "offset": offset, "limit": limit, "items": items}
+
+    response = conditional_response(make_etag(*cache_key), lambda: cached_json(cache_key, build_data))
+    return gzip_response(response, cache_key)
+
+@views.route('/api/stats')
+def api_stats():
+    """
+    Statistik pengiriman agregat (per tujuan, per pengirim, durasi, panjang rute pulang).
+    """
+    version, modified = read_state_modified(STATS_KEY)
+    cache_key = ('stats', version)
+    return conditional_response(make_etag(*cache_key), lambda: cached_json(cache_key, read_stats),
+                                last_modified=modified)
+
+@views.route('/api/status-codes')
+def api_status_codes():
+    """
+    Tabel kode status -> nama, teks dan warna tampilan, supaya klien cukup mengambil sekali.
+    """
+    cache_key = ('status-codes', STATUS_TABLE_VERSION)
+    return conditional_response(make_etag(*cache_key), lambda: cached_json(cache_key, status_code_table),
+                                max_age=STATUS_CODES_MAX_AGE)
+
+@views.route('/metrics')
+def metrics_endpoint():
+    """
+    Metrik dalam format teks Prometheus (latency per route, hot path, cache, antrian).
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@views.route('/api/fleet')
+def api_fleet():
     """
-    if os.path.exists(ROBOT_STATUS_FILE):
-        with open(ROBOT_STATUS_FILE, 'r') as f:
-            data = json.load(f)
-            return jsonify(data)
-    return jsonify({"error": "Database not found"}), 404
+    Semua robot di armada beserta job yang sedang jalan dan antrian.
+    """
+    return jsonify(cluster.fleet_snapshot())
+
+@views.route('/api/missions')
+def api_missions():
+    """
+    Misi yang sedang jalan / antri di executor, plus antrian job scheduler.
+    """
+    return jsonify(cluster.missions_snapshot())
+
+@views.route('/api/missions/<int:job_id>/cancel', methods=['POST'])
+def api_cancel_mission(job_id):
+    """
+    Batalkan job di antrian, atau hentikan misi yang sedang jalan (robot -> KENDALA 107).
+    """
+    if cluster.cancel_job(job_id):
+        return jsonify({"cancelled": job_id})
+    return jsonify({"error": "Misi tidak ditemukan atau sudah selesai"}), 404
+
+@views.route('/api/robots/<robot_id>/reset', methods=['POST'])
+def api_reset_robot(robot_id):
+    """
+    Kembalikan robot yang KENDALA ke status standby di station.
+    """
+    robot_id = robot_id.upper()
+    if robot_id not in scheduler.robot_ids:
+        return jsonify({"error": "Robot tidak terdaftar"}), 404
+    if not cluster.reset(robot_id):
+        return jsonify({"error": "Robot masih menjalankan misi"}), 409
+    return jsonify({"reset": robot_id})
+
+@views.route('/api/edges')
+def api_edges():
+    """
+    Koridor yang sedang ditutup / macet, plus rute robot yang sedang dipantau replanner.
+    """
+    return jsonify(cluster.edges_snapshot())
+
+@views.route('/api/edges/<action>', methods=['POST'])
+def api_edges_update(action):
+    """
+    Ubah kondisi koridor: POST /api/edges/block|congest|clear
+    dengan {"from", "to", "ttl" (detik, opsional), "factor" (congest), "reason", "both_ways"}.
+    Robot yang sedang jalan langsung di-reroute oleh replanner.
+    """
+    if action not in cluster.EDGE_ACTIONS:
+        return jsonify({"error": "Aksi tidak dikenal"}), 404
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.form
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body harus JSON object"}), 400
+    a, b = data.get('from'), data.get('to')
+    if not isinstance(a, (str, type(None))) or not isinstance(b, (str, type(None))):
+        return jsonify({"error": "from/to harus nama node"}), 400
+    if action == 'clear' and not a and not b:
+        return jsonify({"cleared": len(cluster.change_edges('clear'))})
+    if not a or not b or not edge_exists(a, b):
+        return jsonify({"error": "Koridor tidak ada di map"}), 404
+
+    kwargs = {"both_ways": str(data.get('both_ways', True)).lower() not in ('0', 'false', 'no')}
+    try:
+        if action != 'clear':
+            kwargs["ttl"] = _ttl(data.get('ttl'))
+            kwargs["reason"] = data.get('reason', '')
+        if action == 'congest':
+            kwargs["factor"] = _number(data.get('factor', 2), 'factor')
+        # Di mode multi-worker perintah diteruskan ke worker leader
+        cluster.change_edges(action, a, b, **kwargs)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify(cluster.edges_snapshot())
+
+def _number(value, name):
+    """float() of a request field; ValueError (-> 400) for anything that is not a number."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} harus angka")
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} harus angka") from None
+
+def _ttl(value):
+    """Optional ttl in seconds; None/'' means no expiry, anything else must be a finite number > 0."""
+    if value is None or value == '':
+        return None
+    ttl = _number(value, 'ttl')
+    # ttl 0 dulu berarti "tanpa batas"; ttl <= 0 / nan sekarang ditolak
+    if not math.isfinite(ttl) or ttl <= 0:
+        raise ValueError("ttl harus angka > 0")
+    return ttl
+
+@views.route('/api/telemetry', methods=['POST'])
+def api_telemetry():
+    """
+    Robot mengirim sampel telemetry (boleh batch):
+    {"robot_id": "ROBOT_1", "samples": [{"t", "node", "battery", "raspberry", "esp32", "camera", "wifi"}]}
+    Kode komponen memakai StatusElektronika (201-203, wifi 251-253). Sampel tunggal boleh tanpa "samples".
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Body harus JSON object"}), 400
+    robot_id = str(data.get('robot_id', DEFAULT_ROBOT_ID)).upper()
+    if robot_id not in scheduler.robot_ids:
+        return jsonify({"error": "Robot tidak terdaftar"}), 404
+    samples = data['samples'] if 'samples' in data else [data]
+    if not isinstance(samples, list) or len(samples) > MAX_BATCH:
+        return jsonify({"error": f"samples harus list (maks {MAX_BATCH})"}), 400
+
+    accepted, errors = telemetry.ingest(robot_id, samples)
+    return jsonify({"accepted": accepted, "rejected": errors}), (200 if accepted or not errors else 400)
+
+@views.route('/api/telemetry/<robot_id>')
+def api_telemetry_read(robot_id):
+    """
+    Sampel terakhir dari ring buffer robot: /api/telemetry/ROBOT_1?limit=100
+    """
+    robot_id = robot_id.upper()
+    if robot_id not in scheduler.robot_ids:
+        return jsonify({"error": "Robot tidak terdaftar"}), 404
+    limit = min(max(request.args.get('limit', TELEMETRY_PAGE_LIMIT, type=int), 0), telemetry.ring_size)
+    return jsonify({"latest": telemetry.latest(robot_id), "samples": telemetry.recent(robot_id, limit)})
+
+@views.route('/api/positions')
+def api_positions():
+    """
+    Posisi robot di gambar denah (persen dari lebar/tinggi gambar) untuk overlay di halaman SEND.
+    """
+    keys = [robot_key(robot_id) for robot_id in scheduler.robot_ids]
+    version, modified = read_state_modified(*keys)
+    cache_key = ('positions', version, telemetry.version, route_calculation.graph_version)
+
+    def build_data():
+        robots = {}
+        for robot_id in scheduler.robot_ids:
+            status = read_robot_status(robot_id)
+            node = status.get('posisi', 'START')
+            point = floor_plan_point(node)
+            latest = telemetry.latest(robot_id) or {}
+            robots[robot_id] = {
+                "node": node,
+                "left": point[0] if point else None,
+                "top": point[1] if point else None,
+                "status_robot": status.get('status_robot'),
+                "battery": latest.get('battery'),
+            }
+        return {"image": floor_plan().get('file'), "robots": robots}
+
+    return conditional_response(make_etag(*cache_key, per_process=True), lambda: cached_json(cache_key, build_data),
+                                last_modified=modified)
 
 @views.route('/send', methods=['GET', 'POST'])
 def send_page():
-    # ... (Existing logic to read status) ...
-    current_status = int(StatusRobot.ROBOT_AKTIF)
-    tujuan_sekarang = ""
-    rute_sekarang = ""
-    instruksi_sekarang = []
-
-    if os.path.exists(ROBOT_STATUS_FILE):
-        with open(ROBOT_STATUS_FILE, 'r') as f:
-            db_data = json.load(f)
-            current_status = db_data.get('status_robot', int(StatusRobot.ROBOT_STANDBY_DISTATION))
-            tujuan_sekarang = db_data.get('tujuan_sekarang', '-')
-            rute_sekarang = db_data.get('rute_terakhir', '-')
-            instruksi_sekarang = db_data.get('instruksi_navigasi', [])
-
-    # If robot is busy, show MONITOR mode
-    if current_status in [104, 105, 106, 107]: # Simplified list
-         return render_template("dashboard_send.html", 
-                               mode="MONITOR",
-                               status_code=current_status,
-                               tujuan=tujuan_sekarang,
-                               rute=rute_sekarang,
-                               instruksi=instruksi_sekarang)
-
     # --- HANDLER FORM ---
+    # Pesanan selalu diterima: kalau semua robot sibuk, masuk antrian scheduler
     hasil_rute = ""
     status_rute = ""
     warna_status = ""
-    list_instruksi = []
 
     if request.method == 'POST':
-        tujuan = request.form.get('pilihan').upper()
+        # Beberapa ruangan dipisah koma (mis. "10A, 10B, 11A") = satu misi multi-drop
+        tujuan = [room.strip().upper() for room in request.form.get('pilihan', '').split(',') if room.strip()]
         nama = request.form.get('nama')
-        
-        path, msg = a_star_search('START', tujuan)
-        
-        if path:
-            rute_str = " -> ".join(path)
-            hasil_rute = rute_str
-            status_rute = "RUTE OK! ROBOT DILUNCURKAN (SIMULASI)"
-            warna_status = "text-success"
-            
-            # 1. Generate Instructions for ESP32
-            list_instruksi = generate_instructions(path, coords)
-            
-            # 2. Start the Simulation Thread (This drives the database updates)
-            # This will automatically change status 104 -> 105 -> 106 over time
-            robot_thread = threading.Thread(target=run_robot_simulation, 
-                                            args=(tujuan, nama, rute_str, list_instruksi))
-            robot_thread.start()
-            
+
+        job, msg = cluster.submit_order(tujuan, nama)
+        if job:
             return redirect(url_for('views.send_page'))
-            
-        else:
-            hasil_rute = "Lokasi tidak valid!"
-            status_rute = "ERROR"
-            warna_status = "text-danger"
-
-    return render_template("dashboard_send.html", 
-                           mode="INPUT",
-                           hasil_rute=hasil_rute, 
+
+        hasil_rute = "Lokasi tidak valid!"
+        status_rute = "ERROR"
+        warna_status = "text-danger"
+
+    # Status dibaca dari state store (memori), bukan dari file
+    state_version, db_data = read_robot_snapshot()
+    current_status = db_data.get('status_robot', int(StatusRobot.ROBOT_STANDBY_DISTATION))
+    fleet = cluster.fleet_snapshot()
+
+    # If robot is busy, show MONITOR mode (form tetap tampil untuk antrian)
+    mode = "MONITOR" if current_status in BUSY_STATUSES else "INPUT"
+    return render_template("dashboard_send.html",
+                           mode=mode,
+                           state_version=state_version,
+                           monitor_fields={field: db_data.get(field) for field in MONITOR_FIELDS},
+                           status_code=current_status,
+                           tujuan=db_data.get('tujuan_sekarang', '-'),
+                           rute=db_data.get('rute_terakhir', '-'),
+                           instruksi=db_data.get('instruksi_navigasi', []),
+                           hasil_rute=hasil_rute,
                            status_rute=status_rute,
                            warna_status=warna_status,
-                           instruksi=list_instruksi)
\ No newline at end of file
+                           antrian=fleet['queue'],
+                           robots=fleet['robots'])